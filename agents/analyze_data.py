@@ -1,37 +1,46 @@
+import numpy as np
 import pandas as pd
+from agents.load_cartola_csv import SCOUT_COLUMNS
+from utils.instrumentation import instrument
 
-def compute_player_metrics(df: pd.DataFrame) -> pd.DataFrame:
+# janelas das médias recentes e fator de suavização da EWMA (span=5)
+WINDOWS   = (3, 5)
+EWM_ALPHA = 2 / (5 + 1)
+
+
+def _normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Ajusta nomes de colunas e calcula:
-      - avg_points: média de pontos por jogador
-      - cost_benefit: avg_points / price
+    Ajusta nomes de colunas para player_id / points / price.
 
     Espera as colunas originais como:
       * atleta_id  ou  player_id
       * pontuacao  ou  pontos  (ou dentro de estatisticas)
       * preco      ou  valor   (ou dentro de estatisticas)
     """
-    df = df.copy()
+    renames = {}
 
     # 1) Renomear ID do atleta
     if 'atleta_id' in df.columns:
-        df.rename(columns={'atleta_id': 'player_id'}, inplace=True)
+        renames['atleta_id'] = 'player_id'
 
     # 2) Renomear coluna de pontos
     if 'pontuacao' in df.columns:
-        df.rename(columns={'pontuacao': 'points'}, inplace=True)
+        renames['pontuacao'] = 'points'
     elif 'pontos' in df.columns:
-        df.rename(columns={'pontos': 'points'}, inplace=True)
-    # Se veio como estatisticas.pontos (json_normalize), extraia:
-    elif 'estatisticas.pontos' in df.columns:
-        df['points'] = df['estatisticas.pontos']
+        renames['pontos'] = 'points'
 
     # 3) Renomear coluna de preço
     if 'preco' in df.columns:
-        df.rename(columns={'preco': 'price'}, inplace=True)
+        renames['preco'] = 'price'
     elif 'valor' in df.columns:
-        df.rename(columns={'valor': 'price'}, inplace=True)
-    elif 'estatisticas.preco' in df.columns:
+        renames['valor'] = 'price'
+
+    df = df.rename(columns=renames)
+
+    # Se veio como estatisticas.pontos / estatisticas.preco (json_normalize), extraia
+    if 'points' not in df.columns and 'estatisticas.pontos' in df.columns:
+        df['points'] = df['estatisticas.pontos']
+    if 'price' not in df.columns and 'estatisticas.preco' in df.columns:
         df['price'] = df['estatisticas.preco']
 
     # 4) Verificar colunas obrigatórias
@@ -39,9 +48,151 @@ def compute_player_metrics(df: pd.DataFrame) -> pd.DataFrame:
     missing = [c for c in required if c not in df.columns]
     if missing:
         raise KeyError(f"Colunas obrigatórias ausentes: {missing}")
+    return df
 
-    # 5) Cálculo das métricas
-    df['avg_points'] = df.groupby('player_id')['points'].transform('mean')
-    df['cost_benefit'] = df['avg_points'] / df['price']
 
-    return df
+def to_cents(values) -> np.ndarray:
+    """Pontos em centésimos inteiros: as somas ficam exatas e independem da ordem."""
+    return np.round(np.asarray(values, dtype="float64") * 100).astype(np.int64)
+
+
+def ewm_step(state: np.ndarray, x: np.ndarray, first: np.ndarray) -> np.ndarray:
+    """Um passo da EWMA (em centésimos); `first` marca a primeira observação do jogador."""
+    return np.where(first, x, EWM_ALPHA * x + (1 - EWM_ALPHA) * state)
+
+
+def finalize_metrics(latest: pd.DataFrame, agg: dict) -> pd.DataFrame:
+    """
+    Monta o DataFrame final (uma linha por jogador) a partir dos agregados.
+
+    :param latest: última linha de cada jogador (colunas originais)
+    :param agg: arrays alinhados com `latest`:
+                count, total, sumsq, ewm, games_played, played_total,
+                last{k}_sum / last{k}_n para cada janela, scouts (P × S)
+    """
+    out   = latest.reset_index(drop=True)
+    count = agg["count"].astype("float64")
+    total = agg["total"]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out["n_rounds"]   = agg["count"]
+        out["avg_points"] = total / (count * 100)
+        var_num = np.maximum(agg["count"] * agg["sumsq"] - total * total, 0)
+        out["std_points"] = np.where(
+            count > 1, np.sqrt(var_num / (count * (count - 1))) / 100, np.nan
+        )
+        for k in WINDOWS:
+            out[f"avg_points_last{k}"] = agg[f"last{k}_sum"] / (agg[f"last{k}_n"] * 100.0)
+        out["ewm_points"] = agg["ewm"] / 100
+
+        games = agg["games_played"].astype("float64")
+        out["games_played"]    = agg["games_played"]
+        out["points_per_game"] = np.where(games > 0, agg["played_total"] / (games * 100), np.nan)
+
+        price = out["price"].to_numpy(dtype="float64")
+        out["cost_benefit"] = np.where(price > 0, out["avg_points"].to_numpy() / price, 0.0)
+
+        scouts = agg["scouts"]
+        for j, s in enumerate(SCOUT_COLUMNS):
+            out[f"{s}_avg"] = np.where(games > 0, scouts[:, j] / games, np.nan)
+
+    return out
+
+
+def dense_aggregates(points: np.ndarray, present: np.ndarray, played: np.ndarray) -> dict:
+    """
+    Agregados por jogador a partir da representação densa jogador × rodada.
+
+    :param points: int64 (P × R), pontos em centésimos (rodadas em ordem cronológica)
+    :param present: bool (P × R), jogador tem registro na rodada
+    :param played: bool (P × R), jogador entrou em campo na rodada
+    """
+    pts = np.where(present, points, 0)
+    agg = {
+        "count": present.sum(axis=1),
+        "total": pts.sum(axis=1),
+        "sumsq": (pts * pts).sum(axis=1),
+        "games_played": (played & present).sum(axis=1),
+        "played_total": np.where(played & present, points, 0).sum(axis=1),
+    }
+
+    # últimos k registros: alinha os presentes à direita mantendo a ordem
+    order   = np.argsort(present, axis=1, kind="stable")
+    right   = np.take_along_axis(pts, order, axis=1)
+    right_p = np.take_along_axis(present, order, axis=1)
+    for k in WINDOWS:
+        agg[f"last{k}_sum"] = right[:, -k:].sum(axis=1)
+        agg[f"last{k}_n"]   = right_p[:, -k:].sum(axis=1)
+
+    # EWMA: um passo vetorizado por rodada
+    ewm  = np.zeros(points.shape[0])
+    seen = np.zeros(points.shape[0], dtype=bool)
+    for r in range(points.shape[1]):
+        p = present[:, r]
+        ewm  = np.where(p, ewm_step(ewm, points[:, r].astype("float64"), ~seen), ewm)
+        seen |= p
+    agg["ewm"] = ewm
+    return agg
+
+
+@instrument("compute_player_metrics")
+def compute_player_metrics(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calcula as métricas por jogador numa só passada sobre a
+    representação densa jogador × rodada. Retorna uma linha por jogador
+    (a do registro mais recente, com as colunas originais) mais:
+
+      - n_rounds: rodadas com registro
+      - avg_points / std_points: média e desvio-padrão dos pontos
+      - avg_points_last3 / avg_points_last5: médias dos últimos 3/5 registros
+      - ewm_points: média exponencial (span=5)
+      - games_played: jogos em que entrou em campo (atletas.entrou_em_campo)
+      - points_per_game: pontos por jogo disputado
+      - <scout>_avg: média por jogo de cada scout (A, DS, FC, G, SG...)
+      - cost_benefit: avg_points / price (0 quando o preço é zero)
+
+    A ordem cronológica vem de `rodada`; sem ela, vale a ordem das linhas.
+    """
+    df = _normalize_columns(df)
+
+    players, player_codes = np.unique(df["player_id"].to_numpy(), return_inverse=True)
+    if "rodada" in df.columns:
+        rounds = df["rodada"].to_numpy()
+        _, round_codes = np.unique(rounds, return_inverse=True)
+    else:
+        round_codes = np.arange(len(df))
+    n_players, n_rounds = len(players), int(round_codes.max()) + 1 if len(df) else 0
+
+    # posição da última linha de cada (jogador, rodada) e de cada jogador
+    order = np.lexsort((np.arange(len(df)), round_codes, player_codes))
+    pc, rc = player_codes[order], round_codes[order]
+    last_cell   = np.r_[(pc[1:] != pc[:-1]) | (rc[1:] != rc[:-1]), True]
+    last_player = np.r_[pc[1:] != pc[:-1], True]
+    rows = order[last_cell]
+
+    present = np.zeros((n_players, n_rounds), dtype=bool)
+    points  = np.zeros((n_players, n_rounds), dtype=np.int64)
+    played  = np.zeros((n_players, n_rounds), dtype=bool)
+    cells   = (player_codes[rows], round_codes[rows])
+    present[cells] = True
+    points[cells]  = to_cents(pd.to_numeric(df["points"], errors="coerce").fillna(0).to_numpy()[rows])
+    if "atletas.entrou_em_campo" in df.columns:
+        played[cells] = df["atletas.entrou_em_campo"].fillna(False).to_numpy(dtype=bool)[rows]
+
+    agg = dense_aggregates(points, present, played)
+
+    latest = df.iloc[order[last_player]]
+    agg["scouts"] = latest_scouts(latest)
+    return finalize_metrics(latest, agg)
+
+
+def latest_scouts(latest: pd.DataFrame) -> np.ndarray:
+    """
+    Scouts acumulados na temporada (o CSV de cada rodada traz o total até ali),
+    do registro mais recente de cada jogador. Colunas ausentes valem zero.
+    """
+    scouts = np.zeros((len(latest), len(SCOUT_COLUMNS)))
+    for j, s in enumerate(SCOUT_COLUMNS):
+        if s in latest.columns:
+            scouts[:, j] = np.round(pd.to_numeric(latest[s], errors="coerce").fillna(0).to_numpy(dtype="float64"))
+    return scouts
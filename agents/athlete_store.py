@@ -0,0 +1,321 @@
+# agents/athlete_store.py
+
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+from agents.load_cartola_csv import (
+    fetch_all_cartola_csvs, list_round_files, SCOUT_COLUMNS, DEFAULT_DIR,
+)
+from agents.analyze_data import (
+    _normalize_columns, to_cents, dense_aggregates, finalize_metrics,
+)
+
+DEFAULT_STORE_DIR = os.path.join("data", "cache", "store")
+CURRENT_FILE      = "CURRENT"
+META_FILE         = "meta.json"
+STORE_FORMAT      = 2   # muda quando os arrays gravados mudam: força reescrita
+STAGING_RE        = re.compile(r"\.tmp(\d+)$")   # <versão>.tmp<pid>: versão em montagem
+STAGING_MAX_AGE   = 60 * 60                      # segundos até uma montagem ser dada como abandonada
+
+# colunas da última linha de cada jogador mantidas no store (como nos CSVs)
+LATEST_COLUMNS = {
+    "atletas.posicao_id":          ("position", "int8"),
+    "atletas.clube_id":            ("club", "int32"),
+    "atletas.status_id":           ("status", "int8"),
+    "atletas.clube.id.full.name":  ("club_sigla", "U8"),
+    "atletas.apelido":             ("apelido", "U40"),
+}
+
+_OPEN = {}                 # (raiz, versão) → AthleteStore; uma versão aberta por raiz
+_OPEN_LOCK = threading.Lock()
+
+
+def source_fingerprint(dir_path: str = None) -> list:
+    """(nome, tamanho, mtime_ns) de cada CSV de rodada: muda quando qualquer rodada muda."""
+    return [
+        [os.path.basename(f), os.path.getsize(f), os.stat(f).st_mtime_ns]
+        for f in list_round_files(dir_path or DEFAULT_DIR)
+    ]
+
+
+def _store_dir_for(dir_path: str = None, store_dir: str = None) -> str:
+    # um subdiretório por pasta de origem, cada um com seu CURRENT e suas versões
+    key = hashlib.sha1(os.path.abspath(dir_path or DEFAULT_DIR).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(store_dir or DEFAULT_STORE_DIR, key)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except PermissionError:
+        return True      # existe, mas é de outro usuário
+    except (OverflowError, OSError):
+        return False
+    return True
+
+
+def _remove_stale_staging(store_dir: str) -> None:
+    """
+    Apaga pastas `<versão>.tmp<pid>` deixadas por builds que morreram no
+    meio: as de processos que não existem mais ou mais velhas que
+    STAGING_MAX_AGE. As de builds em andamento ficam.
+    """
+    now = time.time()
+    for name in os.listdir(store_dir):
+        m = STAGING_RE.search(name)
+        path = os.path.join(store_dir, name)
+        if not m or not os.path.isdir(path):
+            continue
+        try:
+            age = now - os.stat(path).st_mtime
+        except OSError:
+            continue
+        if age > STAGING_MAX_AGE or not _pid_alive(int(m.group(1))):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def _direct_index(keys: np.ndarray) -> np.ndarray:
+    """Tabela de endereçamento direto: table[key] = posição em `keys` (ou -1)."""
+    table = np.full(int(keys.max()) + 1 if len(keys) else 0, -1, dtype=np.int32)
+    table[keys] = np.arange(len(keys), dtype=np.int32)
+    return table
+
+
+def _csr(codes: np.ndarray, n_groups: int):
+    """Agrupa linhas por código: rows[ptr[g]:ptr[g+1]] são as linhas do grupo g."""
+    rows = np.argsort(codes, kind="stable").astype(np.int32)
+    ptr  = np.zeros(n_groups + 1, dtype=np.int64)
+    np.cumsum(np.bincount(codes, minlength=n_groups), out=ptr[1:])
+    return rows, ptr
+
+
+def build_arrays(df: pd.DataFrame) -> dict:
+    """
+    Arrays do store a partir das rodadas concatenadas (fetch_all_cartola_csvs).
+    Vale a última linha de cada (jogador, rodada), como em compute_player_metrics.
+    """
+    df = _normalize_columns(df)
+    players, p_codes = np.unique(df["player_id"].to_numpy(), return_inverse=True)
+    rounds,  r_codes = np.unique(df["rodada"].to_numpy(), return_inverse=True)
+    P, R = len(players), len(rounds)
+
+    order = np.lexsort((np.arange(len(df)), r_codes, p_codes))
+    pc, rc = p_codes[order], r_codes[order]
+    last_cell   = np.r_[(pc[1:] != pc[:-1]) | (rc[1:] != rc[:-1]), True]
+    last_player = np.r_[pc[1:] != pc[:-1], True]
+    rows  = order[last_cell]
+    cells = (p_codes[rows], r_codes[rows])
+
+    arrays = {
+        "player_ids": players.astype(np.int64),
+        "rounds":     rounds.astype(np.int16),
+        "present":    np.zeros((P, R), dtype=bool),
+        "points":     np.zeros((P, R), dtype=np.int64),
+        "played":     np.zeros((P, R), dtype=bool),
+        "price":      np.zeros((P, R), dtype=np.float64),
+        "scouts":     np.zeros((P, R, len(SCOUT_COLUMNS)), dtype=np.float32),
+    }
+    arrays["present"][cells] = True
+    arrays["points"][cells]  = to_cents(pd.to_numeric(df["points"], errors="coerce").fillna(0).to_numpy()[rows])
+    arrays["price"][cells]   = pd.to_numeric(df["price"], errors="coerce").fillna(0).to_numpy()[rows]
+    if "atletas.entrou_em_campo" in df.columns:
+        arrays["played"][cells] = df["atletas.entrou_em_campo"].fillna(False).to_numpy(dtype=bool)[rows]
+    for j, s in enumerate(SCOUT_COLUMNS):
+        if s in df.columns:
+            arrays["scouts"][cells + (j,)] = np.round(
+                pd.to_numeric(df[s], errors="coerce").fillna(0).to_numpy(dtype="float64")[rows]
+            )
+
+    # última linha de cada jogador: preço, posição, clube e nome atuais
+    latest = df.iloc[order[last_player]]
+    arrays["latest_round"] = r_codes[order[last_player]].astype(np.int16)
+    for col, (name, dtype) in LATEST_COLUMNS.items():
+        values = latest[col] if col in latest.columns else pd.Series(0, index=latest.index)
+        if dtype.startswith("U"):
+            arrays[name] = values.astype(str).to_numpy().astype(dtype)
+        else:
+            arrays[name] = pd.to_numeric(values, errors="coerce").fillna(0).to_numpy().astype(dtype)
+
+    # índices O(1): jogador → linha, clube → linhas, posição → linhas
+    arrays["player_index"] = _direct_index(arrays["player_ids"])
+    clubs, club_codes = np.unique(arrays["club"], return_inverse=True)
+    arrays["clubs"]       = clubs.astype(np.int32)
+    arrays["club_index"]  = _direct_index(arrays["clubs"])
+    arrays["club_rows"], arrays["club_ptr"] = _csr(club_codes, len(clubs))
+    arrays["position_rows"], arrays["position_ptr"] = _csr(arrays["position"].astype(np.int64), 7)
+    return arrays
+
+
+def build_store(dir_path: str = None, store_dir: str = None) -> str:
+    """
+    Escreve o store das rodadas de `dir_path` numa versão nova e a publica
+    trocando o arquivo CURRENT de forma atômica; quem já abriu a versão
+    anterior continua lendo-a normalmente.
+
+    :param store_dir: raiz do store; cada `dir_path` ganha um subdiretório próprio
+    :return: pasta da versão escrita
+    """
+    store_dir = _store_dir_for(dir_path, store_dir)
+    source    = os.path.abspath(dir_path or DEFAULT_DIR)
+    if os.path.isdir(store_dir):
+        _remove_stale_staging(store_dir)
+    fingerprint = source_fingerprint(dir_path)
+    arrays  = build_arrays(fetch_all_cartola_csvs(dir_path))
+    version = hashlib.sha1(json.dumps([STORE_FORMAT, source, fingerprint]).encode("utf-8")).hexdigest()[:16]
+    path    = os.path.join(store_dir, version)
+
+    tmp = path + f".tmp{os.getpid()}"
+    os.makedirs(tmp, exist_ok=True)
+    for name, arr in arrays.items():
+        np.save(os.path.join(tmp, name + ".npy"), arr)
+    with open(os.path.join(tmp, META_FILE), "w", encoding="utf-8") as f:
+        json.dump({"format": STORE_FORMAT, "source": source,
+                   "fingerprint": fingerprint, "scouts": SCOUT_COLUMNS}, f)
+    try:
+        os.replace(tmp, path)
+    except OSError:
+        # a mesma versão já foi publicada (por outro processo)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    current = os.path.join(store_dir, CURRENT_FILE)
+    with open(current + ".tmp", "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(current + ".tmp", current)
+
+    # versões antigas desta origem: os arquivos somem, mas mapas já abertos seguem válidos
+    for name in os.listdir(store_dir):
+        old = os.path.join(store_dir, name)
+        if name != version and ".tmp" not in name and os.path.isdir(old):
+            shutil.rmtree(old, ignore_errors=True)
+    return path
+
+
+class AthleteStore:
+    """
+    Rodadas do Cartola em arrays densos, abertos como memory map somente leitura:
+
+      * player_ids (P), rounds (R), position / club / status / club_sigla / apelido (P)
+      * present / played (P × R, bool), points (P × R, centésimos int64),
+        price (P × R, float64), scouts (P × R × S, float32, acumulados)
+      * player_index / club_index: tabelas de endereçamento direto (O(1))
+      * club_rows / club_ptr, position_rows / position_ptr: linhas por grupo
+
+    Todos os processos que abrem a mesma versão compartilham as páginas
+    do arquivo via cache do sistema operacional.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        for name in os.listdir(path):
+            if name.endswith(".npy"):
+                setattr(self, name[:-4], np.load(os.path.join(path, name), mmap_mode="r"))
+
+    # ─── lookups ────────────────────────────────────────────────────────────
+    def row(self, player_id: int) -> int:
+        """Linha do jogador (O(1)); KeyError se não existir."""
+        pid = int(player_id)
+        i = self.player_index[pid] if 0 <= pid < len(self.player_index) else -1
+        if i < 0:
+            raise KeyError(f"Jogador não encontrado: {player_id}")
+        return int(i)
+
+    def rows_for_club(self, club_id: int) -> np.ndarray:
+        cid = int(club_id)
+        c = self.club_index[cid] if 0 <= cid < len(self.club_index) else -1
+        if c < 0:
+            return np.empty(0, dtype=np.int32)
+        return self.club_rows[self.club_ptr[c]:self.club_ptr[c + 1]]
+
+    def rows_for_position(self, posicao_id: int) -> np.ndarray:
+        p = int(posicao_id)
+        if not 0 <= p < len(self.position_ptr) - 1:
+            return np.empty(0, dtype=np.int32)
+        return self.position_rows[self.position_ptr[p]:self.position_ptr[p + 1]]
+
+    def player(self, player_id: int) -> dict:
+        """Resumo de um jogador: dados atuais + pontos/preço por rodada."""
+        i = self.row(player_id)
+        present = np.asarray(self.present[i])
+        return {
+            "player_id": int(self.player_ids[i]),
+            "apelido": str(self.apelido[i]),
+            "position": int(self.position[i]),
+            "club": int(self.club[i]),
+            "rounds": self.rounds[present].tolist(),
+            "points": (self.points[i][present] / 100).tolist(),
+            "price": self.price[i][present].tolist(),
+        }
+
+    # ─── visões para o pipeline ─────────────────────────────────────────────
+    def latest_frame(self) -> pd.DataFrame:
+        """Última linha de cada jogador, com os nomes de coluna dos CSVs."""
+        P = len(self.player_ids)
+        last = np.asarray(self.latest_round, dtype=np.int64)
+        cols = {
+            "player_id": self.player_ids,
+            "price": np.asarray(self.price[np.arange(P), last], dtype="float64"),
+            "rodada": np.asarray(self.rounds)[last],
+        }
+        for col, (name, _) in LATEST_COLUMNS.items():
+            cols[col] = getattr(self, name)
+        return pd.DataFrame(cols, copy=False)
+
+    def metrics(self) -> pd.DataFrame:
+        """
+        Mesmas métricas de compute_player_metrics, calculadas direto dos
+        arrays mapeados (sem DataFrame das rodadas em memória). As colunas
+        originais ficam restritas às de latest_frame().
+        """
+        agg = dense_aggregates(self.points, self.present, self.played)
+        P = len(self.player_ids)
+        agg["scouts"] = np.asarray(self.scouts[np.arange(P), np.asarray(self.latest_round, dtype=np.int64)], dtype="float64")
+        return finalize_metrics(self.latest_frame(), agg)
+
+
+def open_store(dir_path: str = None, store_dir: str = None, rebuild: bool = True) -> AthleteStore:
+    """
+    Abre a versão atual do store (uma vez por processo). Se os CSVs mudaram
+    desde a escrita e `rebuild` for True, escreve uma versão nova antes.
+    Ao abrir uma versão nova, as anteriores da mesma origem saem do
+    registro: seus mapas são liberados quando ninguém mais os referencia.
+
+    :param store_dir: raiz do store; cada `dir_path` ganha um subdiretório próprio
+    """
+    source  = os.path.abspath(dir_path or DEFAULT_DIR)
+    root    = _store_dir_for(dir_path, store_dir)
+    current = os.path.join(root, CURRENT_FILE)
+    version = None
+    if os.path.exists(current):
+        with open(current, encoding="utf-8") as f:
+            version = f.read().strip()
+
+    with _OPEN_LOCK:
+        store = _OPEN.get((root, version)) if version else None
+    if store is None and version and os.path.isdir(os.path.join(root, version)):
+        store = AthleteStore(os.path.join(root, version))
+
+    stale = (
+        store is None
+        or store.meta.get("format") != STORE_FORMAT
+        or store.meta.get("source") != source
+        or store.meta["fingerprint"] != source_fingerprint(dir_path)
+    )
+    if stale:
+        if not rebuild:
+            raise FileNotFoundError(f"Store ausente ou desatualizado em {root}")
+        path    = build_store(dir_path, store_dir)
+        version = os.path.basename(path)
+        store   = AthleteStore(path)
+    with _OPEN_LOCK:
+        for key in [k for k in _OPEN if k[0] == root and k[1] != version]:
+            del _OPEN[key]
+        _OPEN[(root, version)] = store
+    return store
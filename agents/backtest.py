@@ -0,0 +1,160 @@
+# agents/backtest.py
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from agents.load_cartola_csv import fetch_all_cartola_csvs, DEFAULT_DIR
+from agents.analyze_data import compute_player_metrics
+from agents.projection import project_points
+from agents.team_builder import build_optimal_team
+
+# estratégia padrão: escalação exata por avg_points, 4-3-3, C$ 140
+DEFAULT_STRATEGY = {"formation": "4-3-3", "budget": 140.0, "method": "exact", "objective": "avg_points"}
+
+RESULT_COLUMNS = [
+    "season", "strategy", "rodada", "points", "cost", "objective_value",
+    "n_players", "lineup", "cumulative_points",
+]
+
+# rodadas carregadas por temporada (preenchido no processo principal ou no initializer)
+_SEASONS = {}
+_METRICS = {}
+
+
+def _init_worker(seasons: dict) -> None:
+    global _SEASONS, _METRICS
+    _SEASONS, _METRICS = seasons, {}
+
+
+def normalize_strategy(config) -> dict:
+    """Completa uma configuração de estratégia com os valores padrão e um nome."""
+    config = dict(DEFAULT_STRATEGY, **(config or {}))
+    if config["method"] == "greedy":
+        config["objective"] = "cost_benefit"   # o guloso sempre ordena por custo-benefício
+    config.setdefault(
+        "name", f"{config['method']}:{config['objective']}:{config['formation']}:{config['budget']:g}"
+    )
+    return config
+
+
+def _round_metrics(season: str, rodada: int, projected: bool) -> pd.DataFrame:
+    """Métricas com dados só das rodadas anteriores a `rodada` (memorizadas por processo)."""
+    key = (season, rodada, projected)
+    if key not in _METRICS:
+        df = _SEASONS[season]
+        metrics = compute_player_metrics(df[df["rodada"] < rodada])
+        if projected:
+            # sem confrontos/classificação históricos: projeção só pelos scouts
+            metrics = project_points(metrics)
+        if len(_METRICS) > 8:
+            _METRICS.clear()
+        _METRICS[key] = metrics
+    return _METRICS[key]
+
+
+def _run_task(season: str, rodada: int, config: dict) -> tuple:
+    """Escala com o histórico até `rodada - 1` e pontua com o realizado em `rodada`."""
+    metrics = _round_metrics(season, rodada, config["objective"] == "projected_points")
+    try:
+        team = build_optimal_team(
+            metrics, config["budget"], config["formation"],
+            method=config["method"], objective=config["objective"] if config["method"] == "exact" else None,
+        )
+    except (RuntimeError, KeyError):
+        team = metrics.head(0)
+
+    df = _SEASONS[season]
+    played   = df[df["rodada"] == rodada]
+    realized = played.drop_duplicates("player_id", keep="last").set_index("player_id")["points"]
+    ids    = team["player_id"].to_numpy()
+    points = float(realized.reindex(ids).fillna(0).sum()) if len(ids) else np.nan
+    value  = float(team[config["objective"]].sum()) if config["objective"] in team.columns else np.nan
+    return (
+        season, config["name"], int(rodada), points, float(team["price"].sum()), value,
+        len(ids), tuple(sorted(int(i) for i in ids)),
+    )
+
+
+def run_backtest(
+    strategies: list = None,
+    dir_paths=None,
+    rounds: list = None,
+    min_history: int = 1,
+    workers: int = None
+) -> pd.DataFrame:
+    """
+    Backtest de estratégias de escalação sobre as rodadas históricas.
+
+    Para cada rodada r (com pelo menos `min_history` rodadas anteriores),
+    monta a escalação de cada estratégia só com os dados das rodadas < r
+    (preços e métricas do último registro anterior) e a pontua com os
+    pontos realizados em r (`atletas.pontos_num`; quem não aparece vale 0).
+
+    As tarefas (temporada × rodada × estratégia) rodam num pool de processos;
+    cada processo recebe as rodadas uma única vez e reaproveita as métricas
+    de uma rodada entre estratégias.
+
+    :param strategies: lista de dicts com formation, budget, method
+                       ("exact"/"greedy"), objective ("avg_points",
+                       "projected_points", "ewm_points"...) e name opcional
+    :param dir_paths: pasta de CSVs, lista de pastas (uma por temporada, cada
+                      uma identificada pelo caminho normalizado) ou dict
+                      {rótulo: pasta}
+    :param rounds: rodadas a simular (padrão: todas com histórico suficiente)
+    :param workers: nº de processos (padrão: nº de CPUs; 1 = em série)
+    :return: DataFrame com RESULT_COLUMNS, uma linha por (temporada, estratégia, rodada)
+    """
+    strategies = [normalize_strategy(s) for s in (strategies or [None])]
+    if dir_paths is None or isinstance(dir_paths, str):
+        dir_paths = [dir_paths or DEFAULT_DIR]
+    if isinstance(dir_paths, dict):
+        labeled = list(dir_paths.items())
+    else:
+        # .../2024/rodadas e .../2025/rodadas têm o mesmo nome: vale o caminho inteiro
+        labeled = [(os.path.normpath(path), path) for path in dir_paths]
+
+    seasons = {}
+    for season, path in labeled:
+        if season in seasons:
+            raise ValueError(f"Temporada repetida no backtest: {season}")
+        df = fetch_all_cartola_csvs(path)
+        if "rodada" not in df.columns:
+            raise KeyError(f"Coluna 'rodada' ausente nos CSVs de {path}")
+        seasons[season] = df
+
+    tasks = []
+    for season, df in seasons.items():
+        available = np.unique(df["rodada"].to_numpy())
+        for rodada in available[min_history:]:
+            if rounds is None or rodada in rounds:
+                tasks.extend((season, int(rodada), s) for s in strategies)
+    if not tasks:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+
+    n = min(workers or os.cpu_count() or 1, len(tasks))
+    args = list(zip(*tasks))
+    if n <= 1:
+        _init_worker(seasons)
+        rows = list(map(_run_task, *args))
+    else:
+        # tarefas em ordem de rodada: um chunk tende a cair na mesma rodada
+        chunk = max(1, len(tasks) // (n * 4))
+        with ProcessPoolExecutor(max_workers=n, initializer=_init_worker, initargs=(seasons,)) as pool:
+            rows = list(pool.map(_run_task, *args, chunksize=chunk))
+
+    out = pd.DataFrame(rows, columns=RESULT_COLUMNS[:-1])
+    out = out.sort_values(["season", "strategy", "rodada"], kind="stable").reset_index(drop=True)
+    out["cumulative_points"] = out.groupby(["season", "strategy"])["points"].cumsum()
+    return out
+
+
+def summarize_backtest(results: pd.DataFrame) -> pd.DataFrame:
+    """
+    Resumo por estratégia: rodadas, pontos totais, média, desvio,
+    pior e melhor rodada. Ordenado pelo total (desc).
+    """
+    summary = results.groupby("strategy")["points"].agg(
+        rounds="count", total="sum", mean="mean", std="std", worst="min", best="max"
+    )
+    return summary.sort_values("total", ascending=False).reset_index()
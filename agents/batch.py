@@ -0,0 +1,208 @@
+# agents/batch.py
+#
+# Execução do pipeline sem interface: ingestão → métricas → projeção →
+# escalação, para um conjunto de rodadas e de configurações (formação,
+# orçamento, método). Os resultados vão para datasets parquet comprimidos,
+# particionados por rodada, em data/processed:
+#
+#   metrics/rodada=N/<versão>/part-0.parquet   métricas + projected_points de todo o mercado
+#   lineups/rodada=N/<versão>/part-0.parquet   uma linha por jogador escalado, por configuração
+#
+# (a versão atual de cada partição fica em rodada=N/CURRENT).
+#
+#   python -m agents.batch --rounds 5-8 --formation 4-3-3 3-4-3 --budget 120 140
+#   python -m agents.batch --rounds 9 --offline --out /tmp/saida
+#   python -m agents.batch --rounds 9 --api-url http://127.0.0.1:8000/v1
+#
+# Para a rodada N, só entram dados das rodadas < N (como no backtest); se N
+# já aconteceu, as escalações trazem também os pontos realizados.
+# Leitura: utils.helpers.load_partitioned("lineups", partitions=[8], columns=[...]).
+
+import os
+import sys
+import json
+import logging
+import argparse
+from itertools import product
+import numpy as np
+import pandas as pd
+
+from utils.instrumentation import stage, begin_run, spans, summarize
+from utils.helpers import save_partitioned, PROCESSED_DIR, COMPRESSION
+from agents.load_cartola_csv import fetch_all_cartola_csvs
+from agents.analyze_data import compute_player_metrics
+from agents.projection import project_points
+from agents.team_builder import build_optimal_team
+from agents.backtest import normalize_strategy
+
+CAMPEONATO_ID = 10  # Brasileirão Série A
+
+LINEUP_COLUMNS = [
+    "strategy", "formation", "budget", "method", "objective",
+    "player_id", "atletas.apelido", "position", "price", "projected_points", "realized_points",
+]
+
+logger = logging.getLogger("sensai2.batch")
+
+
+def parse_rounds(spec: str) -> list:
+    """'5-8,10' → [5, 6, 7, 8, 10]."""
+    rounds = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            if "-" in part:
+                start, end = map(int, part.split("-", 1))
+                rounds.update(range(start, end + 1))
+            else:
+                rounds.add(int(part))
+        except ValueError:
+            raise ValueError(f"Rodadas inválidas: {spec!r} (use ex: '5-8,10')")
+    return sorted(rounds)
+
+
+def _context(campeonato_id: int, rodada: int):
+    """Confrontos da rodada e classificação da anterior; (None, None) se indisponíveis."""
+    from agents.fetch_matches import fetch_next_round_matches
+    from agents.standings_engine import local_standings
+
+    try:
+        matches = fetch_next_round_matches(campeonato_id, rodada)
+    except (RuntimeError, KeyError, OSError):
+        matches = None
+    try:
+        table = local_standings(campeonato_id, rodada - 1) if rodada > 1 else None
+    except (RuntimeError, KeyError, OSError):
+        table = None
+    return matches, table
+
+
+def run_round(
+    df: pd.DataFrame,
+    rodada: int,
+    strategies: list,
+    campeonato_id: int = None
+) -> tuple:
+    """
+    Pipeline completo para uma rodada.
+
+    :param df: rodadas concatenadas (fetch_all_cartola_csvs)
+    :param strategies: configurações já completadas por backtest.normalize_strategy
+    :param campeonato_id: para confrontos/classificação; None = projeção só pelos scouts
+    :return: (métricas projetadas, escalações) — ambas com a coluna `rodada` = rodada alvo
+    """
+    with stage("batch.metrics") as span:
+        metrics = compute_player_metrics(df[df["rodada"] < rodada])
+        span["rows_out"] = len(metrics)
+
+    with stage("batch.projection"):
+        matches, table = _context(campeonato_id, rodada) if campeonato_id is not None else (None, None)
+        projected = project_points(metrics, matches, table)
+
+    played   = df[df["rodada"] == rodada]
+    realized = played.drop_duplicates("player_id", keep="last").set_index("player_id")["points"]
+
+    lineups = []
+    for config in strategies:
+        with stage("batch.lineup"):
+            try:
+                team = build_optimal_team(
+                    projected, config["budget"], config["formation"],
+                    method=config["method"],
+                    objective=config["objective"] if config["method"] == "exact" else None,
+                )
+            except (RuntimeError, KeyError) as exc:
+                logger.warning("rodada %s, %s: sem escalação (%s)", rodada, config["name"], exc)
+                continue
+        team = team.assign(
+            strategy=config["name"], formation=config["formation"], budget=float(config["budget"]),
+            method=config["method"], objective=config["objective"],
+            # quem não aparece na rodada vale 0, como no backtest
+            realized_points=realized.reindex(team["player_id"]).fillna(0).to_numpy() if len(played) else np.nan,
+        )
+        lineups.append(team.reindex(columns=LINEUP_COLUMNS))
+
+    projected = projected.rename(columns={"rodada": "ultima_rodada"}).assign(rodada=rodada)
+    lineups = (
+        pd.concat(lineups, ignore_index=True) if lineups else pd.DataFrame(columns=LINEUP_COLUMNS)
+    ).assign(rodada=rodada)
+    return projected, lineups
+
+
+def run_batch(
+    rounds: list = None,
+    strategies: list = None,
+    dir_path: str = None,
+    campeonato_id: int = None,
+    out_dir: str = None,
+    compression: str = COMPRESSION
+) -> dict:
+    """
+    Roda o pipeline para cada rodada e grava os datasets `metrics` e
+    `lineups`, uma partição por rodada (cada uma substituída atomicamente).
+
+    :param rounds: rodadas alvo (padrão: a seguinte à última dos CSVs)
+    :param strategies: dicts com formation, budget, method, objective
+                       (padrão do objetivo: projected_points)
+    :return: {rodada: {"players", "lineups", "files"}}
+    """
+    df = fetch_all_cartola_csvs(dir_path)
+    if "rodada" not in df.columns:
+        raise KeyError("Coluna 'rodada' ausente nos CSVs")
+    if rounds is None:
+        rounds = [int(df["rodada"].max()) + 1]
+    strategies = [
+        normalize_strategy({"objective": "projected_points", **(s or {})}) for s in (strategies or [None])
+    ]
+
+    report = {}
+    for rodada in rounds:
+        if not (df["rodada"] < rodada).any():
+            raise ValueError(f"Sem rodadas anteriores à rodada {rodada} nos CSVs")
+        metrics, lineups = run_round(df, rodada, strategies, campeonato_id)
+        with stage("batch.write"):
+            files  = save_partitioned(metrics, "metrics", base_dir=out_dir, compression=compression)
+            files += save_partitioned(lineups, "lineups", base_dir=out_dir, compression=compression) if len(lineups) else []
+        report[rodada] = {"players": len(metrics), "lineups": int(lineups["strategy"].nunique()), "files": files}
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Pipeline do Cartola sem interface, com saída parquet por rodada.")
+    parser.add_argument("--rounds", help="rodadas alvo, ex: '5-8,10' (padrão: a próxima)")
+    parser.add_argument("--dir", help="pasta dos CSVs de rodada (padrão: data/raw/cartola/rodadas)")
+    parser.add_argument("--formation", nargs="+", default=["4-3-3"])
+    parser.add_argument("--budget", nargs="+", type=float, default=[140.0])
+    parser.add_argument("--method", nargs="+", default=["exact"], choices=["exact", "greedy"])
+    parser.add_argument("--objective", default="projected_points", help="coluna maximizada pelo método exato")
+    parser.add_argument("--campeonato", type=int, default=CAMPEONATO_ID)
+    parser.add_argument("--offline", action="store_true", help="não consulta a API: projeção só pelos scouts")
+    parser.add_argument("--api-url", help="URL base da API Futebol (ex: servidor local de testes)")
+    parser.add_argument("--out", default=PROCESSED_DIR, help="pasta base dos datasets")
+    parser.add_argument("--compression", default=COMPRESSION, help="zstd, snappy, gzip...")
+    args = parser.parse_args(argv)
+    if args.api_url:
+        os.environ["API_FUTEBOL_BASE_URL"] = args.api_url
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+
+    strategies = [
+        {"formation": f, "budget": b, "method": m, "objective": args.objective}
+        for f, b, m in product(args.formation, args.budget, args.method)
+    ]
+    run_id = begin_run()
+    try:
+        report = run_batch(
+            parse_rounds(args.rounds) if args.rounds else None, strategies, args.dir,
+            None if args.offline else args.campeonato, args.out, args.compression,
+        )
+    except (ValueError, KeyError, FileNotFoundError) as exc:
+        print(f"Erro: {exc}", file=sys.stderr)
+        return 1
+    print(json.dumps({"rounds": report, "timings": summarize(spans(run_id))}, indent=2, default=str))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
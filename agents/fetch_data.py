@@ -1,37 +1,59 @@
-import os
-import requests
 import pandas as pd
-from dotenv import load_dotenv, find_dotenv
+from utils.config import get_setting
+from utils.instrumentation import instrument
 
-# Carrega variáveis do .env na raiz do sensai2
-load_dotenv(find_dotenv())
-
-API_FUTEBOL_KEY = os.getenv("API_FUTEBOL_KEY")
 BASE_URL = "https://api.api-futebol.com.br/v1"
 
-def fetch_raw_data(endpoint: str, params: dict = None) -> pd.DataFrame:
+_client = None
+
+
+def get_client():
+    """
+    Cliente HTTP compartilhado (sessão persistente + cache em disco),
+    criado no primeiro uso a partir das variáveis do .env.
+    """
+    global _client
+    if _client is None:
+        from agents.http_client import ApiClient, ResponseCache
+
+        # URL base, timeout (s), limite de requisições/s e tamanho do cache configuráveis via .env
+        _client = ApiClient(
+            get_setting("API_FUTEBOL_BASE_URL", BASE_URL),
+            headers={"Authorization": f"Bearer {get_setting('API_FUTEBOL_KEY')}"},
+            timeout=float(get_setting("API_FUTEBOL_TIMEOUT", "10")),
+            rate_limit=float(get_setting("API_FUTEBOL_RATE_LIMIT", "0")) or None,
+            cache=ResponseCache(max_bytes=int(float(get_setting("API_FUTEBOL_CACHE_MB", "50")) * 2**20)),
+        )
+    return _client
+
+
+@instrument("fetch_raw_data")
+def fetch_raw_data(endpoint: str, params: dict = None, use_cache: bool = True, refresh: bool = False) -> pd.DataFrame:
     """
     Busca dados brutos da API Futebol e retorna um DataFrame.
 
+    As requisições passam pelo cliente compartilhado (`get_client`):
+    conexões reaproveitadas, timeout, retry com backoff e cache em disco
+    com TTL por endpoint. Partidas finalizadas ficam em cache para sempre.
+
     :param endpoint: caminho do recurso sem barras extras,
                      ex: "atletas/564" ou "partidas/1234"
     :param params: dicionário de parâmetros de query
+    :param use_cache: se False, ignora o cache e vai sempre à rede
+    :param refresh: revalida na rede e atualiza o cache mesmo se a entrada estiver fresca
     :return: pandas.DataFrame com os dados normalizados
     """
-    # Garante apenas um slash entre BASE_URL e endpoint
-    url = f"{BASE_URL.rstrip('/')}/{endpoint.lstrip('/')}"
-    headers = {"Authorization": f"Bearer {API_FUTEBOL_KEY}"}
+    import requests
 
     try:
-        response = requests.get(url, headers=headers, params=params or {})
-        response.raise_for_status()
+        data = get_client().get_json(endpoint, params=params, use_cache=use_cache, refresh=refresh)
     except requests.HTTPError as http_err:
         # Exibe status e corpo da resposta para debug
+        response = http_err.response
         raise RuntimeError(f"HTTP {response.status_code} – {response.text}") from http_err
     except requests.RequestException as req_err:
         raise RuntimeError(f"Falha na requisição: {req_err}") from req_err
 
-    data = response.json()
     # Ajuste aqui caso o JSON retorne um nível extra, ex: data["atletas"]
     df = pd.json_normalize(data)
     return df
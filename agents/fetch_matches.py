@@ -1,95 +1,180 @@
 # agents/fetch_matches.py
 
-import re
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 from agents.fetch_data import fetch_raw_data
+from agents.schedule_index import get_schedule_index
+from utils.instrumentation import instrument, bind
 
+SCORE_COLUMNS = ["placar_oficial_mandante", "placar_oficial_visitante"]
+
+
+@instrument("fetch_next_round_matches")
 def fetch_next_round_matches(campeonato_id: int, next_round: int) -> pd.DataFrame:
     """
     Retorna um DataFrame com todos os jogos da rodada `next_round`
-    do campeonato `campeonato_id`.
+    do campeonato `campeonato_id`, servido do índice em memória.
+    """
+    return get_schedule_index(campeonato_id).round_games(next_round)
+
+
+@instrument("match_detail")
+def _match_score(pid):
+    """
+    Busca o placar oficial de uma partida via detalhes.
+    Retorna (gols_mandante, gols_visitante) ou None se o jogo não ocorreu.
+    """
+    detail = fetch_raw_data(f"partidas/{pid}")
+    cols = detail.columns.tolist()
+
+    # detecta dinamicamente os campos de placar
+    mand_col = next((c for c in cols if "mandante" in c.lower() and "placar" in c.lower()), None)
+    vis_col  = next((c for c in cols if "visitante" in c.lower() and "placar" in c.lower()), None)
+    if not mand_col or not vis_col:
+        return None  # pula se não houver placar
+
+    home_goals = detail[mand_col].iloc[0]
+    # se for None/NaN, significa jogo ainda não ocorreu
+    if pd.isna(home_goals):
+        return None
+
+    return home_goals, detail[vis_col].iloc[0]
+
+
+def fetch_score(index, row):
+    """
+    Placar da partida: do índice se já conhecido, senão via detalhes.
+    Não escreve no índice: roda nas threads de busca.
+    """
+    if index.is_known_unplayed(row):
+        return None
+    score = index.score(row["partida_id"])
+    if score is None:
+        score = _match_score(row["partida_id"])
+        if score is not None:
+            score = int(score[0]), int(score[1])
+    return score
+
+
+def store_score(index, row, score):
+    """Guarda no índice um placar novo; chamado só pela thread que consome os resultados."""
+    if score is not None and index.score(row["partida_id"]) is None:
+        index.set_score(row["partida_id"], *score)
+    return score
+
+
+def _resolve_score(index, row):
+    """Placar da partida: do índice se já conhecido, senão via detalhes (e guarda no índice)."""
+    return store_score(index, row, fetch_score(index, row))
+
+
+def _with_scores(row: pd.Series, score) -> dict:
+    # monta o dict de saída, mantendo colunas originais + placares
+    data = row.to_dict()
+    data["placar_oficial_mandante"], data["placar_oficial_visitante"] = score
+    return data
+
+
+def _results_frame(results: list, columns) -> pd.DataFrame:
+    if not results:
+        # se nenhuma partida retornou placar, retorna vazio mas com colunas previstas
+        return pd.DataFrame(columns=[c for c in columns if c not in SCORE_COLUMNS] + SCORE_COLUMNS)
+    return pd.DataFrame(results).reset_index(drop=True)
+
+
+def _scan_scores(index, rows: list, concurrency: int, consume) -> None:
+    """
+    Busca os placares de `rows` na ordem e entrega cada (row, placar) a `consume`,
+    parando assim que `consume` devolver True.
+
+    Com concurrency > 1 mantém até `concurrency` detalhes em voo, consumindo
+    sempre na ordem do cronograma; ao terminar, cancela o que ainda não começou.
+    As threads só buscam: os placares entram no índice na thread que consome.
     """
-    df = fetch_raw_data(f"campeonatos/{campeonato_id}/partidas")
-    col = f"partidas.fase-unica.{next_round}a-rodada"
-    if col not in df.columns:
-        raise KeyError(f"Coluna esperada não encontrada: {col}")
-    jogos = df[col].iloc[0]  # lista de dicts
-    return pd.json_normalize(jogos)
+    if concurrency <= 1:
+        for row in rows:
+            if consume(row, _resolve_score(index, row)):
+                return
+        return
 
+    fetch = bind(fetch_score)   # as threads contam bytes/hits na execução de quem chamou
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = []
+        for i, row in enumerate(rows):
+            while len(futures) < len(rows) and len(futures) - i < concurrency:
+                futures.append(pool.submit(fetch, index, rows[len(futures)]))
+            if consume(row, store_score(index, row, futures[i].result())):
+                break
+        for f in futures:
+            f.cancel()
 
+
+@instrument("fetch_last_results_by_team")
 def fetch_last_results_by_team(
     campeonato_id: int,
     team_id: int,
-    num_matches: int = 5
+    num_matches: int = 5,
+    concurrency: int = 1
 ) -> pd.DataFrame:
     """
     Retorna um DataFrame com as últimas `num_matches` partidas
     de um time específico, incluindo os gols oficiais.
+
+    :param concurrency: nº máximo de detalhes de partida buscados em paralelo;
+                        1 mantém a busca sequencial
     """
+    index = get_schedule_index(campeonato_id)
+    schedule_games = index.team_games(team_id)
 
-    # 1) Puxa todas as rodadas (cronograma completo)
-    df = fetch_raw_data(f"campeonatos/{campeonato_id}/partidas")
-
-    # 2) Identifica colunas de rodada
-    rodada_cols = [
-        c for c in df.columns
-        if c.startswith("partidas.fase-unica.") and c.endswith("a-rodada")
-    ]
-    if not rodada_cols:
-        raise KeyError("Nenhuma coluna de rodada encontrada no DataFrame.")
-
-    # 3) Flatten de todas as rodadas num DF único
-    all_games = []
-    for col in rodada_cols:
-        m = re.search(r"(\d+)a-rodada$", col)
-        rodada = int(m.group(1)) if m else None
-        jogos = df[col].iloc[0]        # lista de dicts
-        temp = pd.json_normalize(jogos)
-        temp["rodada"] = rodada
-        all_games.append(temp)
-    all_games_df = pd.concat(all_games, ignore_index=True)
-
-    # 4) Filtra só os jogos do time (mandante ou visitante)
-    home_col = "time_mandante.time_id"
-    away_col = "time_visitante.time_id"
-    mask = (
-        all_games_df.get(home_col) == team_id
-    ) | (
-        all_games_df.get(away_col) == team_id
-    )
-    schedule_games = all_games_df[mask].sort_values("rodada", ascending=False)
-
-    # 5) Para cada partida, busca o placar via detalhes e só registra
+    # Para cada partida, busca o placar via detalhes e só registra jogos ocorridos
     results = []
-    for _, row in schedule_games.iterrows():
-        if len(results) >= num_matches:
-            break
-        pid = row["partida_id"]
-        detail = fetch_raw_data(f"partidas/{pid}")
-        cols = detail.columns.tolist()
-
-        # detecta dinamicamente os campos de placar
-        mand_col = next((c for c in cols if "mandante" in c.lower() and "placar" in c.lower()), None)
-        vis_col  = next((c for c in cols if "visitante" in c.lower() and "placar" in c.lower()), None)
-        if not mand_col or not vis_col:
-            continue  # pula se não houver placar
-
-        home_goals = detail[mand_col].iloc[0]
-        # se for None/NaN, significa jogo ainda não ocorreu
-        if pd.isna(home_goals):
-            continue
-
-        away_goals = detail[vis_col].iloc[0]
-        # monta o dict de saída, mantendo colunas originais + placares
-        data = row.to_dict()
-        data["placar_oficial_mandante"]   = home_goals
-        data["placar_oficial_visitante"]  = away_goals
-        results.append(data)
-
-    # 6) Constrói o DataFrame final
-    if not results:
-        # se nenhuma partida retornou placar, retorna vazio mas com colunas previstas
-        cols = list(schedule_games.columns) + ["placar_oficial_mandante", "placar_oficial_visitante"]
-        return pd.DataFrame(columns=cols)
 
-    return pd.DataFrame(results).reset_index(drop=True)
+    def consume(row, score):
+        if score is not None:
+            results.append(_with_scores(row, score))
+        return len(results) >= num_matches
+
+    if num_matches > 0:
+        _scan_scores(index, [row for _, row in schedule_games.iterrows()], concurrency, consume)
+    return _results_frame(results, schedule_games.columns)
+
+
+@instrument("fetch_last_results_all_teams")
+def fetch_last_results_all_teams(
+    campeonato_id: int,
+    num_matches: int = 5,
+    concurrency: int = 8
+) -> pd.DataFrame:
+    """
+    Últimos `num_matches` resultados de todos os times numa só chamada.
+
+    Baixa o cronograma uma única vez e percorre as rodadas da mais recente
+    para a mais antiga, buscando em paralelo os detalhes das partidas de
+    times que ainda precisam de resultados. Cada partida é buscada uma vez,
+    mesmo servindo aos dois times.
+
+    :return: DataFrame com a coluna `team_id` + colunas de
+             fetch_last_results_by_team, ordenado por time e rodada (desc)
+    """
+    index = get_schedule_index(campeonato_id)
+    all_games_df = index.games.sort_values("rodada", ascending=False, kind="stable")
+    home  = "time_mandante.time_id"
+    away  = "time_visitante.time_id"
+    teams = pd.unique(pd.concat([all_games_df[home], all_games_df[away]]).dropna())
+    found = {t: [] for t in teams}
+    missing = {"n": len(teams) if num_matches > 0 else 0}
+
+    def consume(row, score):
+        if score is not None:
+            for t in (row[home], row[away]):
+                if t in found and len(found[t]) < num_matches:
+                    found[t].append(dict(_with_scores(row, score), team_id=t))
+                    if len(found[t]) == num_matches:
+                        missing["n"] -= 1
+        return missing["n"] == 0
+
+    if missing["n"]:
+        _scan_scores(index, [row for _, row in all_games_df.iterrows()], max(concurrency, 1), consume)
+
+    results = [r for t in teams for r in found[t]]
+    return _results_frame(results, ["team_id"] + list(all_games_df.columns))
@@ -0,0 +1,350 @@
+# agents/http_client.py
+
+import os
+import re
+import json
+import time
+import random
+import hashlib
+import threading
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.instrumentation import count
+
+DEFAULT_CACHE_DIR = os.path.join("data", "cache", "http")
+
+# TTL (segundos) por endpoint; o primeiro padrão que casar vence.
+# None = nunca expira por tempo.
+DEFAULT_TTLS = [
+    (r"^partidas/\d+$",               60 * 10),
+    (r"^campeonatos/\d+/partidas$",   60 * 30),
+    (r"^campeonatos/\d+/classificacao$", 60 * 30),
+    (r".*",                           60 * 5),
+]
+
+# status de partida que não muda mais → cache permanente
+FINISHED_STATUSES = {"finalizado", "encerrado"}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class ResponseCache:
+    """
+    Cache de respostas JSON em disco, um arquivo por (url, params).
+
+    Cada entrada guarda corpo, ETag/Last-Modified, horário da busca e se é
+    permanente. Entradas permanentes (partidas finalizadas) ficam na
+    subpasta `permanent/` e nunca saem por tamanho, só com clear(). As
+    demais somam no máximo `max_bytes`: ao estourar, as menos usadas
+    recentemente (mtime) saem até sobrar EVICT_TO do orçamento.
+
+    O tamanho das entradas é mantido em memória e corrigido a cada despejo
+    (outros processos podem gravar na mesma pasta); a pasta só é varrida
+    quando o orçamento estoura.
+    """
+
+    PERMANENT_DIR = "permanent"
+    EVICT_TO      = 0.9
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = 50 * 2**20):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self._lock  = threading.Lock()
+        self._total = None    # bytes das entradas não permanentes (None = ainda não medido)
+        os.makedirs(os.path.join(self.cache_dir, self.PERMANENT_DIR), exist_ok=True)
+
+    @staticmethod
+    def key(url: str, params: dict = None) -> str:
+        raw = url + "?" + json.dumps(params or {}, sort_keys=True)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str, permanent: bool = False) -> str:
+        if permanent:
+            return os.path.join(self.cache_dir, self.PERMANENT_DIR, key + ".json")
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def get(self, key: str):
+        for permanent in (False, True):
+            path = self._path(key, permanent)
+            try:
+                with open(path, encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                continue
+            # marca como usada recentemente para o LRU
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            return entry
+        return None
+
+    def put(self, key: str, entry: dict) -> None:
+        permanent = bool(entry.get("permanent"))
+        path  = self._path(key, permanent)
+        other = self._path(key, not permanent)
+        tmp   = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        size = os.path.getsize(tmp)
+
+        with self._lock:
+            if self._total is None:
+                self._total = self._scan()[0]
+            # só entradas não permanentes contam no orçamento
+            old = self._size(self._path(key))
+            os.replace(tmp, path)
+            if permanent and os.path.exists(other):
+                os.remove(other)      # a entrada virou permanente: sai da pasta comum
+            self._total += (0 if permanent else size) - old
+            over = self._total > self.max_bytes
+        if over:
+            self.evict()
+
+    @staticmethod
+    def _size(path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def _scan(self) -> tuple:
+        """(bytes, [(mtime, tamanho, caminho)]) das entradas não permanentes."""
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+        return sum(size for _, size, _ in files), files
+
+    def evict(self) -> int:
+        """
+        Remove as entradas não permanentes mais antigas até caberem em
+        EVICT_TO × max_bytes. Retorna quantas saíram.
+        """
+        with self._lock:
+            total, files = self._scan()
+            target  = self.max_bytes * self.EVICT_TO if total > self.max_bytes else self.max_bytes
+            removed = 0
+            for _, size, path in sorted(files):
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total   -= size
+                removed += 1
+            self._total = total
+            return removed
+
+    def clear(self, keep_permanent: bool = False) -> None:
+        """Apaga o cache; com keep_permanent=True preserva partidas finalizadas."""
+        dirs = [self.cache_dir] + ([] if keep_permanent else [os.path.join(self.cache_dir, self.PERMANENT_DIR)])
+        with self._lock:
+            for base in dirs:
+                for name in os.listdir(base):
+                    if not name.endswith(".json"):
+                        continue
+                    path = os.path.join(base, name)
+                    if keep_permanent and base == self.cache_dir:
+                        # entradas permanentes gravadas antes da subpasta existir
+                        try:
+                            with open(path, encoding="utf-8") as f:
+                                if json.load(f).get("permanent"):
+                                    continue
+                        except (OSError, ValueError):
+                            pass
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+            self._total = None
+
+
+class ApiClient:
+    """
+    Cliente HTTP da API Futebol: sessão persistente com pool de conexões,
+    timeout, retry com backoff exponencial + jitter (respeitando Retry-After),
+    limite de requisições por segundo e cache em disco com revalidação
+    condicional (ETag / Last-Modified).
+
+    Contadores em `stats`: hits, misses, revalidated, retries, requests.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        headers: dict = None,
+        timeout: float = 10.0,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        rate_limit: float = None,
+        pool_size: int = 10,
+        cache: ResponseCache = None,
+        ttls: list = None,
+    ):
+        """
+        :param base_url: URL base da API
+        :param headers: headers enviados em toda requisição (ex: Authorization)
+        :param timeout: timeout (s) de conexão/leitura por tentativa
+        :param max_retries: novas tentativas em erros transitórios
+        :param backoff: base (s) do backoff exponencial
+        :param max_backoff: teto (s) de espera entre tentativas
+        :param rate_limit: máximo de requisições por segundo (None = sem limite)
+        :param pool_size: conexões mantidas por host
+        :param cache: ResponseCache; None desativa o cache
+        :param ttls: lista [(regex do endpoint, ttl em segundos ou None)]
+        """
+        self.base_url    = base_url.rstrip("/")
+        self.timeout     = timeout
+        self.max_retries = max_retries
+        self.backoff     = backoff
+        self.max_backoff = max_backoff
+        self.rate_limit  = rate_limit
+        self.cache       = cache
+        self.ttls        = [(re.compile(p), ttl) for p, ttl in (ttls or DEFAULT_TTLS)]
+        self.stats       = {"hits": 0, "misses": 0, "revalidated": 0, "retries": 0, "requests": 0}
+
+        self.session = requests.Session()
+        self.session.headers.update(headers or {})
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._lock     = threading.Lock()
+        self._next_req = 0.0
+
+    # ─── helpers ────────────────────────────────────────────────────────────
+    def url_for(self, endpoint: str) -> str:
+        # Garante apenas um slash entre base_url e endpoint
+        return f"{self.base_url}/{endpoint.lstrip('/')}"
+
+    def ttl_for(self, endpoint: str):
+        endpoint = endpoint.strip("/")
+        for pattern, ttl in self.ttls:
+            if pattern.match(endpoint):
+                return ttl
+        return None
+
+    @staticmethod
+    def is_final(data) -> bool:
+        """Partida finalizada: o payload não muda mais."""
+        return isinstance(data, dict) and str(data.get("status", "")).lower() in FINISHED_STATUSES
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+        count(f"http_{name}")
+
+    def _throttle(self) -> None:
+        if not self.rate_limit:
+            return
+        with self._lock:
+            now  = time.monotonic()
+            wait = self._next_req - now
+            self._next_req = max(now, self._next_req) + 1.0 / self.rate_limit
+        if wait > 0:
+            time.sleep(wait)
+
+    def _retry_wait(self, attempt: int, response=None) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.max_backoff)
+                except ValueError:
+                    try:
+                        delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                        return min(max(delay, 0.0), self.max_backoff)
+                    except (TypeError, ValueError):
+                        pass
+        # full jitter: uniforme entre 0 e o backoff exponencial
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _send(self, url: str, params: dict, headers: dict) -> requests.Response:
+        """GET com retry em erros de conexão/timeout e status transitórios."""
+        attempt = 0
+        while True:
+            self._throttle()
+            self._count("requests")
+            try:
+                response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                response = None
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+            self._count("retries")
+            time.sleep(self._retry_wait(attempt, response))
+            attempt += 1
+
+    # ─── API pública ────────────────────────────────────────────────────────
+    def get_json(self, endpoint: str, params: dict = None, use_cache: bool = True, refresh: bool = False):
+        """
+        Busca `endpoint` e devolve o JSON decodificado, usando o cache quando possível.
+
+        Entradas frescas (dentro do TTL) ou permanentes (partidas finalizadas)
+        são servidas sem rede; entradas vencidas são revalidadas com
+        If-None-Match / If-Modified-Since.
+
+        :param refresh: revalida mesmo entradas frescas (não permanentes) e
+                        grava a resposta — usado para aquecer o cache
+
+        :raises requests.HTTPError: status de erro após esgotar as tentativas
+        :raises requests.RequestException: falha de rede após esgotar as tentativas
+        """
+        url   = self.url_for(endpoint)
+        cache = self.cache if use_cache else None
+        key   = ResponseCache.key(url, params)
+        entry = cache.get(key) if cache else None
+
+        headers = {}
+        if entry:
+            ttl = self.ttl_for(endpoint)
+            age = time.time() - entry.get("fetched_at", 0)
+            if entry.get("permanent") or (not refresh and (ttl is None or age < ttl)):
+                self._count("hits")
+                return entry["body"]
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = self._send(url, params or {}, headers)
+
+        if response.status_code == 304 and entry:
+            self._count("revalidated")
+            entry["fetched_at"] = time.time()
+            cache.put(key, entry)
+            return entry["body"]
+
+        response.raise_for_status()
+        self._count("misses")
+        count("http_bytes", len(response.content))
+        data = response.json()
+        if cache:
+            cache.put(key, {
+                "url": url,
+                "params": params or {},
+                "fetched_at": time.time(),
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "permanent": self.is_final(data),
+                "body": data,
+            })
+        return data
+
+    def close(self) -> None:
+        self.session.close()
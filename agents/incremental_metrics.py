@@ -0,0 +1,265 @@
+# agents/incremental_metrics.py
+
+import os
+import re
+import pickle
+import hashlib
+import numpy as np
+import pandas as pd
+from agents.analyze_data import (
+    WINDOWS, _normalize_columns, to_cents, ewm_step, finalize_metrics, latest_scouts,
+)
+from agents.load_cartola_csv import list_round_files, read_round_csv, DEFAULT_DIR
+
+RING = max(WINDOWS)   # tamanho do buffer circular de pontos recentes
+
+
+class PlayerMetricsState:
+    """
+    Estado agregado por jogador, atualizado rodada a rodada.
+
+    Guarda, por jogador: contagem, soma e soma dos quadrados dos pontos (em
+    centésimos inteiros), jogos disputados e seus pontos, estado da EWMA,
+    buffer circular dos últimos registros e a rodada mais recente. Os scouts
+    vêm acumulados no próprio CSV, então basta o registro mais recente.
+
+    * `apply_round` de uma rodada nova custa O(linhas da rodada).
+    * `retract_round` da rodada mais recente desfaz com os valores guardados,
+      também em O(linhas); para rodadas antigas, EWMA e buffer dos jogadores
+      afetados são refeitos a partir do histórico deles.
+
+    `to_frame()` devolve exatamente o mesmo que `compute_player_metrics`
+    sobre todas as rodadas aplicadas.
+    """
+
+    def __init__(self):
+        self.ids    = np.empty(0, dtype=np.int64)
+        self._slot  = {}
+        self.rounds = {}       # rodada → {"frame", "slots", "points", "played", "undo"}
+        self.sources = {}      # arquivo → (rodada, tamanho, mtime_ns)
+        self._alloc(0)
+
+    # ─── armazenamento ──────────────────────────────────────────────────────
+    def _alloc(self, n: int) -> None:
+        def grow(arr, fill, shape=()):
+            new = np.full((n,) + shape, fill, dtype=arr.dtype if arr is not None else type(fill))
+            if arr is not None:
+                new[:len(arr)] = arr
+            return new
+
+        get = lambda name: getattr(self, name, None)
+        self.count        = grow(get("count"), np.int64(0))
+        self.total        = grow(get("total"), np.int64(0))
+        self.sumsq        = grow(get("sumsq"), np.int64(0))
+        self.games_played = grow(get("games_played"), np.int64(0))
+        self.played_total = grow(get("played_total"), np.int64(0))
+        self.ewm          = grow(get("ewm"), np.float64(0))
+        self.seen         = grow(get("seen"), np.bool_(False))
+        self.ring         = grow(get("ring"), np.int64(0), (RING,))
+        self.ring_pos     = grow(get("ring_pos"), np.int64(0))
+        self.last_round   = grow(get("last_round"), np.int64(-1))
+
+    def _slots_for(self, ids: np.ndarray) -> np.ndarray:
+        new = [i for i in pd.unique(ids) if i not in self._slot]
+        if new:
+            start = len(self.ids)
+            self.ids = np.concatenate((self.ids, np.asarray(new, dtype=np.int64)))
+            self._slot.update({pid: start + k for k, pid in enumerate(new)})
+            self._alloc(len(self.ids))
+        return np.fromiter((self._slot[i] for i in ids), dtype=np.int64, count=len(ids))
+
+    # ─── atualização ────────────────────────────────────────────────────────
+    def apply_round(self, df: pd.DataFrame, rodada: int = None) -> None:
+        """
+        Aplica uma rodada (linhas de um CSV de rodada).
+        Se a rodada já foi aplicada, ela é retirada antes (correção de arquivo).
+        """
+        df = _normalize_columns(df)
+        if rodada is None:
+            if "rodada" not in df.columns:
+                raise KeyError("Informe `rodada` ou forneça a coluna 'rodada'")
+            rodada = int(df["rodada"].max())
+        if rodada in self.rounds:
+            self.retract_round(rodada)
+
+        # um registro por jogador na rodada (o último, como na recomputação completa)
+        df    = df[~df["player_id"].duplicated(keep="last")].reset_index(drop=True)
+        slots = self._slots_for(df["player_id"].to_numpy())
+        pts   = to_cents(pd.to_numeric(df["points"], errors="coerce").fillna(0).to_numpy())
+        if "atletas.entrou_em_campo" in df.columns:
+            played = df["atletas.entrou_em_campo"].fillna(False).to_numpy(dtype=bool)
+        else:
+            played = np.zeros(len(df), dtype=bool)
+
+        in_order = bool(np.all(self.last_round[slots] < rodada))
+        undo = {
+            "ewm": self.ewm[slots].copy(), "seen": self.seen[slots].copy(),
+            "ring": self.ring[slots].copy(), "ring_pos": self.ring_pos[slots].copy(),
+            "last_round": self.last_round[slots].copy(),
+        }
+
+        self.count[slots]        += 1
+        self.total[slots]        += pts
+        self.sumsq[slots]        += pts * pts
+        self.games_played[slots] += played
+        self.played_total[slots] += np.where(played, pts, 0)
+        self.rounds[rodada] = {"frame": df, "slots": slots, "points": pts, "played": played, "undo": undo}
+
+        if in_order:
+            self.ewm[slots]  = ewm_step(self.ewm[slots], pts.astype("float64"), ~self.seen[slots])
+            self.seen[slots] = True
+            self.ring[slots, self.ring_pos[slots] % RING] = pts
+            self.ring_pos[slots] += 1
+            self.last_round[slots] = rodada
+        else:
+            # rodada fora de ordem: refaz a parte sequencial desses jogadores
+            self._replay(slots)
+
+    def retract_round(self, rodada: int) -> None:
+        """Remove a contribuição de uma rodada já aplicada."""
+        entry = self.rounds.pop(rodada)
+        slots, pts, played = entry["slots"], entry["points"], entry["played"]
+
+        self.count[slots]        -= 1
+        self.total[slots]        -= pts
+        self.sumsq[slots]        -= pts * pts
+        self.games_played[slots] -= played
+        self.played_total[slots] -= np.where(played, pts, 0)
+
+        if np.all(self.last_round[slots] == rodada):
+            undo = entry["undo"]
+            for name in ("ewm", "seen", "ring", "ring_pos", "last_round"):
+                getattr(self, name)[slots] = undo[name]
+        else:
+            self._replay(slots)
+
+    def _replay(self, slots: np.ndarray) -> None:
+        """Recalcula EWMA, buffer e última rodada dos `slots` a partir das rodadas guardadas."""
+        self.ewm[slots], self.seen[slots] = 0.0, False
+        self.ring[slots], self.ring_pos[slots], self.last_round[slots] = 0, 0, -1
+        mask = np.zeros(len(self.ids), dtype=bool)
+        mask[slots] = True
+        for rodada in sorted(self.rounds):
+            entry = self.rounds[rodada]
+            hit   = mask[entry["slots"]]
+            s, x  = entry["slots"][hit], entry["points"][hit]
+            # o estado "antes desta rodada" dos jogadores refeitos também mudou
+            for name, saved in entry["undo"].items():
+                saved[hit] = getattr(self, name)[s]
+            self.ewm[s]  = ewm_step(self.ewm[s], x.astype("float64"), ~self.seen[s])
+            self.seen[s] = True
+            self.ring[s, self.ring_pos[s] % RING] = x
+            self.ring_pos[s] += 1
+            self.last_round[s] = rodada
+
+    # ─── saída ──────────────────────────────────────────────────────────────
+    def to_frame(self) -> pd.DataFrame:
+        """Métricas por jogador, idênticas às de compute_player_metrics."""
+        active = np.flatnonzero(self.count > 0)
+        active = active[np.argsort(self.ids[active], kind="stable")]
+        if active.size == 0:
+            return pd.DataFrame()
+
+        # última linha de cada jogador, vinda da sua rodada mais recente
+        pieces = []
+        for rodada in sorted(self.rounds):
+            entry = self.rounds[rodada]
+            mine  = self.last_round[entry["slots"]] == rodada
+            if mine.any():
+                pieces.append(entry["frame"][mine].assign(_slot=entry["slots"][mine]))
+        columns = list(pd.concat([self.rounds[r]["frame"].head(0) for r in sorted(self.rounds)]).columns)
+        latest  = pd.concat(pieces, ignore_index=True)
+        latest  = latest.set_index("_slot").loc[active].reset_index(drop=True)[columns]
+
+        ring_n = np.minimum(self.ring_pos[active], RING)
+        agg = {
+            "count": self.count[active], "total": self.total[active], "sumsq": self.sumsq[active],
+            "ewm": self.ewm[active], "games_played": self.games_played[active],
+            "played_total": self.played_total[active],
+        }
+        # últimos k: percorre o buffer do mais novo para o mais antigo
+        ring, pos = self.ring[active], self.ring_pos[active]
+        for k in WINDOWS:
+            n    = np.minimum(ring_n, k)
+            cols = (pos[:, None] - 1 - np.arange(k)[None, :]) % RING
+            vals = np.take_along_axis(ring, cols, axis=1)
+            agg[f"last{k}_sum"] = np.where(np.arange(k)[None, :] < n[:, None], vals, 0).sum(axis=1)
+            agg[f"last{k}_n"]   = n
+        agg["scouts"] = latest_scouts(latest)
+        return finalize_metrics(latest, agg)
+
+    # ─── CSVs e persistência ────────────────────────────────────────────────
+    def sync_with_csvs(self, dir_path: str = None) -> list:
+        """
+        Aplica rodadas novas/alteradas da pasta de CSVs e retira as removidas.
+        Só lê os arquivos cujo tamanho ou mtime mudou.
+
+        :return: lista de arquivos (re)aplicados
+        """
+        files   = list_round_files(dir_path or DEFAULT_DIR)
+        touched = []
+        for file in files:
+            st = os.stat(file)
+            known = self.sources.get(file)
+            if known and known[1:] == (st.st_size, st.st_mtime_ns):
+                continue
+            df = read_round_csv(file)
+            if known and known[0] in self.rounds and not self._sourced(known[0], file):
+                self.retract_round(known[0])
+            if df is None:
+                self.sources.pop(file, None)
+                continue
+            rodada = int(df["rodada"].max()) if "rodada" in df.columns else \
+                int(re.search(r"(\d+)", os.path.basename(file)).group(1))
+            self.apply_round(df, rodada)
+            self.sources[file] = (rodada, st.st_size, st.st_mtime_ns)
+            touched.append(file)
+        for file in set(self.sources) - set(files):
+            rodada = self.sources.pop(file)[0]
+            # arquivo renomeado (rodada-8.csv → rodada_8.csv): a rodada já veio pelo novo caminho
+            if rodada in self.rounds and not self._sourced(rodada):
+                self.retract_round(rodada)
+        return touched
+
+    def _sourced(self, rodada: int, exclude: str = None) -> bool:
+        """True se algum arquivo conhecido (exceto `exclude`) ainda fornece a rodada."""
+        return any(r == rodada for f, (r, *_) in self.sources.items() if f != exclude)
+
+    def save(self, path: str) -> None:
+        """Grava o estado (escrita atômica)."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def load(path: str) -> "PlayerMetricsState":
+        """Carrega um estado salvo; devolve um estado vazio se o arquivo não existir."""
+        if not os.path.exists(path):
+            return PlayerMetricsState()
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+
+DEFAULT_STATE_DIR = os.path.join("data", "cache", "metrics")
+
+
+def _state_path_for(dir_path: str = None) -> str:
+    # um estado por pasta de origem: duas pastas não desfazem as rodadas uma da outra
+    key = hashlib.sha1(os.path.abspath(dir_path or DEFAULT_DIR).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(DEFAULT_STATE_DIR, key, "state.pkl")
+
+
+def incremental_player_metrics(dir_path: str = None, state_path: str = None) -> pd.DataFrame:
+    """
+    Equivalente a `compute_player_metrics(fetch_all_cartola_csvs(dir_path))`,
+    mas só processa as rodadas novas ou alteradas desde a última chamada.
+
+    :param state_path: onde o estado agregado é persistido (padrão: um por `dir_path`)
+    """
+    state_path = state_path or _state_path_for(dir_path)
+    state = PlayerMetricsState.load(state_path)
+    if state.sync_with_csvs(dir_path) or not os.path.exists(state_path):
+        state.save(state_path)
+    return state.to_frame()
@@ -1,47 +1,443 @@
 import os
+import re
 import glob
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
+from utils.instrumentation import instrument, count
 
-def fetch_all_cartola_csvs(dir_path: str = None) -> pd.DataFrame:
-    base    = dir_path or os.path.join("data", "raw", "cartola", "rodadas")
-    pattern = os.path.join(base, "rodada_*.csv")
-    files   = sorted(glob.glob(pattern))
-    if not files:
-        raise FileNotFoundError(f"Nenhum CSV encontrado em {base}")
+DEFAULT_DIR       = os.path.join("data", "raw", "cartola", "rodadas")
+DEFAULT_CACHE_DIR = os.path.join("data", "cache", "cartola")
+
+# aceita os dois esquemas de nome: rodada_7.csv e rodada-8.csv
+ROUND_FILE_RE = re.compile(r"^rodada[_-](\d+)\.csv$")
+
+MANIFEST_NAME = "manifest.json"
+
+# abaixo disto (arquivos E bytes) o pool de processos custa mais para subir
+# do que economiza: as rodadas são parseadas em série
+PARALLEL_MIN_FILES = 12
+PARALLEL_MIN_BYTES = 4 * 2**20
+
+# ─── Schema fixo do modo rápido ──────────────────────────────────────────────
+SCOUT_COLUMNS = [
+    "A", "DS", "FC", "FD", "FF", "FS", "G", "I", "CA", "SG",
+    "DE", "GS", "CV", "PP", "PC", "FT", "DP", "PS", "GC", "V",
+]
+
+ROUND_SCHEMA = {
+    "atletas.atleta_id":          "int32",
+    "atletas.rodada_id":          "int16",
+    "atletas.clube_id":           "int32",
+    "atletas.posicao_id":         "int8",
+    "atletas.status_id":          "int8",
+    "atletas.jogos_num":          "int16",
+    "atletas.preco_num":          "float32",
+    "atletas.pontos_num":         "float32",
+    "atletas.media_num":          "float32",
+    "atletas.variacao_num":       "float32",
+    "atletas.entrou_em_campo":    "bool",
+    "atletas.clube.id.full.name": "category",
+    "atletas.apelido":            "category",
+    **{s: "float32" for s in SCOUT_COLUMNS},
+}
+
+# colunas que o pipeline usa; foto, slug, nome completo etc. ficam de fora
+DEFAULT_COLUMNS = list(ROUND_SCHEMA)
+
+RENAME_MAP = {
+    "atletas.atleta_id":  "player_id",
+    "atletas.preco_num":  "price",
+    "atletas.pontos_num": "points",
+    "atletas.rodada_id":  "rodada",
+}
+
+# estatísticas da última chamada de fetch_all_cartola_csvs
+last_load_stats = {}
+
+# cache em memória por diretório de cache: {cache_dir: {"frames": {...}, "order": [...], "df": DataFrame}}
+_MEMORY_CACHE = {}
+_MEMORY_LOCKS = {}
+_MEMORY_LOCK  = threading.Lock()
+
+
+def _memory_lock(cache_path: str) -> threading.Lock:
+    with _MEMORY_LOCK:
+        return _MEMORY_LOCKS.setdefault(cache_path, threading.Lock())
+
+
+def _tmp_name(path: str) -> str:
+    # temporário por processo/thread: o worker de pré-busca e o app gravam o mesmo cache
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def list_round_files(base: str) -> list:
+    """
+    Lista os CSVs de rodada em `base`, ordenados pelo número da rodada.
+    Aceita tanto `rodada_N.csv` quanto `rodada-N.csv`.
+    """
+    files = []
+    for path in glob.glob(os.path.join(base, "rodada*.csv")):
+        m = ROUND_FILE_RE.match(os.path.basename(path))
+        if m:
+            files.append((int(m.group(1)), path))
+    return [path for _, path in sorted(files)]
 
-    all_dfs = []
-    for file in files:
-        # pular arquivos vazios
-        if os.path.getsize(file) == 0:
-            print(f"Atenção: pulando CSV vazio → {file}")
-            continue
 
-        try:
+def _file_hash(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def read_round_csv(file: str, fast: bool = False, columns: tuple = None):
+    """
+    Lê e tipa um CSV de rodada. Retorna None se o arquivo estiver vazio/ilegível.
+
+    :param fast: usa o schema fixo (ROUND_SCHEMA) e lê só `columns`
+    :param columns: colunas originais a manter no modo rápido (padrão: DEFAULT_COLUMNS)
+    """
+    # pular arquivos vazios
+    if os.path.getsize(file) == 0:
+        print(f"Atenção: pulando CSV vazio → {file}")
+        return None
+
+    try:
+        if fast:
+            wanted = set(columns or DEFAULT_COLUMNS)
+            df = pd.read_csv(
+                file,
+                usecols=lambda c: c in wanted,
+                dtype={c: t for c, t in ROUND_SCHEMA.items() if c in wanted},
+            )
+        else:
             df = pd.read_csv(file)
-        except pd.errors.EmptyDataError:
-            print(f"Atenção: pandas não conseguiu ler (vazio?) → {file}")
-            continue
+    except pd.errors.EmptyDataError:
+        print(f"Atenção: pandas não conseguiu ler (vazio?) → {file}")
+        return None
 
-        # remova colunas irrelevantes
-        df = df.drop(columns=[c for c in df.columns if c.startswith("Unnamed")], errors="ignore")
+    if fast:
+        # rodadas sem scouts (ex: rodada 1) recebem as colunas vazias já tipadas,
+        # todas de uma vez; bool não aceita NA: coluna ausente (ex: entrou_em_campo) vale False
+        missing = {}
+        for col in columns or DEFAULT_COLUMNS:
+            if col not in df.columns:
+                dtype = ROUND_SCHEMA.get(col, "float32")
+                if dtype.startswith(("int", "float")):
+                    missing[col] = pd.Series(np.nan, index=df.index, dtype="float32")
+                elif dtype == "bool":
+                    missing[col] = pd.Series(False, index=df.index, dtype="bool")
+                else:
+                    missing[col] = pd.Series(pd.NA, index=df.index, dtype=dtype)
+        if missing:
+            df = pd.concat([df, pd.DataFrame(missing, index=df.index)], axis=1)
+        df = df[list(columns or DEFAULT_COLUMNS)]
 
-        # renomeie colunas principais
-        mapping = {}
-        if "atletas.atleta_id" in df:   mapping["atletas.atleta_id"] = "player_id"
-        if "atletas.preco_num"   in df: mapping["atletas.preco_num"]   = "price"
-        if "atletas.pontos_num"  in df: mapping["atletas.pontos_num"]  = "points"
-        if "atletas.rodada_id"   in df: mapping["atletas.rodada_id"]   = "rodada"
+    # remova colunas irrelevantes
+    df = df.drop(columns=[c for c in df.columns if c.startswith("Unnamed")], errors="ignore")
 
-        df.rename(columns=mapping, inplace=True)
+    # renomeie colunas principais
+    df.rename(columns=RENAME_MAP, inplace=True)
 
-        # converter tipos numéricos
+    # converter tipos numéricos (o modo rápido já vem tipado pelo schema)
+    if not fast:
         for col in ("price", "points", "rodada"):
             if col in df.columns:
                 df[col] = pd.to_numeric(df[col], errors="coerce")
 
-        all_dfs.append(df)
+    return df
+
+
+def _parse_files(files: list, fast: bool, columns: tuple, workers: int) -> list:
+    """
+    Parseia `files` em série ou num pool de processos (um arquivo por tarefa).
+
+    Com `workers` None o pool só sobe para cargas grandes (ao menos
+    PARALLEL_MIN_FILES arquivos e PARALLEL_MIN_BYTES bytes, ex: cache frio
+    de uma temporada inteira); um `workers` explícito > 1 usa o pool sempre.
+    """
+    if not files:
+        return []
+    if workers is None and (
+        len(files) < PARALLEL_MIN_FILES or sum(os.path.getsize(f) for f in files) < PARALLEL_MIN_BYTES
+    ):
+        workers = 1
+    n = min(workers or os.cpu_count() or 1, len(files))
+    if n <= 1:
+        return [read_round_csv(f, fast, columns) for f in files]
+    with ProcessPoolExecutor(max_workers=n) as pool:
+        return list(pool.map(read_round_csv, files, [fast] * len(files), [columns] * len(files)))
+
+
+def _restore_categories(df: pd.DataFrame) -> pd.DataFrame:
+    # concat de categóricas com categorias diferentes vira object; recategoriza
+    for col, dtype in ROUND_SCHEMA.items():
+        col = RENAME_MAP.get(col, col)
+        if dtype == "category" and col in df.columns and df[col].dtype != "category":
+            df[col] = df[col].astype("category")
+    return df
+
+
+def _concat(frames: list, fast: bool) -> pd.DataFrame:
+    df = pd.concat(frames, ignore_index=True)
+    return _restore_categories(df) if fast else df
+
+
+def _cache_dir_for(base: str, cache_dir: str = None, variant: str = "") -> str:
+    # um subdiretório por pasta de origem (e modo de leitura), para não colidirem
+    key = hashlib.sha1((os.path.abspath(base) + "|" + variant).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(cache_dir or DEFAULT_CACHE_DIR, key)
+
+
+def _variant(fast: bool, columns: tuple) -> str:
+    return "fast:" + ",".join(columns or DEFAULT_COLUMNS) if fast else ""
 
-    if not all_dfs:
-        raise RuntimeError("Todos os CSVs estavam vazios ou ilegíveis.")
 
-    return pd.concat(all_dfs, ignore_index=True)
+def _load_manifest(cache_path: str) -> dict:
+    path = os.path.join(cache_path, MANIFEST_NAME)
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(cache_path: str, manifest: dict) -> None:
+    # escrita atômica: grava num temporário e substitui
+    path = os.path.join(cache_path, MANIFEST_NAME)
+    tmp  = _tmp_name(path)
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _cached_round(file: str, entry: dict, cache_path: str, manifest: dict):
+    """
+    Tenta servir uma rodada do snapshot binário já tipado.
+
+    Só devolve None (= precisa parsear) quando tamanho/mtime mudaram E o
+    hash do conteúdo também mudou, ou quando não há snapshot.
+    Retorna (df, digest); df é None quando é preciso parsear.
+    """
+    name = os.path.basename(file)
+    st   = os.stat(file)
+    snapshot = os.path.join(cache_path, name + ".pkl")
+
+    if entry and entry.get("empty") and entry.get("size") == st.st_size \
+            and entry.get("mtime_ns") == st.st_mtime_ns:
+        return None, entry.get("sha1")
+
+    if entry and entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+        if os.path.exists(snapshot):
+            return pd.read_pickle(snapshot), entry.get("sha1")
+
+    digest = _file_hash(file)
+    if entry and entry.get("sha1") == digest and os.path.exists(snapshot):
+        # só o mtime mudou (ex: checkout): atualiza manifesto sem reparsear
+        manifest[name] = dict(entry, size=st.st_size, mtime_ns=st.st_mtime_ns)
+        return pd.read_pickle(snapshot), digest
+    return None, digest
+
+
+def _store_round(file: str, df, digest: str, cache_path: str, manifest: dict) -> None:
+    name = os.path.basename(file)
+    st   = os.stat(file)
+    snapshot = os.path.join(cache_path, name + ".pkl")
+    if df is not None:
+        tmp = _tmp_name(snapshot)
+        df.to_pickle(tmp)
+        os.replace(tmp, snapshot)
+    elif os.path.exists(snapshot):
+        os.remove(snapshot)
+    manifest[name] = {
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "sha1": digest,
+        "empty": df is None,
+    }
+
+
+@instrument("fetch_all_cartola_csvs")
+def fetch_all_cartola_csvs(
+    dir_path: str = None,
+    use_cache: bool = True,
+    cache_dir: str = None,
+    fast: bool = False,
+    columns: list = None,
+    workers: int = None
+) -> pd.DataFrame:
+    """
+    Carrega e concatena todos os CSVs de rodada do Cartola.
+
+    Com `use_cache=True` (padrão) mantém um manifesto (tamanho, mtime e sha1
+    de cada arquivo) e um snapshot binário já tipado de cada rodada em
+    `data/cache/cartola`. Uma chamada só parseia rodadas novas ou alteradas;
+    se nada mudou, devolve o DataFrame já concatenado em memória.
+
+    Com `fast=True` usa o schema fixo `ROUND_SCHEMA`: lê só as colunas
+    pedidas (sem foto, slug, nome completo...), com ids int32, scouts
+    float32 e clube categórico; cargas grandes são parseadas num pool de processos.
+
+    :param dir_path: pasta com os CSVs (padrão: data/raw/cartola/rodadas)
+    :param use_cache: se False, reparseia todos os arquivos sem tocar no cache
+    :param cache_dir: raiz alternativa para o cache em disco
+    :param fast: ativa o modo rápido com schema fixo
+    :param columns: colunas originais a ler no modo rápido (padrão: DEFAULT_COLUMNS)
+    :param workers: processos do pool no modo rápido (padrão: nº de CPUs, só
+                    em cargas grandes; 1 força a leitura em série)
+    :return: DataFrame com todas as rodadas, ordenado por número de rodada
+    """
+    start = time.perf_counter()
+    base  = dir_path or DEFAULT_DIR
+    files = list_round_files(base)
+    if not files:
+        raise FileNotFoundError(f"Nenhum CSV encontrado em {base}")
+
+    columns = tuple(columns) if columns else None
+    if fast and columns:
+        unknown = [c for c in columns if c not in ROUND_SCHEMA]
+        if unknown:
+            raise KeyError(f"Colunas fora do schema do modo rápido: {unknown}")
+    pool_workers = workers if fast else 1
+
+    if not use_cache:
+        parsed  = _parse_files(files, fast, columns, pool_workers)
+        all_dfs = [df for df in parsed if df is not None]
+        if not all_dfs:
+            raise RuntimeError("Todos os CSVs estavam vazios ou ilegíveis.")
+        result = _concat(all_dfs, fast)
+        _record_stats(start, fast, files, files, result)
+        return result
+
+    cache_path = _cache_dir_for(base, cache_dir, _variant(fast, columns))
+    os.makedirs(cache_path, exist_ok=True)
+    # o cache em memória e o manifesto desta pasta são lidos e alterados por
+    # várias threads (sessões do Streamlit): uma carga por vez
+    with _memory_lock(cache_path):
+        manifest = _load_manifest(cache_path)
+        manifest["__source__"] = os.path.abspath(base)
+        memory   = _MEMORY_CACHE.setdefault(cache_path, {"frames": {}, "order": [], "df": None})
+        frames   = memory["frames"]
+
+        changed, to_parse = [], []
+        for file in files:
+            name  = os.path.basename(file)
+            entry = manifest.get(name)
+            st    = os.stat(file)
+            fresh = (
+                name in frames and entry
+                and entry.get("size") == st.st_size
+                and entry.get("mtime_ns") == st.st_mtime_ns
+            )
+            if fresh:
+                continue
+            df, digest = _cached_round(file, entry, cache_path, manifest)
+            if df is None and not (entry and entry.get("empty") and entry.get("sha1") == digest):
+                to_parse.append((file, digest))
+            frames[name] = df
+            changed.append(name)
+
+        # só as rodadas novas/alteradas passam pelo parser
+        parsed = _parse_files([f for f, _ in to_parse], fast, columns, pool_workers)
+        for (file, digest), df in zip(to_parse, parsed):
+            _store_round(file, df, digest, cache_path, manifest)
+            frames[os.path.basename(file)] = df
+
+        # remove rodadas cujo arquivo sumiu
+        names   = [os.path.basename(f) for f in files]
+        removed = [n for n in list(frames) if n not in names]
+        for name in removed:
+            frames.pop(name)
+            manifest.pop(name, None)
+            snapshot = os.path.join(cache_path, name + ".pkl")
+            if os.path.exists(snapshot):
+                os.remove(snapshot)
+
+        if changed or removed:
+            _save_manifest(cache_path, manifest)
+
+        valid = [n for n in names if frames.get(n) is not None]
+        if not valid:
+            raise RuntimeError("Todos os CSVs estavam vazios ou ilegíveis.")
+
+        cached_df = memory["df"]
+        if cached_df is not None and not removed and valid[:len(memory["order"])] == memory["order"] \
+                and not any(n in memory["order"] for n in changed):
+            # só rodadas novas no fim: anexa ao frame já concatenado
+            new = [frames[n] for n in valid[len(memory["order"]):]]
+            if new:
+                cached_df = _concat([cached_df] + new, fast)
+        else:
+            cached_df = _concat([frames[n] for n in valid], fast)
+
+        memory["df"]    = cached_df
+        memory["order"] = valid
+        _record_stats(start, fast, files, [f for f, _ in to_parse], cached_df)
+        # cópia rasa: quem chama pode adicionar/renomear colunas sem afetar o cache
+        return cached_df.copy(deep=False)
+
+
+def _record_stats(start: float, fast: bool, files: list, parsed: list, df: pd.DataFrame) -> None:
+    last_load_stats.clear()
+    last_load_stats.update({
+        "mode": "fast" if fast else "default",
+        "seconds": time.perf_counter() - start,
+        "files_parsed": len(parsed),
+        "rows": len(df),
+    })
+    # para a instrumentação: rodadas servidas do cache × lidas do CSV
+    count("csv_cache_hits", len(files) - len(parsed))
+    count("csv_files_parsed", len(parsed))
+    count("csv_bytes", sum(os.path.getsize(f) for f in parsed))
+
+
+def measure_load(dir_path: str = None, workers: int = None, columns: list = None) -> pd.DataFrame:
+    """
+    Compara o caminho padrão com o modo rápido, todos sem cache. O modo
+    rápido é medido nos dois caminhos: em série ("fast") e no pool de
+    processos ("fast_pool", com `workers` processos; padrão: nº de CPUs, mín. 2).
+
+    :return: DataFrame com modo, segundos, memória (MB, deep) e shape de cada caminho
+    """
+    rows = []
+    for mode, kwargs in (
+        ("default", {}),
+        ("fast", {"fast": True, "workers": 1, "columns": columns}),
+        ("fast_pool", {"fast": True, "workers": workers or max(os.cpu_count() or 1, 2), "columns": columns}),
+    ):
+        start = time.perf_counter()
+        df    = fetch_all_cartola_csvs(dir_path, use_cache=False, **kwargs)
+        rows.append({
+            "mode": mode,
+            "seconds": time.perf_counter() - start,
+            "memory_mb": df.memory_usage(deep=True).sum() / 2**20,
+            "rows": len(df),
+            "columns": df.shape[1],
+        })
+    report = pd.DataFrame(rows).set_index("mode")
+    report["speedup"]      = report.loc["default", "seconds"] / report["seconds"]
+    report["memory_ratio"] = report["memory_mb"] / report.loc["default", "memory_mb"]
+    return report
+
+
+def clear_cache(dir_path: str = None, cache_dir: str = None) -> None:
+    """Descarta o cache em memória e em disco da pasta de rodadas indicada (todos os modos)."""
+    base = os.path.abspath(dir_path or DEFAULT_DIR)
+    root = cache_dir or DEFAULT_CACHE_DIR
+    if not os.path.isdir(root):
+        return
+    for key in os.listdir(root):
+        cache_path = os.path.join(root, key)
+        if _load_manifest(cache_path).get("__source__") != base:
+            continue
+        with _memory_lock(cache_path):
+            _MEMORY_CACHE.pop(cache_path, None)
+        for name in os.listdir(cache_path):
+            os.remove(os.path.join(cache_path, name))
+        os.rmdir(cache_path)
@@ -0,0 +1,214 @@
+# agents/prefetch.py
+#
+# Worker de pré-busca: atualiza, fora das páginas, todas as fontes do app
+# (cronograma, detalhes de partidas, classificação e snapshot do mercado do
+# Cartola como CSV de rodada) e aquece os caches em disco que
+# fetch_raw_data, o loader de CSVs e o store de atletas usam. Roda como
+# processo próprio:
+#
+#   python -m agents.prefetch --once
+#   python -m agents.prefetch --interval 900 --close-interval 120 --close-window 7200
+#   python -m agents.prefetch --once --api-url http://127.0.0.1:8000/v1 --cartola-url http://127.0.0.1:8000
+#
+# As URLs base também vêm de API_FUTEBOL_BASE_URL / CARTOLA_API_URL no .env,
+# o que permite rodar contra um servidor HTTP local em vez das APIs reais.
+
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+import threading
+import pandas as pd
+
+from utils.config import get_setting
+from utils.instrumentation import stage, spans, begin_run, summarize
+from agents.load_cartola_csv import DEFAULT_DIR, SCOUT_COLUMNS, fetch_all_cartola_csvs
+
+CARTOLA_URL   = "https://api.cartola.globo.com"
+CAMPEONATO_ID = 10  # Brasileirão Série A
+
+logger = logging.getLogger("sensai2.prefetch")
+
+_cartola = None
+
+
+def get_cartola_client():
+    """Cliente da API do Cartola (sem cache: o snapshot em CSV é o cache)."""
+    global _cartola
+    if _cartola is None:
+        from agents.http_client import ApiClient
+        _cartola = ApiClient(
+            get_setting("CARTOLA_API_URL", CARTOLA_URL),
+            timeout=float(get_setting("API_FUTEBOL_TIMEOUT", "10")),
+        )
+    return _cartola
+
+
+# ─── snapshot do mercado → CSV de rodada ────────────────────────────────────
+def market_to_round_frame(payload: dict) -> pd.DataFrame:
+    """
+    Converte a resposta de atletas/mercado no formato dos CSVs de rodada:
+    colunas `atletas.*`, scouts (acumulados) em colunas próprias e a sigla
+    do clube em `atletas.clube.id.full.name`.
+    """
+    df = pd.json_normalize(payload.get("atletas", []))
+    scouts  = {c: c[len("scout."):] for c in df.columns if c.startswith("scout.")}
+    renames = {c: f"atletas.{c}" for c in df.columns if c not in scouts}
+    df = df.rename(columns={**renames, **scouts})
+
+    clubes = payload.get("clubes", {})
+    siglas = {int(k): v.get("abreviacao") for k, v in clubes.items()}
+    if "atletas.clube_id" in df.columns:
+        df["atletas.clube.id.full.name"] = df["atletas.clube_id"].map(siglas)
+    for s in SCOUT_COLUMNS:
+        if s in df.columns:
+            df[s] = pd.to_numeric(df[s], errors="coerce")
+    return df
+
+
+def _write_if_changed(df: pd.DataFrame, path: str) -> bool:
+    """Grava o CSV de forma atômica só se o conteúdo mudou. Retorna True se gravou."""
+    data = df.to_csv().encode("utf-8")
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            if hashlib.sha1(f.read()).digest() == hashlib.sha1(data).digest():
+                return False
+    # nome por processo/thread: o worker e o app podem gravar a mesma rodada
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return True
+
+
+def snapshot_round(dir_path: str = None) -> dict:
+    """
+    Baixa o mercado do Cartola e grava `rodada_{N}.csv` (N = rodada_id dos atletas).
+
+    :return: {"rodada", "path", "written", "rows"}
+    """
+    payload = get_cartola_client().get_json("atletas/mercado", use_cache=False)
+    df = market_to_round_frame(payload)
+    if df.empty or "atletas.rodada_id" not in df.columns:
+        raise RuntimeError("Mercado sem atletas ou sem rodada_id")
+    rodada = int(df["atletas.rodada_id"].max())
+    base   = dir_path or DEFAULT_DIR
+    os.makedirs(base, exist_ok=True)
+    path   = os.path.join(base, f"rodada_{rodada}.csv")
+    return {"rodada": rodada, "path": path, "written": _write_if_changed(df, path), "rows": len(df)}
+
+
+def market_close():
+    """Horário (epoch) de fechamento do mercado, via mercado/status; None se indisponível."""
+    status = get_cartola_client().get_json("mercado/status", use_cache=False)
+    fechamento = status.get("fechamento") or {}
+    ts = fechamento.get("timestamp")
+    return float(ts) if ts else None
+
+
+# ─── um ciclo de pré-busca ──────────────────────────────────────────────────
+def run_cycle(campeonato_id: int = CAMPEONATO_ID, dir_path: str = None, concurrency: int = 8) -> dict:
+    """
+    Atualiza todas as fontes uma vez. Falhas de uma etapa são registradas
+    e não impedem as demais.
+
+    :return: {etapa: resultado ou {"error": mensagem}}
+    """
+    from agents.fetch_data import fetch_raw_data
+    from agents.schedule_index import get_schedule_index
+    from agents.standings_engine import fill_scores
+    from agents.incremental_metrics import incremental_player_metrics
+    from agents.athlete_store import open_store
+
+    report = {}
+
+    def step(name, fn):
+        try:
+            with stage(f"prefetch.{name}"):
+                report[name] = fn()
+        except (RuntimeError, KeyError, ValueError, OSError) as exc:
+            report[name] = {"error": str(exc)}
+            logger.warning("prefetch %s falhou: %s", name, exc)
+
+    def schedule():
+        # revalida na rede e grava no cache; o índice é refeito a partir do cache
+        fetch_raw_data(f"campeonatos/{campeonato_id}/partidas", refresh=True)
+        return {"games": len(get_schedule_index(campeonato_id, max_age=0).games)}
+
+    step("schedule", schedule)
+    step("details", lambda: {"scores": fill_scores(get_schedule_index(campeonato_id), concurrency=concurrency)})
+    step("standings", lambda: {"rows": len(fetch_raw_data(f"campeonatos/{campeonato_id}/classificacao", refresh=True))})
+    step("round_csv", lambda: snapshot_round(dir_path))
+    # pickles por rodada do loader e estado incremental das métricas
+    step("csv_cache", lambda: {"rows": len(fetch_all_cartola_csvs(dir_path))})
+    step("metrics_state", lambda: {"players": len(incremental_player_metrics(dir_path))})
+    step("athlete_store", lambda: {"path": open_store(dir_path).path})
+    return report
+
+
+def run_forever(
+    campeonato_id: int = CAMPEONATO_ID,
+    dir_path: str = None,
+    interval: float = 900,
+    close_interval: float = 120,
+    close_window: float = 2 * 60 * 60,
+    max_cycles: int = None
+) -> None:
+    """
+    Roda ciclos a cada `interval` segundos; a menos de `close_window`
+    segundos do fechamento do mercado, a cada `close_interval`.
+    """
+    cycles = 0
+    while max_cycles is None or cycles < max_cycles:
+        run_id = begin_run()
+        report = run_cycle(campeonato_id, dir_path)
+        cycles += 1
+        logger.info(json.dumps({"cycle": cycles, "report": report,
+                                "timings": summarize(spans(run_id))}, default=str))
+        if max_cycles is not None and cycles >= max_cycles:
+            break
+
+        wait = interval
+        try:
+            close = market_close()
+        except (RuntimeError, OSError, ValueError):
+            close = None
+        if close is not None and 0 < close - time.time() < close_window:
+            wait = close_interval
+        time.sleep(wait)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Pré-busca e aquecimento dos caches do Cartola/API Futebol.")
+    parser.add_argument("--campeonato", type=int, default=CAMPEONATO_ID)
+    parser.add_argument("--dir", help="pasta dos CSVs de rodada (padrão: data/raw/cartola/rodadas)")
+    parser.add_argument("--once", action="store_true", help="roda um ciclo e sai")
+    parser.add_argument("--cycles", type=int, help="nº máximo de ciclos")
+    parser.add_argument("--interval", type=float, default=900, help="segundos entre ciclos")
+    parser.add_argument("--close-interval", type=float, default=120, help="segundos entre ciclos perto do fechamento")
+    parser.add_argument("--close-window", type=float, default=7200, help="janela (s) antes do fechamento")
+    parser.add_argument("--api-url", help="URL base da API Futebol (ex: servidor local de testes)")
+    parser.add_argument("--cartola-url", help="URL base da API do Cartola")
+    args = parser.parse_args(argv)
+
+    # antes de qualquer cliente ser criado
+    if args.api_url:
+        os.environ["API_FUTEBOL_BASE_URL"] = args.api_url
+    if args.cartola_url:
+        os.environ["CARTOLA_API_URL"] = args.cartola_url
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+
+    if args.once:
+        report = run_cycle(args.campeonato, args.dir)
+        print(json.dumps(report, indent=2, default=str))
+        return 1 if any(isinstance(r, dict) and "error" in r for r in report.values()) else 0
+
+    run_forever(args.campeonato, args.dir, args.interval, args.close_interval, args.close_window, args.cycles)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
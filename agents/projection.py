@@ -0,0 +1,161 @@
+# agents/projection.py
+
+import numpy as np
+import pandas as pd
+from agents.load_cartola_csv import SCOUT_COLUMNS
+
+# pontuação de cada scout no Cartola
+SCOUT_POINTS = {
+    "G": 8.0, "A": 5.0, "FT": 3.0, "FD": 1.2, "FF": 0.8, "FS": 0.5, "PS": 1.0,
+    "DP": 7.0, "SG": 5.0, "DE": 1.0, "DS": 1.2, "V": 1.0,
+    "GC": -3.0, "CV": -3.0, "CA": -1.0, "GS": -1.0, "PP": -4.0, "PC": -1.0,
+    "FC": -0.3, "I": -0.1,
+}
+# scouts que dependem da defesa adversária (ataque) e do ataque adversário (defesa)
+OFFENSIVE_SCOUTS = ["G", "A", "FT", "FD", "FF", "FS", "PS"]
+DEFENSIVE_SCOUTS = ["SG", "DE", "DP", "GS"]
+
+CLUB_COLUMN = "atletas.clube.id.full.name"   # sigla do clube no CSV do Cartola
+HOME_EDGE   = 0.10                           # ganho relativo de quem joga em casa
+FACTOR_CLIP = (0.5, 1.5)                     # limites dos fatores de adversário
+
+FEATURES = ["intercept", "offense", "defense", "other", "ewm_points", "home"]
+# pesos padrão: esperança de pontos pelos scouts, já ajustada ao adversário
+DEFAULT_WEIGHTS = np.array([0.0, 1.0, 1.0, 1.0, 0.0, 0.0])
+
+
+def _scout_weights(names) -> np.ndarray:
+    return np.array([SCOUT_POINTS.get(s, 0.0) if s in names else 0.0 for s in SCOUT_COLUMNS])
+
+
+def _scout_rates(metrics_df: pd.DataFrame) -> np.ndarray:
+    """Média por jogo de cada scout (P × S); ausentes valem zero."""
+    rates = np.zeros((len(metrics_df), len(SCOUT_COLUMNS)))
+    for j, s in enumerate(SCOUT_COLUMNS):
+        col = f"{s}_avg"
+        if col in metrics_df.columns:
+            rates[:, j] = pd.to_numeric(metrics_df[col], errors="coerce").fillna(0).to_numpy(dtype="float64")
+    return rates
+
+
+def _fixtures(matches_df: pd.DataFrame) -> pd.DataFrame:
+    """Uma linha por clube da rodada: sigla, nome do adversário e mando (1 casa / 0 fora)."""
+    cols = ["sigla", "adversario", "home"]
+    if matches_df is None or matches_df.empty:
+        return pd.DataFrame(columns=cols)
+    home = pd.DataFrame({
+        "sigla":      matches_df["time_mandante.sigla"],
+        "adversario": matches_df["time_visitante.nome_popular"],
+        "home":       1.0,
+    })
+    away = pd.DataFrame({
+        "sigla":      matches_df["time_visitante.sigla"],
+        "adversario": matches_df["time_mandante.nome_popular"],
+        "home":       0.0,
+    })
+    return pd.concat([home, away], ignore_index=True).drop_duplicates("sigla")[cols]
+
+
+def _opponent_factors(fixtures: pd.DataFrame, standings_df: pd.DataFrame):
+    """
+    Fatores de ataque e defesa por clube, a partir da classificação:
+      * ataque: gols sofridos por jogo do adversário / média da liga
+      * defesa: média da liga / gols marcados por jogo do adversário
+    """
+    n = len(fixtures)
+    if standings_df is None or standings_df.empty or n == 0:
+        return np.ones(n), np.ones(n)
+    table = standings_df.set_index("time")
+    jogos = table["jogos"].astype("float64")
+    league_gm = table["gm"].sum() / max(jogos.sum(), 1.0)
+    league_gc = table["gc"].sum() / max(jogos.sum(), 1.0)
+
+    opp   = table.reindex(fixtures["adversario"])
+    games = opp["jogos"].astype("float64").to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gm_pg = opp["gm"].to_numpy(dtype="float64") / games
+        gc_pg = opp["gc"].to_numpy(dtype="float64") / games
+        attack  = gc_pg / league_gc
+        defense = league_gm / gm_pg
+    attack  = np.clip(np.nan_to_num(attack, nan=1.0, posinf=FACTOR_CLIP[1]), *FACTOR_CLIP)
+    defense = np.clip(np.nan_to_num(defense, nan=1.0, posinf=FACTOR_CLIP[1]), *FACTOR_CLIP)
+    return attack, defense
+
+
+def projection_features(
+    metrics_df: pd.DataFrame,
+    matches_df: pd.DataFrame = None,
+    standings_df: pd.DataFrame = None
+) -> np.ndarray:
+    """
+    Matriz de atributos (P × len(FEATURES)), uma linha por jogador de `metrics_df`:
+
+      * offense / defense / other: pontos esperados pelas taxas de scouts
+        (ofensivos, defensivos e demais), os dois primeiros já multiplicados
+        pelo fator do adversário e pelo mando
+      * ewm_points: média exponencial recente
+      * home: 1 em casa, 0 fora, 0.5 se o clube não joga / não foi encontrado
+
+    :param metrics_df: saída de compute_player_metrics
+    :param matches_df: jogos da próxima rodada (fetch_next_round_matches)
+    :param standings_df: classificação (fetch_standings ou local_standings)
+    """
+    rates   = _scout_rates(metrics_df)
+    offense = rates @ _scout_weights(OFFENSIVE_SCOUTS)
+    defense = rates @ _scout_weights(DEFENSIVE_SCOUTS)
+    other   = rates @ _scout_weights(set(SCOUT_POINTS) - set(OFFENSIVE_SCOUTS) - set(DEFENSIVE_SCOUTS))
+
+    fixtures = _fixtures(matches_df)
+    attack, defend = _opponent_factors(fixtures, standings_df)
+    home = np.full(len(metrics_df), 0.5)
+    att  = np.ones(len(metrics_df))
+    dfn  = np.ones(len(metrics_df))
+    if CLUB_COLUMN in metrics_df.columns and len(fixtures):
+        # posição do clube de cada jogador na tabela de confrontos (-1 = sem jogo)
+        pos = pd.Index(fixtures["sigla"]).get_indexer(metrics_df[CLUB_COLUMN].astype(str))
+        has = pos >= 0
+        home[has] = fixtures["home"].to_numpy()[pos[has]]
+        att[has]  = attack[pos[has]]
+        dfn[has]  = defend[pos[has]]
+
+    mando = 1 + HOME_EDGE * (2 * home - 1)
+    ewm   = pd.to_numeric(metrics_df.get("ewm_points", 0.0), errors="coerce")
+    ewm   = np.broadcast_to(np.nan_to_num(np.asarray(ewm, dtype="float64")), len(metrics_df))
+    return np.column_stack([
+        np.ones(len(metrics_df)), offense * att * mando, defense * dfn * mando, other, ewm, home,
+    ])
+
+
+def fit_weights(features: np.ndarray, realized: np.ndarray, alpha: float = 1.0) -> np.ndarray:
+    """
+    Ajuste ridge dos pesos (forma fechada), encolhendo em direção a DEFAULT_WEIGHTS:
+    resolve (XᵀX + αI) w = Xᵀy + α·w₀. Linhas com alvo NaN são ignoradas.
+
+    :param features: matriz de projection_features de rodadas passadas
+    :param realized: pontos efetivamente feitos na rodada seguinte
+    :param alpha: força da regularização
+    """
+    realized = np.asarray(realized, dtype="float64")
+    ok = ~np.isnan(realized)
+    X, y = features[ok], realized[ok]
+    A = X.T @ X + alpha * np.eye(X.shape[1])
+    return np.linalg.solve(A, X.T @ y + alpha * DEFAULT_WEIGHTS)
+
+
+def project_points(
+    metrics_df: pd.DataFrame,
+    matches_df: pd.DataFrame = None,
+    standings_df: pd.DataFrame = None,
+    weights: np.ndarray = None
+) -> pd.DataFrame:
+    """
+    Pontuação projetada de todo o mercado para a próxima rodada,
+    num único produto matriz × pesos.
+
+    :param weights: pesos de FEATURES (padrão: DEFAULT_WEIGHTS; ver fit_weights)
+    :return: cópia de `metrics_df` com a coluna `projected_points`
+    """
+    weights = DEFAULT_WEIGHTS if weights is None else np.asarray(weights, dtype="float64")
+    out = metrics_df.copy()
+    out["projected_points"] = projection_features(metrics_df, matches_df, standings_df) @ weights
+    return out
@@ -0,0 +1,203 @@
+# agents/risk.py
+
+import numpy as np
+import pandas as pd
+from agents.load_cartola_csv import SCOUT_COLUMNS
+from agents.analyze_data import _normalize_columns, to_cents, compute_player_metrics
+from agents.projection import SCOUT_POINTS
+
+PERCENTILES = (5, 25, 50, 75, 95)
+CHUNK       = 25_000   # simulações por lote (limita a memória)
+
+
+def _lineup_ids(lineup) -> np.ndarray:
+    if isinstance(lineup, pd.DataFrame):
+        lineup = lineup["player_id"]
+    return np.asarray(list(lineup), dtype=np.int64)
+
+
+def _history_matrix(ids: np.ndarray, history_df: pd.DataFrame):
+    """
+    Pontos (centésimos) jogador × rodada dos jogadores `ids`.
+
+    As colunas são só as rodadas em que alguém entrou em campo
+    (`atletas.entrou_em_campo`): a rodada 1 (snapshot de pré-temporada,
+    tudo zerado) e rodadas sem jogos ficam fora do sorteio.
+
+    :return: points (P × R, zero onde o jogador não jogou), listed (P × R,
+             jogador com registro na rodada), packed (P × R) com os pontos
+             das rodadas jogadas alinhados à esquerda, counts (P,) rodadas
+             jogadas e p_play (P,) fração das rodadas listadas em que jogou
+    """
+    df = _normalize_columns(history_df)
+    if "atletas.entrou_em_campo" in df.columns:
+        played_col = df["atletas.entrou_em_campo"].fillna(False).astype(bool).to_numpy()
+    else:
+        played_col = np.ones(len(df), dtype=bool)
+    if "rodada" in df.columns:
+        rounds = np.unique(df["rodada"].to_numpy()[played_col])
+        keep   = df["player_id"].isin(ids).to_numpy() & np.isin(df["rodada"].to_numpy(), rounds)
+        df, played_col = df[keep], played_col[keep]
+        r_code = np.searchsorted(rounds, df["rodada"].to_numpy())
+    else:
+        keep = df["player_id"].isin(ids).to_numpy()
+        df, played_col = df[keep], played_col[keep]
+        rounds = r_code = np.arange(len(df))
+    p_code = pd.Index(ids).get_indexer(df["player_id"].to_numpy())
+
+    points = np.zeros((len(ids), max(len(rounds), 1)), dtype=np.int64)
+    listed = np.zeros_like(points, dtype=bool)
+    played = np.zeros_like(points, dtype=bool)
+    cents  = to_cents(pd.to_numeric(df["points"], errors="coerce").fillna(0).to_numpy())
+    listed[p_code, r_code] = True
+    played[p_code, r_code] = played_col
+    points[p_code, r_code] = np.where(played_col, cents, 0)
+
+    counts = played.sum(axis=1)
+    order  = np.argsort(~played, axis=1, kind="stable")
+    packed = np.take_along_axis(points, order, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p_play = np.nan_to_num(counts / listed.sum(axis=1))
+    return points, listed, packed, counts, p_play
+
+
+def _bootstrap_totals(rng, round_rng, n, points, listed, packed, counts, p_play, joint) -> np.ndarray:
+    """
+    Soma da escalação em `n` rodadas sorteadas do histórico.
+
+    Cada jogador entra em campo com a sua taxa empírica (`p_play`) e, se
+    entrar, pontua como numa das rodadas em que jogou; se não, faz 0.
+    Com joint=True sorteia uma mesma rodada histórica para todos (preserva a
+    correlação entre companheiros): quem tinha registro nela leva o que
+    realmente fez (0 se não jogou) e só quem não tinha recebe o sorteio
+    independente.
+    """
+    P = len(counts)
+    own   = np.floor(rng.random((n, P)) * np.maximum(counts, 1)).astype(np.int64)
+    plays = rng.random((n, P)) < p_play
+    draws = np.where(plays & (counts > 0), packed[np.arange(P), own], 0)     # n × P
+    if joint:
+        r = round_rng.integers(0, points.shape[1], size=n)
+        draws = np.where(listed[:, r].T, points[:, r].T, draws)
+    return draws.sum(axis=1)
+
+
+def _poisson_model(ids: np.ndarray, history_df: pd.DataFrame):
+    """
+    Taxas por jogo dos scouts agrupadas por pontuação do scout e probabilidade
+    de entrar em campo de cada jogador.
+
+    :return: rates (P × W) soma das taxas de cada jogador por pontuação,
+             pts (W,) pontuação em centésimos, p_play (P,)
+    """
+    metrics = compute_player_metrics(history_df[_normalize_columns(history_df)["player_id"].isin(ids)])
+    metrics = metrics.set_index("player_id").reindex(ids)
+    rates = np.column_stack([
+        metrics.get(f"{s}_avg", pd.Series(0.0, index=metrics.index)).fillna(0).to_numpy(dtype="float64")
+        for s in SCOUT_COLUMNS
+    ])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p_play = (metrics["games_played"] / metrics["n_rounds"]).fillna(0).to_numpy(dtype="float64")
+    weights = to_cents([SCOUT_POINTS.get(s, 0.0) for s in SCOUT_COLUMNS])
+    pts, group = np.unique(weights[weights != 0], return_inverse=True)
+    grouped = np.zeros((len(ids), len(pts)))
+    np.add.at(grouped.T, group, rates[:, weights != 0].T)
+    return grouped, pts, p_play
+
+
+def _poisson_totals(rng, n, rates, pts, p_play) -> np.ndarray:
+    """
+    Soma da escalação com scouts ~ Poisson(taxa por jogo), só para quem entrou
+    em campo. Poissons independentes de mesma pontuação se somam numa só
+    Poisson (taxa = soma das taxas de quem jogou): um sorteio por pontuação.
+    """
+    played = rng.random((n, len(p_play))) < p_play
+    return rng.poisson(played @ rates) @ pts
+
+
+def simulate_totals(
+    lineup,
+    history_df: pd.DataFrame,
+    n_sims: int = 100_000,
+    method: str = "bootstrap",
+    joint: bool = True,
+    seed: int = None
+) -> np.ndarray:
+    """
+    Pontuações totais simuladas da escalação (em pontos, não centésimos).
+
+    :param lineup: DataFrame com player_id (ex: build_optimal_team) ou lista de ids
+    :param history_df: rodadas históricas (fetch_all_cartola_csvs)
+    :param method: "bootstrap" (pontos históricos reamostrados) ou
+                   "poisson" (scouts por jogo ~ Poisson × pontuação do scout)
+    :param joint: no bootstrap, sorteia a mesma rodada para todos os jogadores
+    :param seed: semente; a mesma semente gera os mesmos sorteios de rodada
+                 (números aleatórios comuns ao comparar escalações)
+    """
+    ids = _lineup_ids(lineup)
+    # gerador próprio para as rodadas: mesma semente → mesmas rodadas em qualquer escalação
+    rng, round_rng = np.random.default_rng(seed).spawn(2)
+    if method == "bootstrap":
+        model = _history_matrix(ids, history_df)
+        draw  = lambda n: _bootstrap_totals(rng, round_rng, n, *model, joint)
+    elif method == "poisson":
+        model = _poisson_model(ids, history_df)
+        draw  = lambda n: _poisson_totals(rng, n, *model)
+    else:
+        raise ValueError(f"Método desconhecido: {method!r} (use 'bootstrap' ou 'poisson')")
+
+    totals = np.empty(n_sims, dtype=np.int64)
+    for start in range(0, n_sims, CHUNK):
+        stop = min(start + CHUNK, n_sims)
+        totals[start:stop] = draw(stop - start)
+    return totals / 100
+
+
+def summarize_totals(totals: np.ndarray, target: float = None) -> dict:
+    """Valor esperado, desvio, percentis e P(total > target) das simulações."""
+    summary = {"expected": float(totals.mean()), "std": float(totals.std(ddof=1))}
+    for q, v in zip(PERCENTILES, np.percentile(totals, PERCENTILES)):
+        summary[f"p{q}"] = float(v)
+    if target is not None:
+        summary["p_target"] = float((totals > target).mean())
+    return summary
+
+
+def simulate_lineup(
+    lineup,
+    history_df: pd.DataFrame,
+    n_sims: int = 100_000,
+    target: float = None,
+    method: str = "bootstrap",
+    seed: int = None
+) -> dict:
+    """
+    Risco de uma escalação: simula `n_sims` rodadas e resume a distribuição
+    do total (expected, std, p5…p95 e, com `target`, p_target = P(total > target)).
+    """
+    return summarize_totals(simulate_totals(lineup, history_df, n_sims, method, seed=seed), target)
+
+
+def compare_lineups(
+    lineups: dict,
+    history_df: pd.DataFrame,
+    n_sims: int = 100_000,
+    target: float = None,
+    method: str = "bootstrap",
+    seed: int = 0
+) -> pd.DataFrame:
+    """
+    Compara escalações lado a lado, todas simuladas com a mesma semente.
+
+    :param lineups: {nome: escalação (DataFrame ou lista de player_id)}
+    :return: DataFrame uma linha por escalação com as colunas de
+             simulate_lineup + p_best (fração das simulações em que
+             foi a melhor)
+    """
+    names  = list(lineups)
+    totals = np.vstack([
+        simulate_totals(lineups[name], history_df, n_sims, method, seed=seed) for name in names
+    ])
+    best = np.bincount(totals.argmax(axis=0), minlength=len(names)) / n_sims
+    rows = [dict(lineup=name, **summarize_totals(t, target), p_best=b) for name, t, b in zip(names, totals, best)]
+    return pd.DataFrame(rows)
@@ -0,0 +1,235 @@
+# agents/schedule_index.py
+
+import re
+import json
+import time
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+from agents.fetch_data import fetch_raw_data
+
+ROUND_COL_RE = re.compile(r"^partidas\.fase-unica\.(\d+)a-rodada$")
+
+HOME_ID = "time_mandante.time_id"
+AWAY_ID = "time_visitante.time_id"
+
+# status em que a partida certamente ainda não tem placar
+NOT_PLAYED_STATUSES = {"agendado", "adiado", "cancelado"}
+
+_INDEXES = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def _score_columns(columns) -> tuple:
+    # detecta dinamicamente os campos de placar (ex: placar_oficial_mandante)
+    cols = list(columns)
+    mand = next((c for c in cols if "mandante" in c.lower() and "placar" in c.lower()), None)
+    vis  = next((c for c in cols if "visitante" in c.lower() and "placar" in c.lower()), None)
+    return mand, vis
+
+
+class ScheduleIndex:
+    """
+    Tabela de partidas de um campeonato, achatada e tipada, com índices em memória.
+
+    * `games`: uma linha por partida (colunas originais do json_normalize +
+      `rodada`, `placar_oficial_mandante`, `placar_oficial_visitante`)
+    * lookups por rodada, por time (ordenado por rodada) e por partida_id
+
+    `refresh()` baixa o cronograma de novo, mas só re-normaliza as rodadas
+    cujo conteúdo mudou.
+    """
+
+    def __init__(self, campeonato_id: int):
+        self.campeonato_id = campeonato_id
+        self.games         = pd.DataFrame()
+        self.updated_at    = 0.0
+        self._round_hashes = {}
+        self._round_frames = {}
+        self._scores       = {}
+        self._lock         = threading.Lock()
+        self._refresh_lock = threading.RLock()   # um refresh por vez (_round_frames/_round_hashes)
+        self._by_round     = {}
+        self._by_team      = {}
+        self._by_partida   = {}
+        self._team_names   = {}
+        self._goals        = np.empty((0, 2))
+        self._views        = {}
+
+    # ─── construção ─────────────────────────────────────────────────────────
+    def refresh(self, raw: pd.DataFrame = None) -> "ScheduleIndex":
+        """
+        Atualiza o índice a partir do cronograma da API.
+
+        :param raw: cronograma já baixado (mesmo formato de fetch_raw_data);
+                    None busca na API
+        """
+        with self._refresh_lock:
+            return self._refresh(raw)
+
+    def refresh_if_stale(self, max_age: float) -> "ScheduleIndex":
+        """Atualiza só se o índice estiver vazio ou com mais de `max_age` segundos."""
+        with self._refresh_lock:
+            if self.games.empty or time.time() - self.updated_at > max_age:
+                self._refresh()
+        return self
+
+    def _refresh(self, raw: pd.DataFrame = None) -> "ScheduleIndex":
+        if raw is None:
+            raw = fetch_raw_data(f"campeonatos/{self.campeonato_id}/partidas")
+        rodada_cols = {int(m.group(1)): c for c in raw.columns if (m := ROUND_COL_RE.match(c))}
+        if not rodada_cols:
+            raise KeyError("Nenhuma coluna de rodada encontrada no DataFrame.")
+
+        changed = False
+        for rodada, col in rodada_cols.items():
+            jogos  = raw[col].iloc[0]        # lista de dicts
+            digest = hashlib.sha1(json.dumps(jogos, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+            if self._round_hashes.get(rodada) == digest:
+                continue
+            temp = pd.json_normalize(jogos)
+            temp["rodada"] = rodada
+            self._round_frames[rodada] = temp
+            self._round_hashes[rodada] = digest
+            changed = True
+        for rodada in set(self._round_frames) - set(rodada_cols):
+            del self._round_frames[rodada], self._round_hashes[rodada]
+            changed = True
+
+        if changed or self.games.empty:
+            self._rebuild()
+        self.updated_at = time.time()
+        return self
+
+    def _rebuild(self) -> None:
+        games = pd.concat(
+            [self._round_frames[r] for r in sorted(self._round_frames)], ignore_index=True
+        )
+        games["rodada"]     = games["rodada"].astype("int16")
+        games["partida_id"] = pd.to_numeric(games["partida_id"], errors="coerce").astype("int64")
+        for col in (HOME_ID, AWAY_ID):
+            games[col] = pd.to_numeric(games[col], errors="coerce").astype("int64")
+
+        # placares: do próprio cronograma, se vierem, senão dos detalhes já buscados
+        mand, vis = _score_columns(games.columns)
+        home = pd.to_numeric(games[mand], errors="coerce") if mand else pd.Series(np.nan, index=games.index)
+        away = pd.to_numeric(games[vis], errors="coerce") if vis else pd.Series(np.nan, index=games.index)
+        games = games.drop(columns=[c for c in (mand, vis) if c], errors="ignore")
+        games["placar_oficial_mandante"]  = home.astype("Int64")
+        games["placar_oficial_visitante"] = away.astype("Int64")
+
+        # índices montados em variáveis locais e publicados juntos, sob o lock:
+        # quem lê nunca mistura posições antigas com a tabela nova
+        pids       = games["partida_id"].to_numpy()
+        rounds     = games["rodada"].to_numpy()
+        by_round   = {int(r): np.flatnonzero(rounds == r) for r in np.unique(rounds)}
+        by_partida = {int(p): i for i, p in enumerate(pids)}
+        names = pd.concat([
+            games[["time_mandante.nome_popular", HOME_ID]].set_axis(["nome", "id"], axis=1),
+            games[["time_visitante.nome_popular", AWAY_ID]].set_axis(["nome", "id"], axis=1),
+        ]).drop_duplicates("nome")
+        team_names = dict(zip(names["nome"], names["id"].astype(int)))
+
+        # por time: posições ordenadas por rodada (crescente)
+        team_ids = np.concatenate((games[HOME_ID].to_numpy(), games[AWAY_ID].to_numpy()))
+        pos      = np.concatenate((np.arange(len(games)), np.arange(len(games))))
+        order    = np.lexsort((rounds[pos], team_ids))
+        team_ids, pos = team_ids[order], pos[order]
+        bounds = np.flatnonzero(np.diff(team_ids)) + 1
+        by_team = {
+            int(chunk_ids[0]): chunk_pos
+            for chunk_ids, chunk_pos in zip(np.split(team_ids, bounds), np.split(pos, bounds))
+            if chunk_ids.size
+        }
+
+        with self._lock:
+            for pid, (h, a) in self._scores.items():
+                i = by_partida.get(int(pid))
+                if i is not None:
+                    games.loc[i, ["placar_oficial_mandante", "placar_oficial_visitante"]] = (h, a)
+            goals = games[["placar_oficial_mandante", "placar_oficial_visitante"]].to_numpy(
+                dtype="float64", na_value=np.nan
+            )
+            (self.games, self._goals, self._views, self._by_round,
+             self._by_partida, self._by_team, self._team_names) = (
+                games, goals, {}, by_round, by_partida, by_team, team_names
+            )
+
+    # ─── consultas ──────────────────────────────────────────────────────────
+    def round_games(self, rodada: int) -> pd.DataFrame:
+        """Partidas da rodada `rodada`. KeyError se a rodada não existir."""
+        if rodada not in self._by_round:
+            raise KeyError(f"Coluna esperada não encontrada: partidas.fase-unica.{rodada}a-rodada")
+        return self._view(("rodada", rodada), lambda: self.games.iloc[self._by_round[rodada]].reset_index(drop=True))
+
+    def team_games(self, team_id: int, descending: bool = True) -> pd.DataFrame:
+        """Partidas do time (mandante ou visitante), ordenadas por rodada."""
+        def build():
+            # roda sob o lock: posições e tabela vêm do mesmo rebuild
+            pos = self._by_team.get(int(team_id), np.empty(0, dtype=np.int64))
+            return self.games.iloc[pos[::-1] if descending else pos]
+        return self._view(("time", int(team_id), descending), build)
+
+    def _view(self, key, build) -> pd.DataFrame:
+        # fatias já recortadas ficam memorizadas até o próximo rebuild/placar novo;
+        # o recorte roda sob o lock para não ver um placar escrito pela metade
+        with self._lock:
+            view = self._views.get(key)
+            if view is None:
+                view = self._views[key] = build()
+        return view.copy(deep=False)
+
+    def match(self, partida_id: int) -> pd.Series:
+        with self._lock:
+            return self.games.iloc[self._by_partida[int(partida_id)]]
+
+    def team_names(self) -> dict:
+        """{nome_popular: time_id} de todos os times do campeonato."""
+        return dict(self._team_names)
+
+    def is_known_unplayed(self, row) -> bool:
+        status = str(row.get("status", "")).lower()
+        return status in NOT_PLAYED_STATUSES
+
+    def score(self, partida_id: int):
+        """Placar conhecido (gols_mandante, gols_visitante) ou None."""
+        with self._lock:
+            i = self._by_partida.get(int(partida_id))
+            if i is None or np.isnan(self._goals[i, 0]):
+                return None
+            return int(self._goals[i, 0]), int(self._goals[i, 1])
+
+    def goals(self) -> np.ndarray:
+        """Placares (N × 2, NaN sem placar) alinhados com `games`; cópia."""
+        with self._lock:
+            return self._goals.copy()
+
+    def set_score(self, partida_id: int, home_goals, away_goals) -> None:
+        """
+        Registra o placar obtido dos detalhes da partida (vale também após refresh).
+        Escreve em `games` sob o lock; fetch_matches chama só da thread de quem pediu.
+        """
+        with self._lock:
+            home_goals, away_goals = int(home_goals), int(away_goals)
+            self._scores[int(partida_id)] = (home_goals, away_goals)
+            i = self._by_partida.get(int(partida_id))
+            if i is not None:
+                self.games.iat[i, self.games.columns.get_loc("placar_oficial_mandante")]  = home_goals
+                self.games.iat[i, self.games.columns.get_loc("placar_oficial_visitante")] = away_goals
+                self._goals[i] = (home_goals, away_goals)
+                self._views    = {}
+
+
+def get_schedule_index(campeonato_id: int, max_age: float = 300.0) -> ScheduleIndex:
+    """
+    Índice do campeonato, construído uma vez por processo e atualizado
+    (incrementalmente) quando tiver mais de `max_age` segundos.
+    """
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(campeonato_id)
+        if index is None:
+            index = _INDEXES[campeonato_id] = ScheduleIndex(campeonato_id)
+    # checagem e refresh sob o lock do próprio índice: sessões concorrentes
+    # esperam o refresh em curso em vez de refazê-lo em paralelo
+    return index.refresh_if_stale(max_age)
@@ -0,0 +1,197 @@
+# agents/standings_engine.py
+
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from agents.schedule_index import get_schedule_index, HOME_ID, AWAY_ID
+from utils.instrumentation import bind
+
+STANDINGS_COLUMNS = [
+    "posicao", "time", "pontos", "jogos", "vitorias", "empates", "derrotas",
+    "gm", "gc", "sg", "ultimas5",
+]
+# estatísticas acumuladas, na ordem do tensor
+STATS = ["pontos", "jogos", "vitorias", "empates", "derrotas", "gm", "gc"]
+FORM_GAMES = 5
+
+HOME_NAME = "time_mandante.nome_popular"
+AWAY_NAME = "time_visitante.nome_popular"
+
+
+class StandingsEngine:
+    """
+    Classificação de todos os times em todas as rodadas, calculada a partir
+    da tabela de partidas do ScheduleIndex.
+
+    Guarda o incremento de cada estatística por (time, rodada) e a soma
+    acumulada ao longo das rodadas (`table[stat, time, rodada]`). Quando
+    chegam placares novos, `sync()` aplica só a diferença das partidas
+    alteradas e refaz a soma acumulada a partir da primeira rodada afetada.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self._rebuild()
+
+    # ─── construção ─────────────────────────────────────────────────────────
+    def _rebuild(self) -> None:
+        games = self.index.games
+        self._games_ref = games
+        self._pids   = games["partida_id"].to_numpy().copy()
+        self.rounds  = np.unique(games["rodada"].to_numpy())
+        home, away   = games[HOME_ID].to_numpy(), games[AWAY_ID].to_numpy()
+        self.team_ids, codes = np.unique(np.concatenate((home, away)), return_inverse=True)
+        self._home, self._away = codes[:len(games)], codes[len(games):]
+        self._round = np.searchsorted(self.rounds, games["rodada"].to_numpy())
+
+        names = pd.concat([
+            games[[HOME_ID, HOME_NAME]].set_axis(["id", "nome"], axis=1),
+            games[[AWAY_ID, AWAY_NAME]].set_axis(["id", "nome"], axis=1),
+        ]).drop_duplicates("id").set_index("id")["nome"]
+        self.team_names = names.reindex(self.team_ids).to_numpy()
+
+        shape = (len(STATS), len(self.team_ids), len(self.rounds))
+        self._delta = np.zeros(shape, dtype=np.int64)
+        self._goals = np.full((len(games), 2), np.nan)
+        self._apply(np.arange(len(games)), self.index.goals())
+        self.table = np.cumsum(self._delta, axis=2)
+
+    def _contributions(self, rows: np.ndarray, goals: np.ndarray) -> np.ndarray:
+        """Incrementos (stat × 2·jogos) de mandante e visitante das partidas `rows` com placar."""
+        h, a = goals[:, 0], goals[:, 1]
+        played = ~np.isnan(h) & ~np.isnan(a)
+        h, a = np.nan_to_num(h).astype(np.int64), np.nan_to_num(a).astype(np.int64)
+        win, draw, loss = (h > a) & played, (h == a) & played, (h < a) & played
+        home = np.vstack([3 * win + draw, played, win, draw, loss, h * played, a * played])
+        away = np.vstack([3 * loss + draw, played, loss, draw, win, a * played, h * played])
+        return np.hstack([home, away]).astype(np.int64)
+
+    def _apply(self, rows: np.ndarray, goals: np.ndarray, sign: int = 1) -> None:
+        teams  = np.concatenate((self._home[rows], self._away[rows]))
+        rounds = np.concatenate((self._round[rows], self._round[rows]))
+        contrib = self._contributions(rows, goals) * sign
+        for s in range(len(STATS)):
+            np.add.at(self._delta[s], (teams, rounds), contrib[s])
+        if sign > 0:
+            self._goals[rows] = goals
+
+    def sync(self) -> "StandingsEngine":
+        """
+        Incorpora placares novos/corrigidos do índice. Se o cronograma mudou
+        (partidas diferentes), reconstrói tudo.
+        """
+        games = self.index.games
+        if games is not self._games_ref and (
+            len(games) != len(self._pids) or not np.array_equal(games["partida_id"].to_numpy(), self._pids)
+        ):
+            self._rebuild()
+            return self
+        self._games_ref = games
+
+        new = self.index.goals()
+        old = self._goals
+        same = (new == old) | (np.isnan(new) & np.isnan(old))
+        rows = np.flatnonzero(~same.all(axis=1))
+        if rows.size:
+            self._apply(rows, old[rows], sign=-1)
+            self._apply(rows, new[rows])
+            start = int(self._round[rows].min())
+            before = self.table[:, :, start - 1:start] if start > 0 else 0
+            self.table[:, :, start:] = before + np.cumsum(self._delta[:, :, start:], axis=2)
+        return self
+
+    # ─── consultas ──────────────────────────────────────────────────────────
+    def _round_pos(self, rodada) -> int:
+        if rodada is None:
+            return len(self.rounds) - 1
+        pos = int(np.searchsorted(self.rounds, rodada, side="right")) - 1
+        if pos < 0:
+            raise KeyError(f"Rodada sem partidas no cronograma: {rodada}")
+        return pos
+
+    def _positions(self, r: int) -> np.ndarray:
+        """Ordem de classificação (pontos, vitórias, saldo, gols pró, nome) na rodada r."""
+        t = self.table[:, :, r]
+        pontos, vitorias, gm, gc = t[0], t[2], t[5], t[6]
+        return np.lexsort((self.team_names, -gm, -(gm - gc), -vitorias, -pontos))
+
+    def _form(self, r: int) -> list:
+        """Últimos FORM_GAMES resultados ('v', 'e', 'd') de cada time até a rodada r, do mais antigo ao mais novo."""
+        played = ~np.isnan(self._goals).any(axis=1) & (self._round <= r)
+        rows   = np.flatnonzero(played)
+        h, a   = self._goals[rows, 0], self._goals[rows, 1]
+        teams  = np.concatenate((self._home[rows], self._away[rows]))
+        order_key = np.concatenate((self._round[rows], self._round[rows]))
+        codes  = np.concatenate((
+            np.where(h > a, "v", np.where(h == a, "e", "d")),
+            np.where(a > h, "v", np.where(h == a, "e", "d")),
+        ))
+        order = np.lexsort((order_key, teams))
+        teams, codes = teams[order], codes[order]
+        form = [[] for _ in self.team_ids]
+        for t, c in zip(teams, codes):
+            form[t].append(c)
+        return [f[-FORM_GAMES:] for f in form]
+
+    def standings_at(self, rodada: int = None) -> pd.DataFrame:
+        """
+        Classificação ao fim da rodada `rodada` (padrão: a última com partidas),
+        com as mesmas colunas de fetch_standings.
+        """
+        r     = self._round_pos(rodada)
+        order = self._positions(r)
+        t     = self.table[:, order, r]
+        form  = self._form(r)
+        df = pd.DataFrame({name: t[i] for i, name in enumerate(STATS)})
+        df.insert(0, "time", self.team_names[order])
+        df.insert(0, "posicao", np.arange(1, len(order) + 1))
+        df["sg"] = df["gm"] - df["gc"]
+        df["ultimas5"] = [form[i] for i in order]
+        return df[STANDINGS_COLUMNS]
+
+    def history(self) -> pd.DataFrame:
+        """Classificação de todas as rodadas: colunas de fetch_standings + `rodada`."""
+        frames = [self.standings_at(r).assign(rodada=int(r)) for r in self.rounds]
+        return pd.concat(frames, ignore_index=True)
+
+
+_ENGINES = {}
+
+
+def fill_scores(index, rodada: int = None, concurrency: int = 8) -> int:
+    """
+    Busca (via detalhes da partida, com cache HTTP) os placares que o
+    cronograma não trouxe, das partidas até `rodada`. Retorna quantos chegaram.
+    """
+    from agents.fetch_matches import fetch_score, store_score
+
+    games = index.games
+    mask  = np.isnan(index.goals()[:, 0])
+    if rodada is not None:
+        mask &= games["rodada"].to_numpy() <= rodada
+    rows = [row for _, row in games[mask].iterrows() if not index.is_known_unplayed(row)]
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as pool:
+        found = list(pool.map(bind(lambda row: fetch_score(index, row)), rows))
+    # placares entram no índice aqui, na thread de quem chamou
+    return sum(store_score(index, row, score) is not None for row, score in zip(rows, found))
+
+
+def local_standings(
+    campeonato_id: int,
+    rodada: int = None,
+    fetch_missing: bool = True,
+    concurrency: int = 8
+) -> pd.DataFrame:
+    """
+    Classificação calculada localmente ao fim de `rodada` (padrão: a atual),
+    no formato de fetch_standings, sem chamar o endpoint de classificação.
+
+    :param fetch_missing: busca antes os placares que faltam no índice
+    """
+    index = get_schedule_index(campeonato_id)
+    if fetch_missing:
+        fill_scores(index, rodada, concurrency)
+    engine = _ENGINES.get(campeonato_id)
+    if engine is None or engine.index is not index:
+        engine = _ENGINES[campeonato_id] = StandingsEngine(index)
+    return engine.sync().standings_at(rodada)
@@ -1,15 +1,23 @@
 # agents/strategy_agent.py
 
 import os
-from dotenv import load_dotenv
-from langchain import OpenAI, LLMChain, PromptTemplate
+import json
+import time
+import hashlib
 from agents.fetch_standings import fetch_standings
+from utils.config import get_setting
+from utils.instrumentation import instrument
 
-load_dotenv()
+# langchain/openai só são importados em get_llm(), no primeiro uso do LLM
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 CAMPEONATO_ID   = 10  # ID fixo do Brasileirão Série A
 
+# ─── Cache persistente de estratégias ────────────────────────────────────────
+# TTL/tamanho vêm de STRATEGY_CACHE_TTL / STRATEGY_CACHE_MB no .env (lidos no primeiro uso)
+STRATEGY_CACHE_DIR = os.path.join("data", "cache", "strategy")
+DEFAULT_CACHE_TTL  = 6 * 60 * 60
+TEMPERATURE        = 0.7
+
 # ─── Prompt template ─────────────────────────────────────────────────────────
 template = """
 Você é um analista tático para Cartola FC.
@@ -29,21 +37,138 @@ Com base nesses dados, elabore:
 2. Justificativas táticas.
 3. Pontos de atenção para as próximas rodadas.
 """
-prompt = PromptTemplate(
-    input_variables=["metrics_summary", "standings", "budget", "formation", "top_n"],
-    template=template
-)
 
-# ─── Configura LLM ───────────────────────────────────────────────────────────
-llm = OpenAI(openai_api_key=OPENAI_API_KEY, temperature=0.7)
-strategy_chain = LLMChain(llm=llm, prompt=prompt)
+
+class LocalStubLLM:
+    """
+    LLM local e determinístico com a mesma interface usada aqui
+    (`invoke` e `stream`). Não acessa rede; `delay` simula a latência
+    por token para benchmarks.
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def _text(self, prompt_text: str) -> str:
+        digest = hashlib.sha1(prompt_text.encode("utf-8")).hexdigest()[:8]
+        return (
+            f"[stub {digest}]\n"
+            "1. Priorize jogadores com maior média recente e bom custo-benefício.\n"
+            "2. Prefira times bem colocados na tabela jogando em casa.\n"
+            "3. Acompanhe lesões, suspensões e variação de preço."
+        )
+
+    def invoke(self, prompt_text: str) -> str:
+        self.calls += 1
+        return self._text(prompt_text)
+
+    def stream(self, prompt_text: str):
+        self.calls += 1
+        for token in self._text(prompt_text).split(" "):
+            if self.delay:
+                time.sleep(self.delay)
+            yield token + " "
+
+
+# ─── Configura LLM (criado no primeiro uso) ─────────────────────────────────
+_llm   = None
+_cache = None
+
+
+def get_llm():
+    global _llm
+    if _llm is None:
+        # STRATEGY_LLM=stub usa o LLM local determinístico (sem rede)
+        if get_setting("STRATEGY_LLM", "openai") == "stub":
+            _llm = LocalStubLLM()
+        else:
+            from langchain import OpenAI
+            _llm = OpenAI(openai_api_key=get_setting("OPENAI_API_KEY"), temperature=TEMPERATURE)
+    return _llm
+
+
+def get_strategy_cache():
+    global _cache
+    if _cache is None:
+        from agents.http_client import ResponseCache
+        max_mb = float(get_setting("STRATEGY_CACHE_MB", "20"))
+        _cache = ResponseCache(STRATEGY_CACHE_DIR, max_bytes=int(max_mb * 2**20))
+    return _cache
+
+
+def _prompt_inputs(metrics_df, budget, formation, top_n, standings_df=None) -> dict:
+    """
+    Entradas do prompt, todas já disponíveis sem rede. Sem `standings_df`,
+    a classificação fica None: a chave usa o campeonato no lugar dela e a
+    tabela só é buscada em cache miss (_with_standings). Uma resposta em
+    cache vale então por `ttl`, mesmo que a tabela mude nesse intervalo.
+    """
+    # 1) Resumo estatístico
+    stats = metrics_df[['avg_points', 'cost_benefit']].describe().to_dict()
+    metrics_summary = f"{stats}"
+
+    # 2) Classificação atual (top N), se já carregada
+    standings = None if standings_df is None else standings_df.head(top_n).to_json(orient="records")
+
+    return {
+        "metrics_summary": metrics_summary,
+        "standings": standings,
+        "campeonato_id": CAMPEONATO_ID,
+        "budget": budget,
+        "formation": formation,
+        "top_n": top_n,
+    }
+
+
+def _with_standings(inputs: dict) -> dict:
+    """Completa as entradas com a classificação da API, se ainda não vierem com ela."""
+    if inputs["standings"] is not None:
+        return inputs
+    standings_df = fetch_standings(inputs["campeonato_id"])
+    return {**inputs, "standings": standings_df.head(inputs["top_n"]).to_json(orient="records")}
 
 
+def strategy_cache_key(inputs: dict, llm) -> str:
+    """Hash canônico das entradas do prompt + identidade do modelo."""
+    model = {
+        "class": type(llm).__name__,
+        "model": getattr(llm, "model_name", None),
+        "temperature": getattr(llm, "temperature", None),
+    }
+    raw = json.dumps({"inputs": inputs, "model": model, "template": template}, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _default_ttl() -> float:
+    return float(get_setting("STRATEGY_CACHE_TTL", str(DEFAULT_CACHE_TTL)))
+
+
+def _cached(key: str, ttl: float):
+    entry = get_strategy_cache().get(key)
+    if entry and (ttl is None or time.time() - entry["fetched_at"] < ttl):
+        return entry["body"]
+    return None
+
+
+def _store(key: str, text: str) -> None:
+    get_strategy_cache().put(key, {"fetched_at": time.time(), "body": text})
+
+
+def _invoke(llm, prompt_text: str) -> str:
+    return llm.invoke(prompt_text) if hasattr(llm, "invoke") else llm(prompt_text)
+
+
+@instrument("generate_strategy")
 def generate_strategy(
     metrics_df,
     budget: float,
     formation: str,
-    top_n: int = 5
+    top_n: int = 5,
+    llm=None,
+    use_cache: bool = True,
+    ttl: float = None,
+    standings_df=None
 ) -> str:
     """
     Retorna uma estratégia textual para montagem do time, combinando:
@@ -51,26 +176,75 @@ def generate_strategy(
      - Classificação atual do campeonato (top N posições).
      - Orçamento e formação desejada.
 
+    Respostas ficam num cache persistente (data/cache/strategy), chaveado
+    pelo hash canônico das entradas do prompt e do modelo. O cache é
+    consultado antes de buscar a classificação: um hit não acessa a API.
+
     :param metrics_df: DataFrame com métricas de jogadores
                        (colunas 'avg_points', 'cost_benefit', etc.)
     :param budget: teto de gastos no Cartola
     :param formation: formação tática, ex: '4-3-3'
     :param top_n: quantas posições de tabela incluir no prompt
+    :param llm: LLM a usar (padrão: get_llm(); ex: LocalStubLLM() offline)
+    :param use_cache: consulta/grava o cache persistente
+    :param ttl: validade (s) das respostas em cache (padrão: STRATEGY_CACHE_TTL do .env, 6h)
+    :param standings_df: classificação já carregada (evita a chamada à API)
     :return: texto com recomendações táticas
     """
-    # 1) Resumo estatístico
-    stats = metrics_df[['avg_points', 'cost_benefit']].describe().to_dict()
-    metrics_summary = f"{stats}"
+    llm    = llm or get_llm()
+    ttl    = _default_ttl() if ttl is None else ttl
+    inputs = _prompt_inputs(metrics_df, budget, formation, top_n, standings_df)
+    key    = strategy_cache_key(inputs, llm)
+
+    if use_cache:
+        text = _cached(key, ttl)
+        if text is not None:
+            return text
+
+    # Executa o LLM (só agora busca a classificação, se preciso)
+    text = _invoke(llm, template.format(**_with_standings(inputs)))
+    if use_cache:
+        _store(key, text)
+    return text
+
+
+@instrument("stream_strategy")
+def stream_strategy(
+    metrics_df,
+    budget: float,
+    formation: str,
+    top_n: int = 5,
+    llm=None,
+    use_cache: bool = True,
+    ttl: float = None,
+    standings_df=None
+):
+    """
+    Como `generate_strategy`, mas devolve um gerador de trechos de texto
+    à medida que o LLM os produz (ex: para `st.write_stream`).
+
+    Em cache hit, entrega o texto completo de uma vez; em miss, grava
+    no cache a resposta completa ao final do streaming.
+    """
+    llm    = llm or get_llm()
+    ttl    = _default_ttl() if ttl is None else ttl
+    inputs = _prompt_inputs(metrics_df, budget, formation, top_n, standings_df)
+    key    = strategy_cache_key(inputs, llm)
+
+    if use_cache:
+        text = _cached(key, ttl)
+        if text is not None:
+            yield text
+            return
 
-    # 2) Classificação atual (top N)
-    standings_df = fetch_standings(CAMPEONATO_ID).head(top_n)
-    standings = standings_df.to_json(orient="records")
-
-    # 3) Executa a cadeia LLM
-    return strategy_chain.run(
-        metrics_summary=metrics_summary,
-        standings=standings,
-        budget=budget,
-        formation=formation,
-        top_n=top_n
-    )
+    prompt_text = template.format(**_with_standings(inputs))
+    if not hasattr(llm, "stream"):
+        chunks = [_invoke(llm, prompt_text)]
+        yield chunks[0]
+    else:
+        chunks = []
+        for chunk in llm.stream(prompt_text):
+            chunks.append(chunk)
+            yield chunk
+    if use_cache:
+        _store(key, "".join(chunks))
@@ -0,0 +1,152 @@
+# agents/substitutes.py
+
+import threading
+import numpy as np
+import pandas as pd
+from agents.load_cartola_csv import SCOUT_COLUMNS
+
+# perfil do jogador: scouts por jogo + pontos por jogo (colunas de compute_player_metrics)
+PROFILE_COLUMNS = [f"{s}_avg" for s in SCOUT_COLUMNS] + ["points_per_game"]
+
+# status do Cartola que impedem a escalação: suspenso, contundido, nulo
+UNAVAILABLE_STATUS = (3, 5, 6)
+STATUS_COLUMN = "atletas.status_id"
+POSITION_COLUMN = "atletas.posicao_id"
+
+# colunas comparadas para saber se um jogador mudou entre duas atualizações
+_CHANGE_COLUMNS = ["price", POSITION_COLUMN, STATUS_COLUMN, "games_played"] + PROFILE_COLUMNS
+
+
+class _PositionBlock:
+    """
+    Jogadores de uma posição ordenados por preço. `vectors` são os perfis
+    padronizados (z-score na posição) e normalizados (norma 1), então a
+    similaridade de cosseno é um produto escalar; os candidatos até um teto
+    de preço formam um prefixo contíguo.
+    """
+
+    def __init__(self, frame: pd.DataFrame):
+        frame = frame.sort_values(["price", "player_id"], kind="stable")
+        self.player_ids = frame["player_id"].to_numpy(dtype=np.int64)
+        self.prices     = frame["price"].to_numpy(dtype="float64")
+        status = frame[STATUS_COLUMN] if STATUS_COLUMN in frame.columns else pd.Series(0, index=frame.index)
+        self.available  = ~status.isin(UNAVAILABLE_STATUS).to_numpy()
+
+        raw = frame.reindex(columns=PROFILE_COLUMNS).fillna(0).to_numpy(dtype="float64")
+        std = raw.std(axis=0)
+        z   = (raw - raw.mean(axis=0)) / np.where(std > 0, std, 1)
+        norm = np.linalg.norm(z, axis=1, keepdims=True)
+        self.vectors = np.ascontiguousarray(z / np.where(norm > 0, norm, 1))
+        self.rows = {int(pid): i for i, pid in enumerate(self.player_ids)}
+
+
+class SubstituteIndex:
+    """
+    Índice de substitutos: para um jogador, os K mais parecidos (perfil de
+    scouts por jogo) da mesma posição, com preço até um teto.
+
+    Construído a partir da saída de compute_player_metrics (ou do store de
+    atletas). `update()` recebe as métricas da rodada nova e refaz só os
+    blocos das posições com algum jogador alterado.
+
+    Seguro entre threads: `update()` monta os blocos novos sob o lock do
+    índice e publica blocos, posições e quadro de uma vez; consultas leem o
+    par (posição, bloco) sob o mesmo lock e calculam sobre o bloco, que não
+    muda depois de pronto.
+    """
+
+    def __init__(self, metrics_df: pd.DataFrame):
+        if POSITION_COLUMN not in metrics_df.columns:
+            raise ValueError(f"Coluna {POSITION_COLUMN!r} ausente nas métricas")
+        self._lock    = threading.Lock()
+        self.blocks   = {}
+        self.position = {}
+        self._frame   = pd.DataFrame()
+        self.update(metrics_df)
+
+    def update(self, metrics_df: pd.DataFrame) -> list:
+        """
+        Incorpora métricas novas. Retorna as posições reconstruídas.
+        """
+        frame = metrics_df.reindex(columns=["player_id"] + _CHANGE_COLUMNS).set_index("player_id")
+        full  = metrics_df.reindex(columns=["player_id"] + _CHANGE_COLUMNS)
+        with self._lock:
+            old   = self._frame.reindex(frame.index)
+            changed = frame.index[~(frame.eq(old) | (frame.isna() & old.isna())).all(axis=1)]
+            removed = self._frame.index.difference(frame.index)
+
+            positions = set(frame.loc[changed, POSITION_COLUMN].dropna().astype(int))
+            positions |= {self.position[int(pid)] for pid in changed.union(removed) if int(pid) in self.position}
+
+            blocks = dict(self.blocks)
+            for pos in sorted(positions):
+                group = full[full[POSITION_COLUMN] == pos]
+                if group.empty:
+                    blocks.pop(pos, None)
+                else:
+                    blocks[pos] = _PositionBlock(group)
+            position = {
+                int(pid): pos for pos, block in blocks.items() for pid in block.player_ids
+            }
+            self.blocks, self.position, self._frame = blocks, position, frame
+        return sorted(positions)
+
+    def substitutes(
+        self,
+        player_id: int,
+        max_price: float = None,
+        k: int = 5,
+        available_only: bool = True
+    ) -> pd.DataFrame:
+        """
+        Os `k` jogadores da mesma posição mais parecidos com `player_id`,
+        com preço ≤ `max_price` (padrão: o preço do próprio jogador).
+
+        :param available_only: ignora suspensos, contundidos e nulos
+        :return: DataFrame com player_id, price e similarity (cosseno), do mais parecido ao menos
+        """
+        with self._lock:
+            pos = self.position.get(int(player_id))
+            if pos is None:
+                raise KeyError(f"Jogador não encontrado no índice: {player_id}")
+            block = self.blocks[pos]
+        row   = block.rows[int(player_id)]
+        ceiling = block.prices[row] if max_price is None else max_price
+
+        end  = int(np.searchsorted(block.prices, ceiling, side="right"))
+        sims = block.vectors[:end] @ block.vectors[row]
+        mask = np.ones(end, dtype=bool)
+        if row < end:
+            mask[row] = False
+        if available_only:
+            mask &= block.available[:end]
+        cand = np.flatnonzero(mask)
+
+        if len(cand) > k:
+            cand = cand[np.argpartition(-sims[cand], k - 1)[:k]]
+        cand = cand[np.argsort(-sims[cand], kind="stable")]
+        return pd.DataFrame({
+            "player_id": block.player_ids[cand],
+            "price": block.prices[cand],
+            "similarity": sims[cand],
+        })
+
+
+_INDEXES = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_substitute_index(metrics_df: pd.DataFrame, key: str = "default") -> SubstituteIndex:
+    """
+    Índice de substitutos reaproveitado entre chamadas com a mesma `key`
+    (ex: pasta dos CSVs): métricas novas só refazem as posições alteradas.
+    Chamado das threads do st.cache_data: criação e atualização ficam sob
+    lock, e cada `key` ganha um único índice.
+    """
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(key)
+        if index is None:
+            index = _INDEXES[key] = SubstituteIndex(metrics_df)
+            return index
+    index.update(metrics_df)
+    return index
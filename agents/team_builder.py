@@ -1,56 +1,247 @@
+import numpy as np
 import pandas as pd
+from utils.instrumentation import instrument
 
-def build_optimal_team(
-    metrics_df: pd.DataFrame,
-    budget: float,
-    formation: dict
-) -> pd.DataFrame:
-    """
-    Monta a escalação ideal respeitando orçamento e formação.
+# posições do Cartola (atletas.posicao_id) → sigla usada nas formações
+POSITION_SIGLAS = {1: "G", 2: "L", 3: "Z", 4: "M", 5: "A", 6: "T"}
+POSITION_ORDER  = ["G", "L", "Z", "M", "A", "T"]
 
-    Mudanças:
-      1. Remove entradas duplicadas de um mesmo jogador, mantendo só
-         a linha de maior cost_benefit.
-      2. Garante coluna 'position' a partir de 'atletas.posicao_id'.
-      3. Seleciona exatamente formation['G'] goleiros, formation['D'] defensores, etc.
+# nº de defensores (D) → laterais + zagueiros, como no Cartola
+DEFENSE_SPLIT = {3: {"L": 0, "Z": 3}, 4: {"L": 2, "Z": 2}, 5: {"L": 2, "Z": 3}}
 
-    :param metrics_df: DataFrame com colunas
-                       ['player_id','price','cost_benefit', …,
-                        'atletas.posicao_id' ou 'position']
-    :param budget: valor máximo disponível
-    :param formation: dict com número de jogadores por posição
-                      ex: {"G":1, "D":4, "M":3, "A":3}
-    :return: DataFrame com os jogadores selecionados (sem repetir player_id)
+
+def expand_formation(formation) -> dict:
     """
-    # 0) Copia o DataFrame
-    df = metrics_df.copy()
+    Converte uma formação para contagens por sigla de posição.
 
-    # 1) Se houver múltiplas linhas por player_id, mantenha a melhor
-    df = (
-        df
-        .sort_values("cost_benefit", ascending=False)
-        .drop_duplicates(subset="player_id", keep="first")
-    )
+    Aceita '4-3-3', {"D":4, "M":3, "A":3} ou contagens explícitas
+    ({"G":1, "L":2, "Z":2, "M":3, "A":3, "T":1}). Goleiro e técnico
+    valem 1 quando não informados; 'D' é dividido em laterais e zagueiros.
+    """
+    if isinstance(formation, str):
+        try:
+            d, m, a = map(int, formation.split("-"))
+        except ValueError:
+            raise ValueError(f"Formação inválida: {formation!r} (use 'D-M-A', ex: '4-3-3')")
+        formation = {"D": d, "M": m, "A": a}
+
+    counts = {"G": 1, "T": 1}
+    for pos, n in formation.items():
+        if pos == "D":
+            if n not in DEFENSE_SPLIT:
+                raise ValueError(f"Nº de defensores inválido: {n} (use 3, 4 ou 5)")
+            counts.update(DEFENSE_SPLIT[n])
+        elif pos in POSITION_ORDER:
+            counts[pos] = int(n)
+        else:
+            raise KeyError(f"Posição desconhecida na formação: {pos}")
+    return {pos: counts.get(pos, 0) for pos in POSITION_ORDER}
 
-    # 2) Garantir coluna 'position'
+
+def _with_position(df: pd.DataFrame) -> pd.DataFrame:
+    # Garantir coluna 'position'
     if 'position' not in df.columns:
         if 'atletas.posicao_id' in df.columns:
-            id_to_sigla = {1: 'G', 2: 'D', 3: 'M', 4: 'A'}
-            df['position'] = df['atletas.posicao_id'].map(id_to_sigla)
+            df['position'] = df['atletas.posicao_id'].map(POSITION_SIGLAS)
         else:
             raise KeyError(
                 "Nenhuma coluna de posição encontrada "
                 "(esperava 'position' ou 'atletas.posicao_id')"
             )
+    return df
+
+
+def _default_objective(df: pd.DataFrame) -> str:
+    for col in ("projected_points", "avg_points", "points"):
+        if col in df.columns:
+            return col
+    raise KeyError("Nenhuma coluna de objetivo encontrada (ex: 'projected_points', 'avg_points')")
+
+
+# ─── Fronteiras de Pareto (custo em centavos × valor) ────────────────────────
+
+def _skyline(costs: np.ndarray, values: np.ndarray, depth: int = 1) -> np.ndarray:
+    """
+    Índices dos pontos nas `depth` primeiras camadas de Pareto
+    (menor custo, maior valor). Com depth=K preserva o top-K de qualquer orçamento.
+    """
+    order = np.lexsort((-values, costs))
+    kept, rest = [], order
+    for _ in range(depth):
+        if rest.size == 0:
+            break
+        v = values[rest]
+        best_before = np.maximum.accumulate(np.concatenate(([-np.inf], v[:-1])))
+        on_layer = v > best_before
+        kept.append(rest[on_layer])
+        rest = rest[~on_layer]
+    return np.concatenate(kept) if kept else order[:0]
+
+
+def _position_frontier(costs, values, k, budget, depth):
+    """
+    Todas as combinações não dominadas de exatamente `k` candidatos de uma posição.
+
+    Knapsack com cardinalidade: percorre os candidatos mantendo, para cada
+    j ≤ k, a fronteira das combinações de j jogadores. Retorna (custos, valores, combos).
+    """
+    empty = np.empty((0, 0), dtype=np.int64)
+    if k == 0:
+        return np.zeros(1, dtype=np.int64), np.zeros(1), np.empty((1, 0), dtype=np.int64)
+    if costs.size < k:
+        return np.empty(0, dtype=np.int64), np.empty(0), empty
+
+    level_c = [np.zeros(1, dtype=np.int64)] + [np.empty(0, dtype=np.int64)] * k
+    level_v = [np.zeros(1)] + [np.empty(0)] * k
+    level_x = [np.empty((1, 0), dtype=np.int64)] + [np.empty((0, j), dtype=np.int64) for j in range(1, k + 1)]
+
+    for i in range(costs.size):
+        for j in range(min(i + 1, k), 0, -1):
+            if level_c[j - 1].size == 0:
+                continue
+            c = np.concatenate((level_c[j], level_c[j - 1] + costs[i]))
+            v = np.concatenate((level_v[j], level_v[j - 1] + values[i]))
+            x = np.concatenate((
+                level_x[j],
+                np.hstack((level_x[j - 1], np.full((level_x[j - 1].shape[0], 1), i))),
+            ))
+            fits = c <= budget
+            c, v, x = c[fits], v[fits], x[fits]
+            keep = _skyline(c, v, depth)
+            level_c[j], level_v[j], level_x[j] = c[keep], v[keep], x[keep]
+
+    return level_c[k], level_v[k], level_x[k]
+
+
+MERGE_CHUNK = 1 << 16   # pares (a, b) avaliados por bloco em _merge_frontiers
+
+
+def _merge_frontiers(a, b, budget, depth):
+    """
+    Combina duas fronteiras (soma de custos e valores) e refaz o skyline.
+
+    Nunca monta o produto externo inteiro: `b` é ordenada por custo e os
+    pontos de `a` são processados em blocos de até MERGE_CHUNK pares; cada
+    bloco só olha o prefixo de `b` que cabe no orçamento e já é reduzido ao
+    seu skyline. O skyline da união é o skyline da união dos skylines dos
+    blocos, então o resultado é o mesmo; a memória fica limitada ao bloco.
+    """
+    ca, va, xa = a
+    cb, vb, xb = b
+    if ca.size == 0 or cb.size == 0:
+        return ca[:0], va[:0], np.empty((0, xa.shape[1] + xb.shape[1]), dtype=np.int64)
+
+    # cada lado só precisa do que cabe junto com o mais barato do outro
+    fa = np.flatnonzero(ca <= budget - cb.min())
+    ob = np.argsort(cb, kind="stable")
+    ob = ob[cb[ob] <= budget - ca.min()]
+    cb_sorted = cb[ob]
+
+    parts_c, parts_v, parts_a, parts_b = [], [], [], []
+    rows = max(1, MERGE_CHUNK // max(ob.size, 1))
+    for start in range(0, fa.size, rows):
+        ia = fa[start:start + rows]
+        width = int(np.searchsorted(cb_sorted, budget - ca[ia].min(), side="right"))
+        if width == 0:
+            continue
+        cost = ca[ia, None] + cb_sorted[None, :width]
+        ra, rb = np.nonzero(cost <= budget)
+        c = cost[ra, rb]
+        v = va[ia[ra]] + vb[ob[rb]]
+        keep = _skyline(c, v, depth)
+        parts_c.append(c[keep])
+        parts_v.append(v[keep])
+        parts_a.append(ia[ra[keep]])
+        parts_b.append(ob[rb[keep]])
+
+    if not parts_c:
+        return ca[:0], va[:0], np.empty((0, xa.shape[1] + xb.shape[1]), dtype=np.int64)
+    c, v = np.concatenate(parts_c), np.concatenate(parts_v)
+    ia, ib = np.concatenate(parts_a), np.concatenate(parts_b)
+    keep = _skyline(c, v, depth)
+    ia, ib = ia[keep], ib[keep]
+    return c[keep], v[keep], np.hstack((xa[ia], xb[ib]))
+
+
+def _prune_candidates(costs, values, k, depth):
+    """
+    Descarta jogadores que não podem aparecer no top-`depth`: quem está além das
+    k + depth - 1 primeiras camadas de Pareto da posição tem sempre um substituto
+    mais barato e melhor fora do time.
+    """
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    return np.sort(_skyline(costs, values, k + depth - 1))
+
+
+def _candidate_tables(df: pd.DataFrame, objective: str, counts: dict) -> dict:
+    """Tabelas por posição: índices no df, custos (centavos) e valores do objetivo."""
+    tables = {}
+    cents  = np.round(df["price"].to_numpy(dtype=float) * 100).astype(np.int64)
+    values = df[objective].to_numpy(dtype=float)
+    pos    = df["position"].to_numpy()
+    valid  = ~np.isnan(values) & (cents >= 0)
+    for p, k in counts.items():
+        idx = np.flatnonzero((pos == p) & valid)
+        tables[p] = (idx, cents[idx], values[idx])
+    return tables
+
+
+def _solve_frontier(tables: dict, counts: dict, budget_cents: int, depth: int = 1):
+    """
+    Fronteira das escalações completas até `budget_cents`.
+
+    Retorna (custos, valores, jogadores) onde jogadores é uma matriz com
+    os índices (no df) dos atletas de cada escalação.
+    """
+    # teto de cada posição: o orçamento menos o mínimo que as outras custam
+    min_cost = {
+        p: int(np.sort(tables[p][1])[:k].sum()) if tables[p][1].size >= k else 0
+        for p, k in counts.items()
+    }
+    floor = sum(min_cost.values())
+
+    fronts = []
+    for p, k in counts.items():
+        idx, c, v = tables[p]
+        cap  = budget_cents - (floor - min_cost[p])
+        keep = _prune_candidates(c, v, k, depth)
+        keep = keep[c[keep] <= cap]
+        pc, pv, px = _position_frontier(c[keep], v[keep], k, cap, depth)
+        if k and pc.size == 0:
+            raise RuntimeError(
+                f"Não há escalação viável: faltam jogadores na posição {p} "
+                f"para o orçamento informado"
+            )
+        fronts.append((pc, pv, idx[keep][px]))
+
+    # combina das fronteiras menores para as maiores
+    fronts.sort(key=lambda f: f[0].size)
+    acc = fronts[0]
+    for f in fronts[1:]:
+        acc = _merge_frontiers(acc, f, budget_cents, depth)
+        if acc[0].size == 0:
+            raise RuntimeError("Não há escalação viável dentro do orçamento informado")
+    return acc
+
+
+def _build_exact_team(df: pd.DataFrame, budget: float, counts: dict, objective: str) -> pd.DataFrame:
+    budget_cents = int(np.floor(budget * 100 + 1e-6))
+    tables = _candidate_tables(df, objective, counts)
+    costs, values, players = _solve_frontier(tables, counts, budget_cents)
+    best = players[np.argmax(values)]
+    return _order_team(df.iloc[best])
 
-    # 3) Ordena por cost_benefit já foi feito no dedupe, mas útil reforçar para seleção
+
+def _build_greedy_team(df: pd.DataFrame, budget: float, counts: dict) -> pd.DataFrame:
+    # Ordena por cost_benefit para a seleção gulosa
     sorted_df = df.sort_values("cost_benefit", ascending=False)
 
     team = []
     remaining_budget = budget
 
-    # 4) Seleciona por posição conforme formação
-    for pos, count in formation.items():
+    # Seleciona por posição conforme formação
+    for pos, count in counts.items():
         # filtra candidatos daquela posição
         candidates = sorted_df[sorted_df["position"] == pos]
         # escolhe os 'count' primeiros que cabem no orçamento
@@ -63,6 +254,148 @@ def build_optimal_team(
                 remaining_budget -= player["price"]
         team.append(pd.DataFrame(picked))
 
-    # 5) Concatena e retorna
-    result = pd.concat(team, ignore_index=True)
-    return result
+    # Concatena e retorna
+    return pd.concat(team, ignore_index=True)
+
+
+def _order_team(team: pd.DataFrame) -> pd.DataFrame:
+    rank = team["position"].map({p: i for i, p in enumerate(POSITION_ORDER)})
+    return team.assign(_rank=rank).sort_values(["_rank", "price"], ascending=[True, False]) \
+        .drop(columns="_rank").reset_index(drop=True)
+
+
+def prepare_market(metrics_df: pd.DataFrame, sort_col: str = "cost_benefit") -> pd.DataFrame:
+    """
+    Uma linha por jogador (a de maior `sort_col`) com a coluna 'position' garantida.
+    """
+    df = (
+        metrics_df
+        .sort_values(sort_col, ascending=False)
+        .drop_duplicates(subset="player_id", keep="first")
+        .reset_index(drop=True)
+    )
+    return _with_position(df)
+
+
+@instrument("build_optimal_team")
+def build_optimal_team(
+    metrics_df: pd.DataFrame,
+    budget: float,
+    formation,
+    method: str = "exact",
+    objective: str = None
+) -> pd.DataFrame:
+    """
+    Monta a escalação ideal respeitando orçamento e formação.
+
+    Modos:
+      * "exact" (padrão): knapsack com restrição de posições resolvido por
+        fronteiras de Pareto (custo em centavos × objetivo). Cobre todas as
+        posições, inclusive técnico, e devolve a escalação de maior soma de
+        `objective` que cabe no orçamento — ótima, não heurística.
+      * "greedy": seleção gulosa por cost_benefit, posição a posição.
+        Mais simples e rápida, mas pode gastar o orçamento cedo e
+        não completar a formação.
+
+    :param metrics_df: DataFrame com colunas
+                       ['player_id','price','cost_benefit', …,
+                        'atletas.posicao_id' ou 'position']
+    :param budget: valor máximo disponível
+    :param formation: '4-3-3', dict D-M-A ({"D":4, "M":3, "A":3}) ou
+                      contagens por sigla (G, L, Z, M, A, T)
+    :param method: "exact" ou "greedy"
+    :param objective: coluna a maximizar no modo exato
+                      (padrão: projected_points, senão avg_points)
+    :return: DataFrame com os jogadores selecionados (sem repetir player_id)
+    """
+    counts = expand_formation(formation)
+
+    if method == "greedy":
+        df = prepare_market(metrics_df, "cost_benefit")
+        return _build_greedy_team(df, budget, counts)
+    if method != "exact":
+        raise ValueError(f"Método desconhecido: {method!r} (use 'exact' ou 'greedy')")
+
+    objective = objective or _default_objective(metrics_df)
+    df = prepare_market(metrics_df, objective)
+    return _build_exact_team(df, budget, counts, objective)
+
+
+# ─── Lote: vários orçamentos × formações, top-K ──────────────────────────────
+
+LEGAL_FORMATIONS = ["3-4-3", "3-5-2", "4-3-3", "4-4-2", "4-5-1", "5-3-2", "5-4-1"]
+
+
+def _formation_rows(tables, formation, budgets_cents, k):
+    """Top-k de cada orçamento para uma formação, a partir de uma única fronteira."""
+    counts = expand_formation(formation)
+    try:
+        costs, values, players = _solve_frontier(tables, counts, int(budgets_cents.max()), depth=k)
+    except RuntimeError:
+        return []
+
+    # ordena a fronteira por custo: cada orçamento vira um prefixo
+    order = np.argsort(costs, kind="stable")
+    costs, values, players = costs[order], values[order], players[order]
+    ends = np.searchsorted(costs, budgets_cents, side="right")
+
+    rows = []
+    for b, end in zip(budgets_cents, ends):
+        if end == 0:
+            continue
+        n   = min(k, end)
+        top = np.argpartition(-values[:end], n - 1)[:n] if end > n else np.arange(end)
+        top = top[np.lexsort((costs[top], -values[top]))]
+        for rank, i in enumerate(top, start=1):
+            rows.append((b / 100, formation, rank, values[i], costs[i] / 100, players[i]))
+    return rows
+
+
+def build_lineups_batch(
+    metrics_df: pd.DataFrame,
+    budgets,
+    formations: list = None,
+    k: int = 1,
+    objective: str = None,
+    workers: int = None
+) -> pd.DataFrame:
+    """
+    Melhores escalações para vários orçamentos e formações de uma vez.
+
+    As tabelas de candidatos por posição são montadas uma única vez; para cada
+    formação calcula-se uma só fronteira (até o maior orçamento, guardando as
+    k primeiras camadas de Pareto) e cada orçamento é respondido por um
+    prefixo dela — orçamentos vizinhos reaproveitam todo o trabalho.
+
+    :param metrics_df: DataFrame de métricas (como em build_optimal_team)
+    :param budgets: lista/array de orçamentos, ex: np.arange(80, 200.5, 0.5)
+    :param formations: formações 'D-M-A' (padrão: todas as LEGAL_FORMATIONS)
+    :param k: quantas escalações distintas por (orçamento, formação)
+    :param objective: coluna a maximizar (padrão: projected_points, senão avg_points)
+    :param workers: se > 1, distribui as formações num pool de processos
+    :return: DataFrame tidy com colunas
+             ['budget','formation','rank','objective','cost','lineup'],
+             onde 'lineup' é a tupla de player_id da escalação
+    """
+    formations = formations or LEGAL_FORMATIONS
+    objective  = objective or _default_objective(metrics_df)
+    df = prepare_market(metrics_df, objective)
+
+    budgets_cents = np.unique(np.floor(np.asarray(budgets, dtype=float) * 100 + 1e-6).astype(np.int64))
+    all_counts = {p: max(expand_formation(f)[p] for f in formations) for p in POSITION_ORDER}
+    tables = _candidate_tables(df, objective, all_counts)
+
+    if workers and workers > 1 and len(formations) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        n = len(formations)
+        with ProcessPoolExecutor(max_workers=min(workers, n)) as pool:
+            parts = list(pool.map(_formation_rows, [tables] * n, formations, [budgets_cents] * n, [k] * n))
+    else:
+        parts = [_formation_rows(tables, f, budgets_cents, k) for f in formations]
+
+    ids  = df["player_id"].to_numpy()
+    rows = [
+        (b, f, r, v, c, tuple(ids[np.sort(p)].tolist()))
+        for part in parts for (b, f, r, v, c, p) in part
+    ]
+    return pd.DataFrame(rows, columns=["budget", "formation", "rank", "objective", "cost", "lineup"])
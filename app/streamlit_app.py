@@ -1,14 +1,11 @@
 import streamlit as st
-from dotenv import load_dotenv
+from utils.config import load_config
 import os
 
-from agents.fetch_data import fetch_raw_data
-from agents.analyze_data import compute_player_metrics
-from agents.strategy_agent import generate_strategy
-from agents.team_builder import build_optimal_team
+from utils import pipeline_cache as pc
 from utils.helpers import save_df
 
-load_dotenv()
+load_config()
 
 def main():
     st.title("SENSAI2 – Análise Cartola FC")
@@ -16,28 +13,30 @@ def main():
     # Parâmetros da rodada
     budget = st.number_input("Orçamento", value=100.0)
     formation_input = st.text_input("Formação (ex: 4-3-3)", value="4-3-3")
-    formation = dict(zip(["G","D","M","A"], map(int, formation_input.split("-"))))
 
-    # 1. Ingestão
-    raw_df = fetch_raw_data("/v1/players", params={"round": 1})
+    pc.refresh_button()
+
+    # 1. Ingestão (cacheada por endpoint + params)
+    source = pc.api_source("/v1/players", params={"round": 1})
+    raw_df = pc.source_frame(source)
     st.write("Dados brutos:", raw_df.head())
 
     # 2. Análise
-    metrics_df = compute_player_metrics(raw_df)
+    metrics_df = pc.player_metrics(source)
     st.write("Métricas:", metrics_df.head())
 
     # 3. Estratégia
-    strategy = generate_strategy(metrics_df, budget, formation_input)
+    strategy = pc.strategy(source, budget, formation_input)
     st.markdown("**Estratégia:**\n\n" + strategy)
 
     # 4. Escalação
-    team_df = build_optimal_team(metrics_df, budget, formation)
+    team_df = pc.optimal_team(source, budget, formation_input)
     st.write("Escalação sugerida:", team_df)
 
     # 5. Salvar resultados
     if st.button("Salvar Métricas"):
-        save_df(metrics_df, "players", "metrics.csv")
-        st.success("Métricas salvas em data/processed/players/metrics.csv")
+        path = save_df(metrics_df, "players", "metrics.parquet")
+        st.success(f"Métricas salvas em {path}")
 
 if __name__ == "__main__":
-    main()
+    pc.run_instrumented(main)
@@ -0,0 +1,155 @@
+# benchmarks/import_time.py
+#
+# Mede o tempo de cold start (import) dos módulos do sensai2 com
+# `python -X importtime` e falha quando algum passa do orçamento.
+#
+# O orçamento vale para o tempo *próprio* do módulo: a soma do self time de
+# tudo o que ele importa e que a linha de base (por padrão `import numpy,
+# pandas`, medida num processo à parte) não importa. Assim os ~450 ms do
+# pandas não entram na conta e uma regressão na cadeia de imports do
+# próprio repositório (ou uma dependência nova carregada cedo) aparece.
+#
+#   python -m benchmarks.import_time                 # usa benchmarks/import_budget.json
+#   python -m benchmarks.import_time --scale 1.5     # orçamento 50% mais folgado
+#   python -m benchmarks.import_time --json out.json
+
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT        = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BUDGET_FILE = os.path.join(os.path.dirname(__file__), "import_budget.json")
+BASELINE    = ["numpy", "pandas"]
+
+# pacotes do repositório: um import que falha dentro deles é erro, não dependência ausente
+REPO_PACKAGES = ("agents", "utils", "benchmarks", "app", "streamlit_app")
+MISSING_RE    = re.compile(r"ModuleNotFoundError: No module named '([^']+)'")
+
+
+class MissingDependency(RuntimeError):
+    """O módulo importa um pacote que não está instalado neste ambiente."""
+
+
+def import_profile(module: str, runs: int = 3) -> dict:
+    """
+    Importa `module` (ou vários, separados por vírgula) num processo novo
+    com -X importtime (melhor de `runs`).
+
+    :return: {"module", "total_ms", "self_ms": {modulo: ms}, "imported": [módulos]}
+    """
+    best = None
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=ROOT, capture_output=True, text=True,
+            env=dict(os.environ, PYTHONPATH=ROOT),
+        )
+        if proc.returncode != 0:
+            missing = MISSING_RE.search(proc.stderr)
+            if missing and missing.group(1).split(".")[0] not in REPO_PACKAGES:
+                raise MissingDependency(missing.group(1))
+            raise RuntimeError(f"Falha ao importar {module}:\n{proc.stderr[-2000:]}")
+
+        self_us, cumulative = {}, {}
+        for line in proc.stderr.splitlines():
+            # formato: "import time:   self [us] | cumulative | imported package"
+            if not line.startswith("import time:") or "[us]" in line:
+                continue
+            fields = line[len("import time:"):].split("|")
+            if len(fields) != 3:
+                continue
+            name = fields[2].strip()
+            self_us[name]    = int(fields[0])
+            cumulative[name] = int(fields[1])
+
+        total_ms = sum(self_us.values()) / 1000
+        if best is None or total_ms < best["total_ms"]:
+            best = {
+                "module": module,
+                "total_ms": total_ms,
+                "self_ms": {k: v / 1000 for k, v in self_us.items()},
+                "imported": sorted(self_us),
+            }
+    return best
+
+
+def own_ms(prof: dict, baseline: dict) -> float:
+    """Self time (ms) dos módulos importados por `prof` que a linha de base não importa."""
+    skip = set(baseline["imported"])
+    return sum(ms for name, ms in prof["self_ms"].items() if name not in skip)
+
+
+def check(budget: dict, scale: float = 1.0, runs: int = 3) -> list:
+    """
+    Compara cada módulo com o orçamento.
+
+    `budget` = {"baseline": [módulos], "modules": {módulo: {"max_ms", "forbidden",
+    "baseline"?}}}. Um módulo viola o orçamento se o tempo próprio (acima da
+    linha de base) passar de max_ms * scale ou se importar algum pacote
+    proibido (ex: langchain ao importar só o loader de CSV). Módulos que
+    dependem de pacotes não instalados aqui (ex: streamlit) são pulados.
+    """
+    default_base = budget.get("baseline", BASELINE)
+    baselines, results = {}, []
+    for module, rule in budget["modules"].items():
+        base_mods = tuple(rule.get("baseline", default_base))
+        limit = rule["max_ms"] * scale
+        try:
+            if base_mods not in baselines:
+                baselines[base_mods] = import_profile(", ".join(base_mods), runs)
+            prof = import_profile(module, runs)
+        except MissingDependency as exc:
+            results.append({
+                "module": module, "own_ms": None, "total_ms": None, "max_ms": round(limit, 1),
+                "forbidden_imported": [], "skipped": f"{exc} não instalado", "ok": True,
+            })
+            continue
+        forbidden = [
+            name for name in prof["imported"]
+            if any(name == p or name.startswith(p + ".") for p in rule.get("forbidden", []))
+        ]
+        own = own_ms(prof, baselines[base_mods])
+        results.append({
+            "module": module,
+            "own_ms": round(own, 1),
+            "total_ms": round(prof["total_ms"], 1),
+            "max_ms": round(limit, 1),
+            "forbidden_imported": forbidden,
+            "ok": own <= limit and not forbidden,
+        })
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de cold start por import.")
+    parser.add_argument("--budget", default=BUDGET_FILE, help="JSON com o orçamento por módulo")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplica todos os max_ms (tempo acima da linha de base)")
+    parser.add_argument("--runs", type=int, default=3, help="repetições (vale a melhor)")
+    parser.add_argument("--json", help="grava os resultados neste arquivo")
+    args = parser.parse_args(argv)
+
+    with open(args.budget, encoding="utf-8") as f:
+        budget = json.load(f)
+
+    results = check(budget, args.scale, args.runs)
+    for r in results:
+        if r.get("skipped"):
+            print(f"skip {r['module']:<28} {'-':>8}     ({r['skipped']})")
+            continue
+        status = "ok  " if r["ok"] else "FAIL"
+        extra  = f"  proibidos: {', '.join(r['forbidden_imported'])}" if r["forbidden_imported"] else ""
+        print(f"{status} {r['module']:<28} {r['own_ms']:>8.1f} ms  (máx {r['max_ms']:.1f}; "
+              f"total {r['total_ms']:.0f} ms){extra}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    return 0 if all(r["ok"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
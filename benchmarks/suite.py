@@ -0,0 +1,185 @@
+# benchmarks/suite.py
+#
+# Suíte de desempenho do pipeline sobre dados sintéticos (benchmarks/synthetic.py):
+# carga dos CSVs, métricas, escalação e achatamento do cronograma de partidas.
+# Os resultados saem em JSON e podem ser comparados com uma execução anterior.
+#
+#   python -m benchmarks.suite --json bench.json
+#   python -m benchmarks.suite --rounds 38 --athletes 2000 --seasons 3
+#   python -m benchmarks.suite --compare bench.json --tolerance 0.25   # falha em regressão
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import statistics
+
+import numpy as np
+import pandas as pd
+
+from agents.load_cartola_csv import fetch_all_cartola_csvs, clear_cache
+from agents.analyze_data import compute_player_metrics
+from agents.team_builder import build_optimal_team
+from agents.schedule_index import ScheduleIndex
+from benchmarks.synthetic import generate_dataset, synthetic_schedule
+
+
+def timed(fn, repeat: int = 5, warmup: int = 1) -> dict:
+    """Executa `fn` `warmup + repeat` vezes; devolve min/mediana/máx (ms) das medidas."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "min_ms": round(min(samples), 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "max_ms": round(max(samples), 3),
+        "repeat": repeat,
+    }
+
+
+def _cases(dirs: list, rounds: int) -> dict:
+    """Casos da suíte: {nome: função sem argumentos}."""
+    frames  = [fetch_all_cartola_csvs(d, use_cache=False) for d in dirs]
+    metrics = [compute_player_metrics(df) for df in frames]
+    raw     = synthetic_schedule(rounds)
+
+    def load_cold():
+        for d in dirs:
+            clear_cache(d)
+            fetch_all_cartola_csvs(d, workers=1)
+
+    def load_cached():
+        for d in dirs:
+            fetch_all_cartola_csvs(d)
+
+    def load_fast():
+        for d in dirs:
+            fetch_all_cartola_csvs(d, use_cache=False, fast=True, workers=1)
+
+    def flatten_schedule():
+        index = ScheduleIndex(campeonato_id=0).refresh(raw)
+        for team_id in list(index.team_names().values())[:5]:
+            index.team_games(team_id)
+
+    return {
+        "load_csv_cold":     load_cold,
+        "load_csv_cached":   load_cached,
+        "load_csv_fast":     load_fast,
+        "player_metrics":    lambda: [compute_player_metrics(df) for df in frames],
+        "team_exact_433":    lambda: [build_optimal_team(m, 140.0, "4-3-3") for m in metrics],
+        "team_greedy_433":   lambda: [build_optimal_team(m, 140.0, "4-3-3", method="greedy") for m in metrics],
+        "schedule_flatten":  flatten_schedule,
+    }
+
+
+def run_suite(
+    rounds: int = 38,
+    athletes: int = 700,
+    seasons: int = 1,
+    repeat: int = 5,
+    only: list = None,
+    data_dir: str = None,
+    seed: int = 0
+) -> dict:
+    """
+    Gera o conjunto sintético (numa pasta temporária, se `data_dir` for None),
+    roda os casos e devolve o relatório (ambiente, escala e tempos por caso).
+    """
+    tmp  = data_dir is None
+    root = tempfile.mkdtemp(prefix="cartola_bench_") if tmp else data_dir
+    dirs = []
+    try:
+        dirs += generate_dataset(root, seasons, rounds, athletes, seed)
+        cases = _cases(dirs, rounds)
+        results = {
+            name: timed(fn, repeat)
+            for name, fn in cases.items() if not only or name in only
+        }
+    finally:
+        for d in dirs:
+            clear_cache(d)
+        if tmp:
+            shutil.rmtree(root, ignore_errors=True)
+
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "scale": {"rounds": rounds, "athletes": athletes, "seasons": seasons, "seed": seed},
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.2) -> list:
+    """
+    Compara as medianas com um relatório anterior.
+
+    Um caso regride se a mediana atual passar de baseline × (1 + tolerance).
+    Casos ausentes de um dos lados são ignorados.
+    """
+    rows = []
+    for name, res in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        ratio = res["median_ms"] / base["median_ms"] if base["median_ms"] else float("inf")
+        rows.append({
+            "case": name,
+            "baseline_ms": base["median_ms"],
+            "current_ms": res["median_ms"],
+            "ratio": round(ratio, 3),
+            "regression": ratio > 1 + tolerance,
+        })
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Suíte de benchmarks do pipeline Cartola.")
+    parser.add_argument("--rounds", type=int, default=38)
+    parser.add_argument("--athletes", type=int, default=700)
+    parser.add_argument("--seasons", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5, help="medidas por caso (após 1 aquecimento)")
+    parser.add_argument("--only", nargs="*", help="roda só estes casos")
+    parser.add_argument("--data-dir", help="pasta para o conjunto sintético (padrão: temporária)")
+    parser.add_argument("--json", help="grava o relatório neste arquivo")
+    parser.add_argument("--compare", help="relatório anterior para comparar")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="folga relativa antes de acusar regressão")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.rounds, args.athletes, args.seasons, args.repeat, args.only, args.data_dir)
+    for name, res in report["results"].items():
+        print(f"{name:<20} {res['median_ms']:>10.1f} ms  (min {res['min_ms']:.1f}, máx {res['max_ms']:.1f})")
+
+    status_code = 0
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        report["comparison"] = compare(report, baseline, args.tolerance)
+        print()
+        if baseline.get("scale") != report["scale"]:
+            print(f"aviso: escala diferente da base ({baseline.get('scale')} × {report['scale']})")
+        for r in report["comparison"]:
+            status = "REGR" if r["regression"] else "ok  "
+            print(f"{status} {r['case']:<20} {r['baseline_ms']:>10.1f} → {r['current_ms']:>10.1f} ms  (x{r['ratio']:.2f})")
+        status_code = 1 if any(r["regression"] for r in report["comparison"]) else 0
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return status_code
+
+if __name__ == "__main__":
+    sys.exit(main())
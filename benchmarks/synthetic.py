@@ -0,0 +1,206 @@
+# benchmarks/synthetic.py
+#
+# Gera temporadas sintéticas no formato dos CSVs de rodada do Cartola
+# (mesmas colunas de data/raw/cartola/rodadas) e cronogramas no formato
+# do endpoint campeonatos/{id}/partidas, em qualquer escala.
+#
+#   python -m benchmarks.synthetic data/synthetic --seasons 3 --rounds 38 --athletes 800
+
+import os
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+
+from agents.load_cartola_csv import SCOUT_COLUMNS
+from agents.projection import SCOUT_POINTS
+
+# ordem das colunas de um CSV real (rodada-8.csv)
+BASE_COLUMNS = [
+    "atletas.status_id", "atletas.pontos_num", "atletas.atleta_id", "atletas.variacao_num",
+    "atletas.foto", "atletas.apelido", "atletas.posicao_id", "atletas.jogos_num",
+    "atletas.clube.id.full.name", "atletas.nome", "atletas.preco_num",
+    "atletas.minimo_para_valorizar", "atletas.entrou_em_campo", "atletas.media_num",
+    "atletas.slug", "atletas.apelido_abreviado", "atletas.clube_id", "atletas.rodada_id",
+]
+
+CLUB_SIGLAS = [
+    "BAH", "BOT", "CAM", "CEA", "COR", "CRU", "FLA", "FLU", "FOR", "GRE",
+    "INT", "JUV", "MIR", "PAL", "RBB", "SAN", "SAO", "SPT", "VAS", "VIT",
+]
+
+# proporção de atletas por posição (G, L, Z, M, A) no mercado real; técnicos: 1 por clube
+POSITION_SHARE = {1: 0.10, 2: 0.16, 3: 0.17, 4: 0.31, 5: 0.26}
+
+# taxa média por jogo de cada scout, por posição (o que não aparece vale ~0)
+SCOUT_RATES = {
+    1: {"DE": 2.5, "DP": 0.05, "GS": 1.1, "SG": 0.3, "CA": 0.05, "FC": 0.1},
+    2: {"DS": 1.5, "FC": 1.0, "FS": 0.8, "A": 0.12, "FF": 0.4, "FD": 0.2, "SG": 0.3, "CA": 0.2, "I": 0.05},
+    3: {"DS": 1.2, "FC": 1.0, "FS": 0.4, "G": 0.05, "FF": 0.2, "SG": 0.3, "CA": 0.25, "GC": 0.02},
+    4: {"DS": 1.6, "FC": 1.2, "FS": 1.1, "A": 0.15, "G": 0.1, "FF": 0.6, "FD": 0.3, "FT": 0.03, "CA": 0.2, "PC": 0.05},
+    5: {"G": 0.35, "A": 0.15, "FF": 0.9, "FD": 0.6, "FT": 0.08, "FS": 1.5, "FC": 0.8, "I": 0.4, "PP": 0.02, "CA": 0.1},
+    6: {"V": 0.4},
+}
+PLAY_PROB = {1: 0.35, 2: 0.5, 3: 0.5, 4: 0.5, 5: 0.45, 6: 1.0}
+
+
+def _market(rng, athletes: int, clubs: int, first_id: int) -> pd.DataFrame:
+    """Atletas fixos da temporada: id, clube, posição, preço inicial e qualidade."""
+    positions = rng.choice(list(POSITION_SHARE), size=athletes, p=list(POSITION_SHARE.values()))
+    club_idx  = rng.integers(0, clubs, size=athletes)
+    # um técnico por clube
+    positions = np.concatenate((positions, np.full(clubs, 6)))
+    club_idx  = np.concatenate((club_idx, np.arange(clubs)))
+    n    = len(positions)
+    ids  = first_id + rng.permutation(n * 4)[:n]
+    names = [f"Atleta {i}" for i in ids]
+    siglas = np.array((CLUB_SIGLAS * (clubs // len(CLUB_SIGLAS) + 1))[:clubs])
+    return pd.DataFrame({
+        "atleta_id": ids,
+        "posicao_id": positions,
+        "club": club_idx,
+        "sigla": siglas[club_idx],
+        "clube_id": 260 + club_idx,
+        "nome": names,
+        "quality": rng.gamma(2.0, 0.5, size=n),
+        "price": np.round(rng.lognormal(1.5, 0.55, size=n).clip(0.8, 25), 2),
+    })
+
+
+def generate_season(
+    out_dir: str,
+    rounds: int = 38,
+    athletes: int = 700,
+    clubs: int = 20,
+    seed: int = 0,
+    first_id: int = 30_000
+) -> list:
+    """
+    Escreve `rounds` arquivos rodada_{r}.csv em `out_dir`, com as colunas
+    dos CSVs reais: scouts acumulados na temporada (vazios quando zero),
+    pontos da rodada coerentes com os scouts, preço/variação/média evoluindo.
+
+    :return: lista dos arquivos gerados
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    rng    = np.random.default_rng(seed)
+    market = _market(rng, athletes, clubs, first_id)
+    n      = len(market)
+
+    rates = np.zeros((n, len(SCOUT_COLUMNS)))
+    for pos, table in SCOUT_RATES.items():
+        rows = (market["posicao_id"] == pos).to_numpy()
+        for s, rate in table.items():
+            rates[rows, SCOUT_COLUMNS.index(s)] = rate
+    rates *= market["quality"].to_numpy()[:, None]
+    weights   = np.array([SCOUT_POINTS.get(s, 0.0) for s in SCOUT_COLUMNS])
+    play_prob = market["posicao_id"].map(PLAY_PROB).to_numpy() * np.clip(market["quality"].to_numpy(), 0.3, 1.5) / 1.5
+
+    cum_scouts = np.zeros_like(rates)
+    games      = np.zeros(n, dtype=int)
+    total_pts  = np.zeros(n)
+    price      = market["price"].to_numpy().copy()
+    fotos = "https://s3.glbimg.com/v1/clubes/silhuetas/" + market["sigla"] + "/FORMATO.png"
+    slugs = market["nome"].str.lower().str.replace(" ", "-")
+
+    files = []
+    for r in range(1, rounds + 1):
+        played = rng.random(n) < play_prob
+        events = rng.poisson(rates) * played[:, None]
+        points = np.round(events @ weights, 2)
+        cum_scouts += events
+        games      += played
+        total_pts  += points
+        media       = np.round(np.where(games > 0, total_pts / np.maximum(games, 1), 0), 2)
+        variation   = np.round(np.where(played, 0.15 * (points - media), 0), 2)
+        price       = np.round(np.maximum(price + variation, 0.8), 2)
+
+        df = pd.DataFrame({
+            "atletas.status_id":            rng.choice([2, 3, 5, 6, 7], size=n, p=[0.01, 0.01, 0.08, 0.55, 0.35]),
+            "atletas.pontos_num":           points,
+            "atletas.atleta_id":            market["atleta_id"],
+            "atletas.variacao_num":         variation,
+            "atletas.foto":                 fotos,
+            "atletas.apelido":              market["nome"],
+            "atletas.posicao_id":           market["posicao_id"],
+            "atletas.jogos_num":            games,
+            "atletas.clube.id.full.name":   market["sigla"],
+            "atletas.nome":                 market["nome"],
+            "atletas.preco_num":            price,
+            "atletas.minimo_para_valorizar": np.nan,
+            "atletas.entrou_em_campo":      played,
+            "atletas.media_num":            media,
+            "atletas.slug":                 slugs,
+            "atletas.apelido_abreviado":    market["nome"],
+            "atletas.clube_id":             market["clube_id"],
+            "atletas.rodada_id":            r,
+        })
+        for j, s in enumerate(SCOUT_COLUMNS):
+            df[s] = np.where(cum_scouts[:, j] > 0, cum_scouts[:, j], np.nan)
+
+        path = os.path.join(out_dir, f"rodada_{r}.csv")
+        df.to_csv(path)
+        files.append(path)
+    return files
+
+
+def generate_dataset(out_dir: str, seasons: int = 1, rounds: int = 38, athletes: int = 700, seed: int = 0) -> list:
+    """Gera `seasons` temporadas em out_dir/temporada_{k}. Retorna as pastas."""
+    dirs = []
+    for k in range(seasons):
+        path = os.path.join(out_dir, f"temporada_{k + 1}")
+        generate_season(path, rounds, athletes, seed=seed + k, first_id=30_000 + 100_000 * k)
+        dirs.append(path)
+    return dirs
+
+
+def synthetic_schedule(rounds: int = 38, clubs: int = 20, played_rounds: int = None, seed: int = 0) -> pd.DataFrame:
+    """
+    Cronograma no formato devolvido por fetch_raw_data("campeonatos/{id}/partidas"):
+    uma linha com uma coluna `partidas.fase-unica.{r}a-rodada` (lista de jogos) por rodada.
+
+    :param played_rounds: rodadas já jogadas (com placar e status "finalizado")
+    """
+    rng = np.random.default_rng(seed)
+    played_rounds = rounds // 2 if played_rounds is None else played_rounds
+    siglas = (CLUB_SIGLAS * (clubs // len(CLUB_SIGLAS) + 1))[:clubs]
+    teams  = [{"time_id": 260 + i, "nome_popular": f"Clube {s}", "sigla": s} for i, s in enumerate(siglas)]
+
+    row, pid = {}, 100_000
+    for r in range(1, rounds + 1):
+        order = rng.permutation(clubs)
+        games = []
+        for home, away in zip(order[0::2], order[1::2]):
+            pid += 1
+            done = r <= played_rounds
+            games.append({
+                "partida_id": pid,
+                "status": "finalizado" if done else "agendado",
+                "data_realizacao": f"2025-{(r - 1) // 4 + 4:02d}-{(r - 1) % 4 * 7 + 1:02d}",
+                "hora_realizacao": "16:00",
+                "placar_mandante": int(rng.poisson(1.4)) if done else None,
+                "placar_visitante": int(rng.poisson(1.1)) if done else None,
+                "time_mandante": teams[home],
+                "time_visitante": teams[away],
+            })
+        row[f"partidas.fase-unica.{r}a-rodada"] = [games]
+    return pd.DataFrame(row)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Gera CSVs de rodada sintéticos no formato do Cartola.")
+    parser.add_argument("out_dir", help="pasta de saída")
+    parser.add_argument("--seasons", type=int, default=1)
+    parser.add_argument("--rounds", type=int, default=38)
+    parser.add_argument("--athletes", type=int, default=700)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    dirs = generate_dataset(args.out_dir, args.seasons, args.rounds, args.athletes, args.seed)
+    for path in dirs:
+        print(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
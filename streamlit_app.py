@@ -5,18 +5,15 @@ import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 import streamlit as st
-from dotenv import load_dotenv
-import pandas as pd
+from utils.config import load_config
 
 # ─── Carrega variáveis do .env ───────────────────────────────────────────────
-load_dotenv()
+load_config()
 
-# ─── Imports dos agentes ────────────────────────────────────────────────────
-from agents.load_cartola_csv import fetch_all_cartola_csvs
-from agents.analyze_data     import compute_player_metrics
-from agents.strategy_agent   import generate_strategy
-from agents.team_builder     import build_optimal_team
-from agents.fetch_matches    import fetch_next_round_matches, fetch_last_results_by_team
+# ─── Etapas do pipeline (com cache compartilhado entre sessões) ──────────────
+from utils import pipeline_cache as pc
+from agents.team_builder import expand_formation
+from agents.strategy_agent import stream_strategy
 
 CAMPEONATO_ID = 10  # Brasileirão Série A
 
@@ -31,23 +28,25 @@ def main():
 
     # ─── Parse da formação D-M-A ───────────────────────────────────────────
     try:
-        parts = list(map(int, formation.split("-")))
-        formation_dict = {"D": parts[0], "M": parts[1], "A": parts[2]}
-    except Exception:
+        expand_formation(formation)
+    except (ValueError, KeyError):
         st.error("Formação inválida. Use o formato 'D-M-A', ex: '4-3-3'.")
         return
 
+    pc.refresh_button(CAMPEONATO_ID)
+
     # ─── Pipeline de dados ───────────────────────────────────────────────────
-    cartola_df = fetch_all_cartola_csvs()
-    metrics_df = compute_player_metrics(cartola_df)
+    # a chave é a impressão digital dos CSVs: só recarrega se alguma rodada mudar
+    source = pc.csv_source()
 
     # ─── Estratégia baseada em LLM ───────────────────────────────────────────
-    strategy = generate_strategy(metrics_df, budget, formation)
+    # streaming: os tokens aparecem conforme chegam; repetições vêm do cache persistente
     st.subheader("🔍 Estratégia")
-    st.markdown(strategy)
+    st.write_stream(stream_strategy(pc.player_metrics(source), budget, formation))
 
     # ─── Montagem do time D-M-A ─────────────────────────────────────────────
-    team_df = build_optimal_team(metrics_df, budget, formation_dict)
+    # objetivo: pontuação projetada para a rodada (scouts × adversário × mando)
+    team_df = pc.optimal_team(source, budget, formation, CAMPEONATO_ID, int(round_input))
     if "atletas.apelido" in team_df.columns:
         team_df = team_df.rename(columns={"atletas.apelido": "player_name"})
     elif "atletas.nome" in team_df.columns:
@@ -56,10 +55,31 @@ def main():
         team_df["player_name"] = team_df["player_id"].astype(str)
 
     st.subheader("⚽ Escalação D-M-A")
-    st.table(team_df[["player_name", "position", "price", "cost_benefit"]])
+    st.table(team_df[["player_name", "position", "price", "projected_points", "cost_benefit"]])
+
+    # ─── Risco da escalação (Monte Carlo) ───────────────────────────────────
+    target = st.number_input("Meta de pontos", min_value=0.0, value=60.0, step=5.0)
+    risk   = pc.lineup_risk(source, tuple(int(i) for i in team_df["player_id"]), target)
+    cols   = st.columns(4)
+    cols[0].metric("Esperado", f"{risk['expected']:.1f}")
+    cols[1].metric("P5 – P95", f"{risk['p5']:.0f} – {risk['p95']:.0f}")
+    cols[2].metric("Mediana", f"{risk['p50']:.1f}")
+    cols[3].metric(f"P(> {target:g})", f"{risk['p_target']:.0%}")
+
+    # ─── Substitutos (lesão/suspensão) ──────────────────────────────────────
+    st.subheader("🔁 Substitutos")
+    names    = dict(zip(team_df["player_name"], team_df["player_id"]))
+    out_name = st.selectbox("Jogador a substituir", options=list(names.keys()))
+    out_row  = team_df[team_df["player_id"] == names[out_name]].iloc[0]
+    ceiling  = st.number_input("Preço máximo (R$)", min_value=0.0, value=float(out_row["price"]), step=0.5)
+    subs     = pc.substitutes(source, int(out_row["player_id"]), ceiling)
+    metrics  = pc.player_metrics(source).set_index("player_id")
+    subs["player_name"] = subs["player_id"].map(metrics["atletas.apelido"])
+    subs["avg_points"]  = subs["player_id"].map(metrics["avg_points"])
+    st.table(subs[["player_name", "price", "avg_points", "similarity"]])
 
     # ─── Próximos confrontos ─────────────────────────────────────────────────
-    upcoming = fetch_next_round_matches(CAMPEONATO_ID, round_input)
+    upcoming = pc.next_round_matches(CAMPEONATO_ID, int(round_input))
     st.subheader(f"📅 Próximos jogos – Rodada {round_input}")
     st.table(upcoming[[
         "time_mandante.nome_popular",
@@ -69,18 +89,12 @@ def main():
     ]])
 
     # ─── Últimos resultados ─────────────────────────────────────────────────
-    first_round = fetch_next_round_matches(CAMPEONATO_ID, 1)
-    teams = pd.concat([
-        first_round[["time_mandante.time_id","time_mandante.nome_popular"]]
-            .rename(columns={"time_mandante.time_id":"id","time_mandante.nome_popular":"nome"}),
-        first_round[["time_visitante.time_id","time_visitante.nome_popular"]]
-            .rename(columns={"time_visitante.time_id":"id","time_visitante.nome_popular":"nome"})
-    ]).drop_duplicates().set_index("nome")["id"].to_dict()
+    teams = pc.team_names(CAMPEONATO_ID)
 
     team_name = st.selectbox("Time p/ últimos resultados", options=list(teams.keys()))
     results_n = st.number_input("Qtd. resultados", min_value=1, max_value=10, value=5, step=1)
     team_id   = teams[team_name]
-    recent    = fetch_last_results_by_team(CAMPEONATO_ID, team_id, num_matches=results_n)
+    recent    = pc.last_results(CAMPEONATO_ID, int(team_id), int(results_n))
 
     st.subheader(f"🏆 Últimos resultados – {team_name}")
     st.table(recent[[
@@ -90,4 +104,4 @@ def main():
     ]])
 
 if __name__ == "__main__":
-    main()
+    pc.run_instrumented(main)
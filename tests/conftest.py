@@ -0,0 +1,13 @@
+# tests/conftest.py
+#
+# Os testes importam `agents` e `utils` a partir da raiz do repositório
+# (como as páginas Streamlit), qualquer que seja a pasta de onde o pytest roda.
+
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+ROUNDS_DIR = os.path.join(ROOT, "data", "raw", "cartola", "rodadas")
@@ -0,0 +1,75 @@
+# tests/test_athlete_store.py
+
+import os
+import shutil
+
+import agents.athlete_store as athlete_store
+from agents.athlete_store import open_store
+from conftest import ROUNDS_DIR
+
+
+def copy_rounds(dest, names=None):
+    dest.mkdir(parents=True)
+    for name in names or os.listdir(ROUNDS_DIR):
+        shutil.copy2(os.path.join(ROUNDS_DIR, name), dest / name)
+    return str(dest)
+
+
+def test_sources_do_not_evict_each_other(tmp_path):
+    full  = copy_rounds(tmp_path / "a" / "rodadas")
+    short = copy_rounds(tmp_path / "b" / "rodadas", ["rodada_1.csv", "rodada-2.csv", "rodada_3.csv"])
+    store_dir = str(tmp_path / "store")
+
+    first  = open_store(full, store_dir=store_dir)
+    second = open_store(short, store_dir=store_dir)
+
+    assert first.path != second.path
+    assert os.path.isdir(first.path) and os.path.isdir(second.path)
+    assert list(second.rounds) == [1, 2, 3]
+    # a primeira origem continua atual: reabrir não reescreve nada
+    assert open_store(full, store_dir=store_dir, rebuild=False).path == first.path
+
+
+def test_version_from_other_source_is_not_reused(tmp_path, monkeypatch):
+    # cópias idênticas (copy2 preserva mtime: mesma impressão digital) caindo
+    # na mesma pasta: só meta["source"] impede reusar a versão da outra origem
+    full  = copy_rounds(tmp_path / "a" / "rodadas")
+    other = copy_rounds(tmp_path / "b" / "rodadas")
+    shared = str(tmp_path / "store" / "shared")
+    monkeypatch.setattr(athlete_store, "_store_dir_for", lambda dir_path, store_dir=None: shared)
+
+    first = open_store(full)
+    second = open_store(other)
+    assert second.meta["source"] == os.path.abspath(other)
+    assert first.meta["source"] == os.path.abspath(full)
+
+
+def test_new_version_replaces_older_in_open_registry(tmp_path, monkeypatch):
+    monkeypatch.setattr(athlete_store, "_OPEN", {})
+    src = copy_rounds(tmp_path / "rodadas")
+    store_dir = str(tmp_path / "store")
+
+    first = open_store(src, store_dir=store_dir)
+    newest = os.path.join(src, "rodada-8.csv")
+    os.utime(newest, ns=(os.stat(newest).st_atime_ns, os.stat(newest).st_mtime_ns + 10**9))
+    second = open_store(src, store_dir=store_dir)
+
+    assert second.path != first.path
+    root = os.path.dirname(second.path)
+    assert [k for k in athlete_store._OPEN if k[0] == root] == [(root, os.path.basename(second.path))]
+
+
+def test_build_removes_abandoned_staging(tmp_path):
+    src = copy_rounds(tmp_path / "rodadas")
+    store_dir = str(tmp_path / "store")
+    root = athlete_store._store_dir_for(src, store_dir)
+    dead = os.path.join(root, "abc.tmp999999999")
+    live = os.path.join(root, f"def.tmp{os.getpid()}")
+    old  = os.path.join(root, f"ghi.tmp{os.getpid()}")
+    for path in (dead, live, old):
+        os.makedirs(path)
+    os.utime(old, (0, 0))
+
+    athlete_store.build_store(src, store_dir)
+    assert not os.path.exists(dead) and not os.path.exists(old)
+    assert os.path.isdir(live)    # build em andamento de um processo vivo
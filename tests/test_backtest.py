@@ -0,0 +1,36 @@
+# tests/test_backtest.py
+
+import os
+import shutil
+
+import pytest
+
+from agents.backtest import run_backtest
+from conftest import ROUNDS_DIR
+
+
+@pytest.fixture
+def two_seasons(tmp_path):
+    """Duas temporadas no layout usual .../<ano>/rodadas, com as rodadas 1-3."""
+    paths = []
+    for year in ("2024", "2025"):
+        path = tmp_path / year / "rodadas"
+        path.mkdir(parents=True)
+        for name in ("rodada_1.csv", "rodada-2.csv", "rodada_3.csv"):
+            shutil.copy(os.path.join(ROUNDS_DIR, name), path / name)
+        paths.append(str(path))
+    return paths
+
+
+def test_seasons_with_same_dirname_are_kept_apart(two_seasons):
+    out = run_backtest(dir_paths=two_seasons, rounds=[3], workers=1)
+    assert sorted(out["season"].unique()) == sorted(os.path.normpath(p) for p in two_seasons)
+    assert len(out) == 2
+
+
+def test_explicit_labels_and_duplicates(two_seasons):
+    out = run_backtest(dir_paths={"2024": two_seasons[0], "2025": two_seasons[1]}, rounds=[3], workers=1)
+    assert sorted(out["season"].unique()) == ["2024", "2025"]
+
+    with pytest.raises(ValueError):
+        run_backtest(dir_paths=[two_seasons[0], two_seasons[0] + os.sep], rounds=[3], workers=1)
@@ -0,0 +1,90 @@
+# tests/test_helpers.py
+
+import os
+import json
+import shutil
+
+import pandas as pd
+
+import agents.batch as batch
+import utils.helpers as helpers
+from utils.helpers import save_partitioned, load_partitioned
+from conftest import ROUNDS_DIR
+
+
+def frame(rounds, value):
+    return pd.DataFrame({"rodada": rounds, "player_id": range(len(rounds)), "points": value})
+
+
+def test_rewrite_publishes_new_version(tmp_path):
+    base = str(tmp_path)
+    save_partitioned(frame([7, 8, 8], 1.0), "metrics", base_dir=base)
+    written = save_partitioned(frame([8], 2.0), "metrics", base_dir=base)
+
+    part_dir = os.path.join(base, "metrics", "rodada=8")
+    assert sorted(os.listdir(part_dir)) == sorted(["CURRENT", os.path.basename(os.path.dirname(written[0]))])
+    out = load_partitioned("metrics", base_dir=base)
+    assert out.groupby("rodada")["points"].agg(list).to_dict() == {7: [1.0], 8: [2.0]}
+
+
+def test_reads_layout_without_versions(tmp_path):
+    part_dir = tmp_path / "metrics" / "rodada=5"
+    part_dir.mkdir(parents=True)
+    frame([5, 5], 3.0).drop(columns="rodada").to_parquet(part_dir / "part-0.parquet", index=False)
+
+    assert load_partitioned("metrics", base_dir=str(tmp_path))["points"].tolist() == [3.0, 3.0]
+    save_partitioned(frame([5], 4.0), "metrics", base_dir=str(tmp_path))
+    assert not (part_dir / "part-0.parquet").exists()
+    assert load_partitioned("metrics", base_dir=str(tmp_path))["points"].tolist() == [4.0]
+
+
+def test_columns_may_include_partition_column(tmp_path):
+    base = str(tmp_path)
+    save_partitioned(frame([7, 8], 1.0), "lineups", base_dir=base)
+
+    out = load_partitioned("lineups", partitions=[8], columns=["rodada", "points"], base_dir=base)
+    assert out.columns.tolist() == ["rodada", "points"]
+    assert out.to_dict("records") == [{"rodada": 8, "points": 1.0}]
+    empty = load_partitioned("lineups", partitions=[9], columns=["rodada", "points"], base_dir=base)
+    assert empty.columns.tolist() == ["rodada", "points"]
+
+
+def test_partitions_come_back_in_numeric_order(tmp_path):
+    base = str(tmp_path)
+    save_partitioned(frame([10, 2, 1, 9], 1.0), "metrics", base_dir=base)
+    assert load_partitioned("metrics", base_dir=base)["rodada"].tolist() == [1, 2, 9, 10]
+
+
+def test_cleanup_keeps_versions_newer_than_current(tmp_path):
+    base = str(tmp_path)
+    save_partitioned(frame([8], 1.0), "metrics", base_dir=base)
+    part_dir = os.path.join(base, "metrics", "rodada=8")
+    (first,) = [n for n in os.listdir(part_dir) if n != "CURRENT"]
+    # outro processo publicou uma versão mais nova entre a nossa troca e a limpeza
+    newer = f"v{int(first[1:].split('-')[0]) + 1}-1"
+    shutil.copytree(os.path.join(part_dir, first), os.path.join(part_dir, newer))
+    with open(os.path.join(part_dir, "CURRENT"), "w", encoding="utf-8") as f:
+        f.write(newer)
+
+    helpers._drop_old_versions(part_dir)
+    assert sorted(os.listdir(part_dir)) == ["CURRENT", newer]
+
+
+def test_batch_cli_writes_readable_partitions(tmp_path, capsys, monkeypatch):
+    monkeypatch.chdir(tmp_path)   # cache dos CSVs (data/cache/...) fica no tmp
+    out = str(tmp_path / "out")
+    code = batch.main([
+        "--rounds", "7-8", "--dir", ROUNDS_DIR, "--offline", "--out", out,
+        "--formation", "4-3-3", "3-5-2", "--budget", "120", "--method", "exact", "greedy",
+    ])
+    assert code == 0
+    report = json.loads(capsys.readouterr().out)
+    assert sorted(report["rounds"]) == ["7", "8"]
+
+    metrics = load_partitioned("metrics", base_dir=out)
+    lineups = load_partitioned("lineups", columns=["rodada", "strategy", "player_id", "realized_points"], base_dir=out)
+    assert metrics["rodada"].unique().tolist() == [7, 8]
+    assert lineups["rodada"].unique().tolist() == [7, 8]
+    assert lineups.groupby("rodada")["strategy"].nunique().tolist() == [4, 4]
+    assert (lineups.groupby(["rodada", "strategy"]).size() == 12).all()
+    assert lineups["realized_points"].notna().all()
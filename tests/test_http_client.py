@@ -0,0 +1,120 @@
+# tests/test_http_client.py
+
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from agents.http_client import ApiClient, ResponseCache
+
+
+class Server:
+    """
+    Servidor local com respostas roteirizadas: `script[path]` é uma lista de
+    (status, headers, corpo) consumida em ordem; a última se repete. Com
+    `etag`, responde 304 a um If-None-Match igual.
+    """
+
+    def __init__(self):
+        self.script, self.requests = {}, []
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path  = self.path.split("?", 1)[0]
+                steps = stand_in.script[path]
+                status, headers, body = steps.pop(0) if len(steps) > 1 else steps[0]
+                if headers.get("ETag") and self.headers.get("If-None-Match") == headers["ETag"]:
+                    status, body = 304, None
+                stand_in.requests.append((path, status, dict(self.headers)))
+                payload = json.dumps(body).encode("utf-8") if body is not None else b""
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url   = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    srv = Server()
+    try:
+        yield srv
+    finally:
+        srv.close()
+
+
+def client(server, tmp_path, **kwargs):
+    kwargs.setdefault("ttls", [(r".*", 0)])    # tudo vence na hora: força revalidação
+    return ApiClient(server.url, cache=ResponseCache(str(tmp_path / "http")), **kwargs)
+
+
+def test_expired_entry_is_revalidated_with_304(server, tmp_path):
+    server.script["/tabela"] = [(200, {"ETag": '"v1"'}, {"linhas": [1, 2]})]
+    api = client(server, tmp_path)
+
+    assert api.get_json("tabela") == {"linhas": [1, 2]}
+    assert api.get_json("tabela") == {"linhas": [1, 2]}
+    assert [status for _, status, _ in server.requests] == [200, 304]
+    assert server.requests[1][2].get("If-None-Match") == '"v1"'
+    assert api.stats["revalidated"] == 1 and api.stats["misses"] == 1
+
+
+def test_retries_honor_retry_after(server, tmp_path, monkeypatch):
+    server.script["/lento"] = [
+        (429, {"Retry-After": "2"}, {"erro": "rate"}),
+        (503, {"Retry-After": "1"}, {"erro": "fora"}),
+        (200, {}, {"ok": True}),
+    ]
+    waits = []
+    monkeypatch.setattr(time, "sleep", waits.append)
+    api = client(server, tmp_path, max_retries=3)
+
+    assert api.get_json("lento") == {"ok": True}
+    assert waits == [2.0, 1.0]
+    assert api.stats["retries"] == 2 and api.stats["requests"] == 3
+
+
+def test_finished_match_is_permanent(server, tmp_path):
+    server.script["/partidas/7"] = [(200, {}, {"partida_id": 7, "status": "finalizado", "placar_mandante": 2})]
+    api = client(server, tmp_path)
+
+    api.get_json("partidas/7")
+    assert api.get_json("partidas/7", refresh=True)["placar_mandante"] == 2
+    assert len(server.requests) == 1            # nem revalida: não muda mais
+    api.cache.clear(keep_permanent=True)
+    assert api.get_json("partidas/7")["status"] == "finalizado"
+    assert len(server.requests) == 1
+
+
+def test_lru_eviction_respects_budget_and_keeps_permanent(tmp_path):
+    cache = ResponseCache(str(tmp_path / "http"), max_bytes=3500)
+    body  = "x" * 900
+    cache.put("final", {"permanent": True, "body": body})
+    for i in range(3):
+        cache.put(f"k{i}", {"permanent": False, "body": body})
+        path = os.path.join(cache.cache_dir, f"k{i}.json")
+        os.utime(path, (1000 + i, 1000 + i))     # k0 é a menos usada
+    assert cache.get("k0") is not None           # get renova k0: agora k1 é a mais antiga
+
+    cache.put("k3", {"permanent": False, "body": body})
+    assert cache.get("k1") is None
+    assert all(cache.get(k) is not None for k in ("k0", "k2", "k3", "final"))
+    total = sum(os.path.getsize(os.path.join(cache.cache_dir, n))
+                for n in os.listdir(cache.cache_dir) if n.endswith(".json"))
+    assert total <= cache.max_bytes
@@ -0,0 +1,67 @@
+# tests/test_incremental_metrics.py
+
+import os
+import shutil
+
+import pandas as pd
+
+from agents.analyze_data import compute_player_metrics
+from agents.incremental_metrics import PlayerMetricsState, incremental_player_metrics
+from agents.load_cartola_csv import fetch_all_cartola_csvs
+from conftest import ROUNDS_DIR
+
+
+def expected_metrics(dir_path, cache_dir):
+    df = fetch_all_cartola_csvs(dir_path, cache_dir=cache_dir)
+    return compute_player_metrics(df).sort_values("player_id").reset_index(drop=True)
+
+
+def test_renamed_round_file_keeps_round(tmp_path):
+    rounds = tmp_path / "rodadas"
+    shutil.copytree(ROUNDS_DIR, rounds)
+    state = PlayerMetricsState()
+    state.sync_with_csvs(str(rounds))
+
+    os.rename(rounds / "rodada-8.csv", rounds / "rodada_8.csv")
+    touched = state.sync_with_csvs(str(rounds))
+
+    assert touched == [str(rounds / "rodada_8.csv")]
+    assert 8 in state.rounds
+    assert set(r for r, *_ in state.sources.values()) == set(range(1, 9))
+    got = state.to_frame().sort_values("player_id").reset_index(drop=True)
+    pd.testing.assert_frame_equal(got, expected_metrics(str(rounds), str(tmp_path / "cache")))
+
+
+def test_removed_round_file_retracts_round(tmp_path):
+    rounds = tmp_path / "rodadas"
+    shutil.copytree(ROUNDS_DIR, rounds)
+    state = PlayerMetricsState()
+    state.sync_with_csvs(str(rounds))
+
+    os.remove(rounds / "rodada-8.csv")
+    state.sync_with_csvs(str(rounds))
+
+    assert 8 not in state.rounds
+    got = state.to_frame().sort_values("player_id").reset_index(drop=True)
+    pd.testing.assert_frame_equal(got, expected_metrics(str(rounds), str(tmp_path / "cache")))
+
+
+def test_sources_keep_separate_states(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    first, second = tmp_path / "a" / "rodadas", tmp_path / "b" / "rodadas"
+    shutil.copytree(ROUNDS_DIR, first)
+    second.mkdir(parents=True)
+    for name in ("rodada_1.csv", "rodada-2.csv", "rodada_3.csv"):
+        shutil.copy(os.path.join(ROUNDS_DIR, name), second / name)
+
+    full  = incremental_player_metrics(str(first))
+    short = incremental_player_metrics(str(second))
+    assert not full.equals(short)
+
+    applied = []
+    apply_round = PlayerMetricsState.apply_round
+    monkeypatch.setattr(PlayerMetricsState, "apply_round",
+                        lambda self, *args, **kw: applied.append(args) or apply_round(self, *args, **kw))
+    again = incremental_player_metrics(str(first))
+    assert applied == []
+    pd.testing.assert_frame_equal(again, full)
@@ -0,0 +1,49 @@
+# tests/test_instrumentation.py
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.instrumentation import begin_run, bind, count, counters, profile_run, spans, stage
+
+
+def test_concurrent_runs_keep_their_own_spans_and_counters():
+    barrier = threading.Barrier(2)
+    runs = {}
+
+    def session(name, n):
+        run_id = begin_run()
+        runs[name] = run_id
+        with stage("pagina") as span:
+            barrier.wait()
+            for _ in range(n):
+                count("http_bytes", 10)
+            barrier.wait()
+            span["rows_out"] = n
+
+    threads = [threading.Thread(target=session, args=(name, n)) for name, n in (("a", 3), ("b", 5))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert runs["a"] != runs["b"]
+    for name, n in (("a", 3), ("b", 5)):
+        (span,) = spans(runs[name])
+        assert span["http_bytes"] == 10 * n
+        assert counters(runs[name]) == {"http_bytes": 10 * n}
+
+
+def test_bind_carries_run_into_pool_threads():
+    run_id = begin_run()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        list(pool.map(bind(lambda _: count("http_requests")), range(4)))
+        list(pool.map(lambda _: count("http_requests"), range(4)))   # sem bind: fora da execução
+    assert counters(run_id) == {"http_requests": 4}
+
+
+def test_second_profiled_run_is_skipped():
+    with profile_run() as outer:
+        with profile_run() as inner:
+            sum(range(1000))
+    assert inner.get("skipped")
+    assert "skipped" not in outer and outer["text"]
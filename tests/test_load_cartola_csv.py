@@ -0,0 +1,71 @@
+# tests/test_load_cartola_csv.py
+
+import os
+import shutil
+import threading
+
+import pandas as pd
+
+import agents.load_cartola_csv as load_cartola_csv
+from agents.load_cartola_csv import fetch_all_cartola_csvs, read_round_csv
+from conftest import ROUNDS_DIR
+
+
+def test_fast_mode_fills_missing_bool_column(tmp_path):
+    path = tmp_path / "rodada_3.csv"
+    pd.DataFrame({
+        "atletas.atleta_id": [1, 2],
+        "atletas.rodada_id": [3, 3],
+        "atletas.preco_num": [5.0, 7.5],
+        "atletas.pontos_num": [2.0, 0.0],
+    }).to_csv(path, index=False)
+
+    df = read_round_csv(str(path), fast=True)
+
+    assert df["atletas.entrou_em_campo"].dtype == bool
+    assert not df["atletas.entrou_em_campo"].any()
+    assert df["G"].isna().all()
+    assert df["player_id"].tolist() == [1, 2]
+
+
+def test_concurrent_loads_share_the_cache(tmp_path):
+    rounds = tmp_path / "rodadas"
+    shutil.copytree(ROUNDS_DIR, rounds)
+    cache_dir = str(tmp_path / "cache")
+    expected  = fetch_all_cartola_csvs(str(rounds), use_cache=False)
+    barrier   = threading.Barrier(8)
+    results, errors = [], []
+
+    def load():
+        try:
+            barrier.wait()
+            results.append(fetch_all_cartola_csvs(str(rounds), cache_dir=cache_dir))
+        except Exception as exc:  # pragma: no cover - só aparece se houver corrida
+            errors.append(exc)
+
+    threads = [threading.Thread(target=load) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    for df in results:
+        pd.testing.assert_frame_equal(df, expected)
+    leftovers = [name for _, _, names in os.walk(cache_dir) for name in names if name.endswith(".tmp")]
+    assert leftovers == []
+
+
+def test_small_fast_loads_skip_the_process_pool(monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError("pool de processos numa carga pequena")
+
+    monkeypatch.setattr(load_cartola_csv, "ProcessPoolExecutor", no_pool)
+    df = fetch_all_cartola_csvs(ROUNDS_DIR, use_cache=False, fast=True)
+    assert sorted(df["rodada"].unique()) == list(range(1, 9))
+
+
+def test_measure_load_reports_serial_and_pool_paths():
+    report = load_cartola_csv.measure_load(ROUNDS_DIR, workers=2)
+    assert list(report.index) == ["default", "fast", "fast_pool"]
+    assert report["rows"].nunique() == 1
@@ -0,0 +1,91 @@
+# tests/test_metrics_equivalence.py
+#
+# As três formas de obter as métricas dos jogadores (recomputação completa,
+# estado incremental e store em memory map) devem dar o mesmo resultado
+# sobre as rodadas que acompanham o repositório.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.analyze_data import compute_player_metrics
+from agents.athlete_store import open_store
+from agents.incremental_metrics import PlayerMetricsState, incremental_player_metrics
+from agents.load_cartola_csv import fetch_all_cartola_csvs
+from conftest import ROUNDS_DIR
+
+
+def by_player(df):
+    return df.sort_values("player_id").reset_index(drop=True)
+
+
+@pytest.fixture(scope="module")
+def history(tmp_path_factory):
+    return fetch_all_cartola_csvs(ROUNDS_DIR, cache_dir=str(tmp_path_factory.mktemp("cache")))
+
+
+@pytest.fixture(scope="module")
+def expected(history):
+    return by_player(compute_player_metrics(history))
+
+
+def rounds_of(history):
+    return {int(r): part.reset_index(drop=True) for r, part in history.groupby("rodada", sort=True)}
+
+
+def test_state_in_order(history, expected):
+    state = PlayerMetricsState()
+    for rodada, part in rounds_of(history).items():
+        state.apply_round(part, rodada)
+    pd.testing.assert_frame_equal(by_player(state.to_frame()), expected)
+
+
+def test_state_shuffled(history, expected):
+    rounds = rounds_of(history)
+    order  = np.random.default_rng(5).permutation(sorted(rounds))
+    state  = PlayerMetricsState()
+    for rodada in order:
+        state.apply_round(rounds[int(rodada)], int(rodada))
+    pd.testing.assert_frame_equal(by_player(state.to_frame()), expected)
+
+
+def test_state_corrections_and_retractions(history, expected):
+    rounds = rounds_of(history)
+    state  = PlayerMetricsState()
+    for rodada, part in rounds.items():
+        state.apply_round(part, rodada)
+
+    # correção: uma versão errada da rodada 4 e depois a certa
+    wrong = rounds[4].copy()
+    wrong["points"] = pd.to_numeric(wrong["points"]) + 1.5
+    state.apply_round(wrong, 4)
+    assert not by_player(state.to_frame()).equals(expected)
+    state.apply_round(rounds[4], 4)
+    pd.testing.assert_frame_equal(by_player(state.to_frame()), expected)
+
+    # retirada de uma rodada do meio e da última, depois reaplicadas
+    state.retract_round(6)
+    state.retract_round(8)
+    pd.testing.assert_frame_equal(
+        by_player(state.to_frame()),
+        by_player(compute_player_metrics(history[~history["rodada"].isin([6, 8])])),
+    )
+    state.apply_round(rounds[8], 8)
+    state.apply_round(rounds[6], 6)
+    pd.testing.assert_frame_equal(by_player(state.to_frame()), expected)
+
+
+def test_incremental_player_metrics(tmp_path, expected):
+    state_path = str(tmp_path / "state.pkl")
+    pd.testing.assert_frame_equal(by_player(incremental_player_metrics(ROUNDS_DIR, state_path=state_path)), expected)
+    # segunda chamada: estado lido do disco, nada a reprocessar
+    pd.testing.assert_frame_equal(by_player(incremental_player_metrics(ROUNDS_DIR, state_path=state_path)), expected)
+
+
+def test_athlete_store_metrics(tmp_path, expected):
+    got = by_player(open_store(ROUNDS_DIR, store_dir=str(tmp_path / "store")).metrics())
+    # colunas vindas direto do memory map: compara os valores, não a classe do array
+    got = pd.DataFrame({c: np.asarray(got[c].to_numpy()) for c in got.columns})
+    columns = [c for c in got.columns if c in expected.columns]
+    assert {"avg_points", "std_points", "games_played", "cost_benefit"} <= set(columns)
+    pd.testing.assert_frame_equal(got[columns], expected[columns], check_dtype=False)
@@ -0,0 +1,135 @@
+# tests/test_prefetch.py
+#
+# Um ciclo do worker contra um servidor HTTP local que faz o papel da API
+# Futebol e da API do Cartola (com ETag, como as reais).
+
+import json
+import shutil
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import agents.fetch_data as fetch_data
+import agents.prefetch as prefetch
+import agents.schedule_index as schedule_index
+from benchmarks.synthetic import synthetic_schedule
+from conftest import ROUNDS_DIR
+
+CAMPEONATO_ID = 10
+
+
+def schedule_payload():
+    """Cronograma com as rodadas jogadas sem placar: os placares vêm dos detalhes."""
+    raw = synthetic_schedule(rounds=4, clubs=6, played_rounds=2, seed=8)
+    rounds, details = {}, {}
+    for col in raw.columns:
+        games = raw[col].iloc[0]
+        for g in games:
+            details[g["partida_id"]] = dict(g)
+            g["placar_mandante"] = g["placar_visitante"] = None
+        rounds[col.rsplit(".", 1)[1]] = games
+    return {"partidas": {"fase-unica": rounds}}, details
+
+
+def market_payload():
+    atletas = [
+        {
+            "atleta_id": 900_000 + i, "rodada_id": 9, "clube_id": 262 + i % 2, "posicao_id": 1 + i % 6,
+            "status_id": 7, "apelido": f"Jogador {i}", "pontos_num": 2.5 * i, "preco_num": 5.0 + i,
+            "media_num": 2.0, "jogos_num": 3, "entrou_em_campo": True, "scout": {"DS": i, "FC": 1},
+        }
+        for i in range(6)
+    ]
+    return {"atletas": atletas, "clubes": {"262": {"abreviacao": "FLA"}, "263": {"abreviacao": "PAL"}}}
+
+
+class StandIn:
+    def __init__(self):
+        schedule, details = schedule_payload()
+        self.routes = {
+            f"/v1/campeonatos/{CAMPEONATO_ID}/partidas": schedule,
+            f"/v1/campeonatos/{CAMPEONATO_ID}/classificacao": [{"posicao": 1, "time": {"nome_popular": "Clube FLA"}}],
+            "/atletas/mercado": market_payload(),
+            "/mercado/status": {"fechamento": {}},
+        }
+        self.routes.update({f"/v1/partidas/{pid}": g for pid, g in details.items()})
+        self.details = len(details)
+        self.log = []   # (caminho, status)
+
+    def handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                if path not in stand_in.routes:
+                    stand_in.log.append((path, 404))
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body = json.dumps(stand_in.routes[path]).encode("utf-8")
+                etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                status = 304 if self.headers.get("If-None-Match") == etag else 200
+                stand_in.log.append((path, status))
+                self.send_response(status)
+                self.send_header("ETag", etag)
+                if status == 200:
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if status == 200:
+                    self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def hits(self, prefix):
+        return [status for path, status in self.log if path.startswith(prefix)]
+
+
+@pytest.fixture
+def stand_in(tmp_path, monkeypatch):
+    server = StandIn()
+    httpd  = ThreadingHTTPServer(("127.0.0.1", 0), server.handler())
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{httpd.server_address[1]}"
+
+    # caches relativos (data/cache/...) ficam dentro de tmp_path
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("API_FUTEBOL_BASE_URL", base + "/v1")
+    monkeypatch.setenv("CARTOLA_API_URL", base)
+    monkeypatch.setattr(fetch_data, "_client", None)
+    monkeypatch.setattr(prefetch, "_cartola", None)
+    monkeypatch.setattr(schedule_index, "_INDEXES", {})
+    try:
+        yield server
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_cycle_against_local_server(stand_in, tmp_path):
+    rounds = tmp_path / "rodadas"
+    shutil.copytree(ROUNDS_DIR, rounds)
+
+    report = prefetch.run_cycle(CAMPEONATO_ID, str(rounds), concurrency=4)
+    assert not [name for name, r in report.items() if isinstance(r, dict) and "error" in r], report
+    assert report["schedule"] == {"games": 12}
+    assert report["details"] == {"scores": stand_in.details // 2}   # só as rodadas jogadas
+    assert report["round_csv"]["written"] and report["round_csv"]["rodada"] == 9
+    assert (rounds / "rodada_9.csv").exists()
+    assert fetch_data.get_client().stats["misses"] == 2 + stand_in.details // 2
+
+    stand_in.log.clear()
+    report = prefetch.run_cycle(CAMPEONATO_ID, str(rounds), concurrency=4)
+    assert not [name for name, r in report.items() if isinstance(r, dict) and "error" in r], report
+    # cronograma e classificação revalidados (304); detalhes finalizados nem vão à rede
+    assert stand_in.hits(f"/v1/campeonatos/{CAMPEONATO_ID}/partidas") == [304]
+    assert stand_in.hits(f"/v1/campeonatos/{CAMPEONATO_ID}/classificacao") == [304]
+    assert stand_in.hits("/v1/partidas/") == []
+    assert report["round_csv"]["written"] is False
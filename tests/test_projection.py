@@ -0,0 +1,72 @@
+# tests/test_projection.py
+
+import numpy as np
+import pandas as pd
+
+from agents.projection import (
+    CLUB_COLUMN, DEFAULT_WEIGHTS, FEATURES, fit_weights, project_points, projection_features,
+)
+
+
+def fixture():
+    """
+    Quatro jogadores: FLA em casa contra o Palmeiras (defesa fraca), PAL fora
+    contra o Flamengo (ataque forte), XXX sem jogo na rodada e CAM em casa
+    contra um adversário que não está na classificação.
+    """
+    metrics = pd.DataFrame({
+        "player_id":  [1, 2, 3, 4],
+        CLUB_COLUMN:  ["FLA", "PAL", "XXX", "CAM"],
+        "G_avg":      [0.5, 0.0, 0.5, 0.5],
+        "SG_avg":     [0.0, 0.5, 0.0, 0.0],
+        "CA_avg":     [0.0, 1.0, 0.0, 0.0],
+        "ewm_points": [3.0, 2.0, 1.0, 0.0],
+    })
+    matches = pd.DataFrame({
+        "time_mandante.sigla":         ["FLA", "CAM"],
+        "time_mandante.nome_popular":  ["Flamengo", "Atlético-MG"],
+        "time_visitante.sigla":        ["PAL", "DES"],
+        "time_visitante.nome_popular": ["Palmeiras", "Desconhecido"],
+    })
+    standings = pd.DataFrame({
+        "time":  ["Flamengo", "Palmeiras"],
+        "jogos": [10, 10],
+        "gm":    [20, 10],
+        "gc":    [10, 20],
+    })
+    return metrics, matches, standings
+
+
+def test_project_points_ranks_by_opponent_and_home():
+    metrics, matches, standings = fixture()
+    out = project_points(metrics, matches, standings).set_index("player_id")["projected_points"]
+
+    # liga: 1,5 gol por jogo. FLA: 8·0,5 × (2,0/1,5) × 1,1; PAL: 5·0,5 × (1,5/2,0) × 0,9 − 1
+    assert np.allclose(out.to_numpy(), [4.0 * 4 / 3 * 1.1, 2.5 * 0.75 * 0.9 - 1.0, 4.0, 4.0 * 1.1])
+    assert list(out.sort_values(ascending=False).index) == [1, 4, 3, 2]
+
+    home = projection_features(metrics, matches, standings)[:, FEATURES.index("home")]
+    assert home.tolist() == [1.0, 0.0, 0.5, 1.0]
+
+
+def test_unknown_club_or_opponent_falls_back():
+    metrics, matches, standings = fixture()
+    metrics[CLUB_COLUMN] = [None, "???", "XXX", "CAM"]
+    out = project_points(metrics, matches, standings)["projected_points"].to_numpy()
+    # sem confronto: fator 1 e mando neutro; adversário fora da tabela: fator 1
+    assert np.allclose(out, [4.0, 2.5 - 1.0, 4.0, 4.0 * 1.1])
+
+    bare = project_points(metrics.drop(columns=CLUB_COLUMN), matches, standings)["projected_points"]
+    assert np.allclose(bare.to_numpy(), [4.0, 1.5, 4.0, 4.0])
+    assert np.allclose(project_points(metrics)["projected_points"].to_numpy(), [4.0, 1.5, 4.0, 4.0])
+
+
+def test_fit_weights_shrinks_to_default():
+    rng = np.random.default_rng(0)
+    X = np.column_stack([np.ones(200), rng.random((200, len(FEATURES) - 1)) * 5])
+    true_w = np.array([1.0, 0.5, 2.0, 0.0, 0.3, 1.0])
+    y = X @ true_w
+    y[::10] = np.nan                                   # alvos ausentes são ignorados
+
+    assert np.allclose(fit_weights(X, y, alpha=1e12), DEFAULT_WEIGHTS, atol=1e-6)
+    assert np.allclose(fit_weights(X, y, alpha=1e-9), true_w, atol=1e-6)
@@ -0,0 +1,43 @@
+# tests/test_risk.py
+
+import numpy as np
+import pytest
+
+from agents.load_cartola_csv import fetch_all_cartola_csvs
+from agents.risk import simulate_totals
+from benchmarks.synthetic import generate_season
+from conftest import ROUNDS_DIR
+
+
+def test_regular_starter_never_draws_preseason_zero(tmp_path):
+    history = fetch_all_cartola_csvs(ROUNDS_DIR, cache_dir=str(tmp_path / "cache"))
+    played = history[history["atletas.entrou_em_campo"].fillna(False).astype(bool)]
+    stats = played.groupby("player_id")["points"].agg(["size", "min"])
+    # titular regular: jogou em todas as rodadas com jogos, sempre pontuou e
+    # também aparece no snapshot de pré-temporada (rodada 1, tudo zerado)
+    preseason = history.loc[history["rodada"] == 1, "player_id"]
+    starters = stats[
+        (stats["size"] == played["rodada"].nunique())
+        & (stats["min"] > 0)
+        & stats.index.isin(preseason)
+    ]
+    assert not starters.empty
+    pid = int(starters.index[0])
+
+    for joint in (True, False):
+        totals = simulate_totals([pid], history, n_sims=4000, joint=joint, seed=0)
+        assert np.percentile(totals, 5) > 0
+        assert (totals > 0).all()
+
+
+def test_bootstrap_and_poisson_agree_on_mean(tmp_path):
+    # temporada sintética: pontos coerentes com os scouts e jogadores que
+    # nem sempre entram em campo
+    generate_season(str(tmp_path / "rodadas"), rounds=12, athletes=60, clubs=4, seed=3)
+    history = fetch_all_cartola_csvs(str(tmp_path / "rodadas"), cache_dir=str(tmp_path / "cache"))
+    lineup  = history["player_id"].drop_duplicates().sort_values().to_numpy()[:12]
+
+    poisson = simulate_totals(lineup, history, n_sims=200_000, method="poisson", seed=1).mean()
+    for joint in (True, False):
+        boot = simulate_totals(lineup, history, n_sims=200_000, joint=joint, seed=1)
+        assert boot.mean() == pytest.approx(poisson, rel=0.02)
@@ -0,0 +1,131 @@
+# tests/test_schedule_index.py
+
+import copy
+import threading
+import time
+
+import pytest
+
+import agents.fetch_matches as fetch_matches
+import agents.schedule_index as schedule_index
+from agents.schedule_index import ScheduleIndex, HOME_ID, AWAY_ID
+from agents.standings_engine import fill_scores
+from benchmarks.synthetic import synthetic_schedule
+
+
+@pytest.fixture
+def schedule(monkeypatch):
+    """
+    Cronograma sintético com as rodadas 1-4 finalizadas, mas sem placar:
+    os placares só chegam pelos detalhes (_match_score, aqui simulado).
+    """
+    raw = synthetic_schedule(rounds=6, clubs=8, played_rounds=4, seed=3)
+    details = {}
+    for col in raw.columns:
+        games = copy.deepcopy(raw[col].iloc[0])
+        for g in games:
+            if g["placar_mandante"] is not None:
+                details[g["partida_id"]] = (g["placar_mandante"], g["placar_visitante"])
+            g["placar_mandante"] = g["placar_visitante"] = None
+        raw[col] = [games]
+    index = ScheduleIndex(0).refresh(raw)
+
+    def match_score(pid):
+        time.sleep(0.002)
+        return details.get(int(pid))
+
+    writers = set()
+    set_score = index.set_score
+
+    def recording_set_score(*args):
+        writers.add(threading.current_thread().name)
+        set_score(*args)
+
+    monkeypatch.setattr(fetch_matches, "_match_score", match_score)
+    monkeypatch.setattr(fetch_matches, "get_schedule_index", lambda campeonato_id: index)
+    monkeypatch.setattr(index, "set_score", recording_set_score)
+    return index, details, writers
+
+
+def test_fill_scores_writes_only_on_caller_thread(schedule):
+    index, details, writers = schedule
+    errors, stop = [], threading.Event()
+
+    def reader():
+        # leituras concorrentes das fatias memorizadas enquanto os placares chegam
+        try:
+            while not stop.is_set():
+                for r in range(1, 7):
+                    assert len(index.round_games(r)) == 4
+                index.team_games(260)
+        except Exception as exc:  # pragma: no cover - só aparece se houver corrida
+            errors.append(exc)
+
+    t = threading.Thread(target=reader)
+    t.start()
+    try:
+        found = fill_scores(index, concurrency=8)
+    finally:
+        stop.set()
+        t.join()
+
+    assert not errors
+    assert found == len(details)
+    assert writers == {threading.current_thread().name}
+    for pid, score in details.items():
+        assert index.score(pid) == score
+
+
+def test_last_results_scores_applied_by_consumer(schedule):
+    index, details, writers = schedule
+    out = fetch_matches.fetch_last_results_by_team(0, 260, num_matches=3, concurrency=4)
+
+    assert len(out) == 3
+    assert out["rodada"].tolist() == sorted(out["rodada"].tolist(), reverse=True)
+    assert writers == {threading.current_thread().name}
+
+
+def test_team_games_consistent_during_refresh():
+    # cronogramas de tamanhos diferentes: posições de um não valem no outro
+    big, small = synthetic_schedule(rounds=10, clubs=8, seed=1), synthetic_schedule(rounds=3, clubs=8, seed=2)
+    index = ScheduleIndex(0).refresh(big)
+    errors, stop = [], threading.Event()
+
+    def reader():
+        try:
+            while not stop.is_set():
+                for team in range(260, 268):
+                    games = index.team_games(team)
+                    ids = set(games[HOME_ID]) | set(games[AWAY_ID])
+                    assert team in ids and len(games) in (3, 10)
+        except Exception as exc:  # pragma: no cover - só aparece se houver corrida
+            errors.append(exc)
+
+    t = threading.Thread(target=reader)
+    t.start()
+    try:
+        for i in range(40):
+            index.refresh(small if i % 2 == 0 else big)
+    finally:
+        stop.set()
+        t.join()
+    assert not errors
+
+
+def test_concurrent_get_schedule_index_refreshes_once(monkeypatch):
+    calls = []
+
+    def fetch(endpoint):
+        calls.append(endpoint)
+        time.sleep(0.05)
+        return synthetic_schedule(rounds=4, clubs=8, seed=4)
+
+    monkeypatch.setattr(schedule_index, "fetch_raw_data", fetch)
+    monkeypatch.setattr(schedule_index, "_INDEXES", {})
+    threads = [threading.Thread(target=schedule_index.get_schedule_index, args=(99,)) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert len(schedule_index.get_schedule_index(99).round_games(1)) == 4
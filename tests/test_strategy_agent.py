@@ -0,0 +1,98 @@
+# tests/test_strategy_agent.py
+
+import pandas as pd
+import pytest
+
+from agents import strategy_agent
+from agents.strategy_agent import (
+    LocalStubLLM, generate_strategy, stream_strategy, strategy_cache_key,
+)
+
+STANDINGS = pd.DataFrame({"time": ["Flamengo", "Palmeiras"], "pontos": [20, 18]})
+
+
+@pytest.fixture
+def agent(tmp_path, monkeypatch):
+    """Cache numa pasta temporária e classificação falsa que conta as buscas."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(strategy_agent, "_cache", None)
+    fetches = []
+
+    def fake_standings(campeonato_id):
+        fetches.append(campeonato_id)
+        return STANDINGS
+
+    monkeypatch.setattr(strategy_agent, "fetch_standings", fake_standings)
+    return fetches
+
+
+class RecordingLLM(LocalStubLLM):
+    def __init__(self):
+        super().__init__()
+        self.prompts = []
+
+    def invoke(self, prompt_text):
+        self.prompts.append(prompt_text)
+        return super().invoke(prompt_text)
+
+
+def metrics():
+    return pd.DataFrame({"avg_points": [3.0, 5.5, 1.2], "cost_benefit": [0.4, 0.9, 0.1]})
+
+
+def test_stub_llm_is_deterministic_and_streams_the_same_text():
+    llm = LocalStubLLM()
+    text = llm.invoke("prompt")
+    assert text == LocalStubLLM().invoke("prompt")
+    assert text != llm.invoke("outro prompt")
+    assert "".join(llm.stream("prompt")) == text + " "
+    assert llm.calls == 3
+
+
+def test_cache_key_is_canonical():
+    inputs = {"metrics_summary": "{}", "standings": None, "budget": 100, "formation": "4-3-3", "top_n": 5}
+    key = strategy_cache_key(inputs, LocalStubLLM())
+    assert len(key) == 64 and int(key, 16) >= 0
+    assert strategy_cache_key(dict(reversed(list(inputs.items()))), LocalStubLLM()) == key
+    assert strategy_cache_key({**inputs, "budget": 120}, LocalStubLLM()) != key
+
+    class Other(LocalStubLLM):
+        temperature = 0.1
+    assert strategy_cache_key(inputs, Other()) != key
+
+
+def test_ttl_hit_miss_and_expiry(agent):
+    llm = RecordingLLM()
+    first = generate_strategy(metrics(), 100, "4-3-3", llm=llm, ttl=60)
+    assert llm.calls == 1 and agent == [strategy_agent.CAMPEONATO_ID]
+    assert "Flamengo" in llm.prompts[0]
+
+    # hit: nem o LLM nem a classificação são consultados
+    assert generate_strategy(metrics(), 100, "4-3-3", llm=llm, ttl=60) == first
+    assert llm.calls == 1 and len(agent) == 1
+
+    # outra entrada: miss
+    generate_strategy(metrics(), 120, "4-3-3", llm=llm, ttl=60)
+    assert llm.calls == 2
+
+    # expirada: miss de novo
+    generate_strategy(metrics(), 100, "4-3-3", llm=llm, ttl=0)
+    assert llm.calls == 3
+    generate_strategy(metrics(), 100, "4-3-3", llm=llm, use_cache=False)
+    assert llm.calls == 4
+
+
+def test_stream_strategy_caches_full_text(agent):
+    llm = LocalStubLLM()
+    chunks = list(stream_strategy(metrics(), 100, "4-3-3", llm=llm, ttl=60))
+    assert len(chunks) > 1 and llm.calls == 1
+
+    # o hit devolve o texto completo de uma vez, o mesmo do generate
+    again = list(stream_strategy(metrics(), 100, "4-3-3", llm=llm, ttl=60))
+    assert again == ["".join(chunks)]
+    assert generate_strategy(metrics(), 100, "4-3-3", llm=llm, ttl=60) == again[0]
+    assert llm.calls == 1 and len(agent) == 1
+
+    # LLM sem stream: um único trecho
+    plain = list(stream_strategy(metrics(), 90, "3-5-2", llm=lambda prompt: "texto", ttl=60))
+    assert plain == ["texto"]
@@ -0,0 +1,104 @@
+# tests/test_substitutes.py
+
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents import substitutes
+from agents.substitutes import (
+    POSITION_COLUMN, PROFILE_COLUMNS, STATUS_COLUMN, UNAVAILABLE_STATUS, SubstituteIndex,
+)
+
+
+def market(n=80, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.poisson(1.0, (n, len(PROFILE_COLUMNS))) * rng.random((n, len(PROFILE_COLUMNS))),
+                      columns=PROFILE_COLUMNS)
+    df.insert(0, "player_id", np.arange(1, n + 1))
+    df["price"]         = np.round(rng.uniform(2, 20, n), 2)
+    df[POSITION_COLUMN] = rng.integers(1, 7, n)
+    df[STATUS_COLUMN]   = rng.choice([7, 7, 7, 2, 5], n)
+    df["games_played"]  = rng.integers(1, 10, n)
+    return df
+
+
+def brute_force(df, player_id, max_price=None, k=5):
+    """Filtro direto: mesma posição, preço ≤ teto, disponível; cosseno dos perfis padronizados na posição."""
+    me    = df.set_index("player_id").loc[player_id]
+    group = df[df[POSITION_COLUMN] == me[POSITION_COLUMN]].set_index("player_id")
+    raw   = group[PROFILE_COLUMNS].to_numpy(dtype="float64")
+    std   = raw.std(axis=0)
+    z     = (raw - raw.mean(axis=0)) / np.where(std > 0, std, 1)
+    z     = pd.DataFrame(z / np.linalg.norm(z, axis=1, keepdims=True), index=group.index)
+    ceiling = me["price"] if max_price is None else max_price
+    ok = group[(group["price"] <= ceiling) & ~group[STATUS_COLUMN].isin(UNAVAILABLE_STATUS)]
+    sims = (z.loc[ok.index.drop(player_id, errors="ignore")] @ z.loc[player_id]).sort_values(ascending=False)
+    return sims.head(k)
+
+
+def check(index, df, player_id, max_price=None, k=5):
+    got  = index.substitutes(player_id, max_price=max_price, k=k)
+    want = brute_force(df, player_id, max_price, k)
+    assert got["player_id"].tolist() == want.index.tolist()
+    assert np.allclose(got["similarity"].to_numpy(), want.to_numpy())
+    prices = df.set_index("player_id")["price"]
+    pos    = df.set_index("player_id")[POSITION_COLUMN]
+    assert (got["price"] <= (prices[player_id] if max_price is None else max_price)).all()
+    assert (pos.reindex(got["player_id"]) == pos[player_id]).all()
+
+
+@pytest.mark.parametrize("max_price", [None, 8.0, 100.0])
+def test_matches_brute_force(max_price):
+    df    = market()
+    index = SubstituteIndex(df)
+    for player_id in df["player_id"]:
+        check(index, df, player_id, max_price)
+
+
+def test_update_after_price_change():
+    df    = market()
+    index = SubstituteIndex(df)
+    new   = df.copy()
+    moved = new["player_id"].isin([3, 17])
+    new.loc[moved, "price"] += 10.0
+    new.loc[new["player_id"] == 40, "G_avg"] += 2.0
+
+    rebuilt = index.update(new)
+    assert rebuilt == sorted(set(new.loc[new["player_id"].isin([3, 17, 40]), POSITION_COLUMN]))
+    for player_id in new["player_id"]:
+        check(index, new, player_id)
+    assert index.update(new) == []
+
+
+def test_concurrent_get_builds_one_index(monkeypatch):
+    built = []
+
+    class Slow(SubstituteIndex):
+        def __init__(self, metrics_df):
+            built.append(1)
+            time.sleep(0.05)
+            super().__init__(metrics_df)
+
+    monkeypatch.setattr(substitutes, "SubstituteIndex", Slow)
+    monkeypatch.setattr(substitutes, "_INDEXES", {})
+    frames = [market(seed=0), market(seed=1)]
+    errors = []
+
+    def worker(i):
+        try:
+            df    = frames[i % 2]
+            index = substitutes.get_substitute_index(df, "rodadas")
+            index.substitutes(int(df["player_id"].iloc[0]))
+        except Exception as exc:  # pragma: no cover - só aparece se houver corrida
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert len(built) == 1
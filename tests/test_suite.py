@@ -0,0 +1,30 @@
+# tests/test_suite.py
+
+from benchmarks.suite import compare, run_suite
+
+CASES = {
+    "load_csv_cold", "load_csv_cached", "load_csv_fast", "player_metrics",
+    "team_exact_433", "team_greedy_433", "schedule_flatten",
+}
+
+
+def test_run_suite_smoke(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    report = run_suite(rounds=3, athletes=50, repeat=1)
+
+    assert set(report["results"]) == CASES
+    assert report["scale"] == {"rounds": 3, "athletes": 50, "seasons": 1, "seed": 0}
+    for res in report["results"].values():
+        assert res["repeat"] == 1
+        assert 0 <= res["min_ms"] <= res["median_ms"] <= res["max_ms"]
+
+
+def test_compare_flags_regressions():
+    baseline = {"results": {"a": {"median_ms": 10.0}, "b": {"median_ms": 10.0}, "gone": {"median_ms": 5.0}}}
+    current  = {"results": {"a": {"median_ms": 11.0}, "b": {"median_ms": 13.0}, "new": {"median_ms": 1.0}}}
+
+    rows = {row["case"]: row for row in compare(current, baseline, tolerance=0.2)}
+    assert set(rows) == {"a", "b"}              # casos de um lado só ficam de fora
+    assert not rows["a"]["regression"] and rows["a"]["ratio"] == 1.1
+    assert rows["b"]["regression"] and rows["b"]["ratio"] == 1.3
+    assert not compare(current, baseline, tolerance=0.5)[1]["regression"]
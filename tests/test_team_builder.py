@@ -0,0 +1,74 @@
+# tests/test_team_builder.py
+
+from itertools import combinations, product
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import agents.team_builder as team_builder
+from agents.team_builder import build_optimal_team, build_lineups_batch, expand_formation
+
+FORMATION = {"Z": 2, "M": 2, "A": 1}   # + goleiro e técnico
+
+
+def random_market(rng, per_position=5):
+    rows = []
+    pid = 1
+    for pos in ("G", "L", "Z", "M", "A", "T"):
+        for _ in range(per_position):
+            rows.append({
+                "player_id": pid,
+                "position": pos,
+                "price": round(float(rng.uniform(2, 15)), 2),
+                "avg_points": round(float(rng.normal(4, 3)), 2),
+            })
+            pid += 1
+    df = pd.DataFrame(rows)
+    df["cost_benefit"] = df["avg_points"] / df["price"]
+    return df
+
+
+def brute_force_best(df, budget, formation):
+    """Maior soma de avg_points entre todas as escalações viáveis (None se nenhuma)."""
+    cents = dict(zip(df["player_id"], np.round(df["price"] * 100).astype(int)))
+    value = dict(zip(df["player_id"], df["avg_points"]))
+    groups = [
+        list(combinations(df.loc[df["position"] == pos, "player_id"], k))
+        for pos, k in expand_formation(formation).items() if k
+    ]
+    limit, best = int(np.floor(budget * 100 + 1e-6)), None
+    for choice in product(*groups):
+        ids = [i for group in choice for i in group]
+        if sum(cents[i] for i in ids) <= limit:
+            total = sum(value[i] for i in ids)
+            best = total if best is None else max(best, total)
+    return best
+
+
+@pytest.mark.parametrize("chunk", [team_builder.MERGE_CHUNK, 3])
+def test_exact_matches_brute_force(monkeypatch, chunk):
+    # chunk=3 força o merge em muitos blocos pequenos
+    monkeypatch.setattr(team_builder, "MERGE_CHUNK", chunk)
+    rng = np.random.default_rng(7)
+    for case in range(45):
+        df = random_market(rng)
+        budget = float(rng.uniform(20, 80))
+        expected = brute_force_best(df, budget, FORMATION)
+        if expected is None:
+            with pytest.raises(RuntimeError):
+                build_optimal_team(df, budget, FORMATION, objective="avg_points")
+            continue
+        team = build_optimal_team(df, budget, FORMATION, objective="avg_points")
+        assert team["price"].sum() <= budget + 1e-9, case
+        assert team["avg_points"].sum() == pytest.approx(expected), case
+
+
+def test_batch_matches_single_solves():
+    rng = np.random.default_rng(11)
+    df = random_market(rng, per_position=6)
+    budgets = [40.0, 55.0, 70.0]
+    batch = build_lineups_batch(df, budgets, formations=["4-3-3", "3-5-2"], objective="avg_points")
+    for row in batch.itertuples():
+        team = build_optimal_team(df, row.budget, row.formation, objective="avg_points")
+        assert team["avg_points"].sum() == pytest.approx(row.objective)
@@ -0,0 +1,18 @@
+import os
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def load_config() -> None:
+    """
+    Carrega o .env da raiz do sensai2 uma única vez por processo.
+    Chamadas seguintes não fazem nada.
+    """
+    from dotenv import load_dotenv, find_dotenv
+    load_dotenv(find_dotenv())
+
+
+def get_setting(name: str, default: str = None) -> str:
+    """Lê uma variável de ambiente, garantindo que o .env já foi carregado."""
+    load_config()
+    return os.getenv(name, default)
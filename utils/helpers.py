@@ -1,14 +1,161 @@
 import pandas as pd
 import os
+import re
+import time
+import shutil
 
-def save_df(df: pd.DataFrame, path: str, filename: str):
+PROCESSED_DIR = os.path.join("data", "processed")
+COMPRESSION   = "zstd"
+CURRENT_FILE  = "CURRENT"
+VERSION_RE    = re.compile(r"^v(\d+)-\d+$")    # v<time_ns>-<pid>
+
+
+def _atomic_write(write, path: str) -> str:
+    """Grava via `write(tmp)` num arquivo temporário ao lado e troca com os.replace."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp{os.getpid()}"
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return path
+
+
+def save_df(df: pd.DataFrame, path: str, filename: str, base_dir: str = None) -> str:
     """
-    Salva o DataFrame em CSV dentro de data/processed.
+    Salva o DataFrame dentro de data/processed, de forma atômica (quem lê
+    nunca vê um arquivo pela metade). O formato segue a extensão:
+    .parquet (comprimido) ou .csv.
 
     :param df: DataFrame a salvar
     :param path: subpasta em data/processed (ex: 'players')
-    :param filename: nome do arquivo (ex: 'metrics.csv')
+    :param filename: nome do arquivo (ex: 'metrics.csv' ou 'metrics.parquet')
+    :param base_dir: pasta base no lugar de data/processed
+    :return: caminho gravado
+    """
+    full_path = os.path.join(base_dir or PROCESSED_DIR, path, filename)
+    if filename.endswith(".parquet"):
+        return _atomic_write(lambda tmp: df.to_parquet(tmp, index=False, compression=COMPRESSION), full_path)
+    return _atomic_write(lambda tmp: df.to_csv(tmp, index=False), full_path)
+
+
+def save_partitioned(
+    df: pd.DataFrame,
+    dataset: str,
+    partition_col: str = "rodada",
+    base_dir: str = None,
+    compression: str = COMPRESSION
+) -> list:
+    """
+    Salva o DataFrame como dataset parquet particionado (layout hive, uma
+    versão por gravação: `<dataset>/rodada=8/<versão>/part-0.parquet`, com a
+    versão atual no arquivo `rodada=8/CURRENT`). Cada partição presente em
+    `df` é substituída inteira e de forma atômica; as demais ficam como estão.
+
+    :param dataset: subpasta em data/processed (ex: 'metrics')
+    :param partition_col: coluna de partição (sai dos arquivos, vai para o caminho)
+    :return: caminhos gravados
+    """
+    root    = os.path.join(base_dir or PROCESSED_DIR, dataset)
+    written = []
+    for value, part in df.groupby(partition_col, sort=True):
+        part_dir = os.path.join(root, f"{partition_col}={value}")
+        data     = part.drop(columns=partition_col)
+        version  = f"v{time.time_ns()}-{os.getpid()}"
+        # a versão nova é montada ao lado e publicada trocando o CURRENT;
+        # quem lê vê a versão anterior ou a nova, nunca a partição ausente
+        staging  = os.path.join(part_dir, version + ".tmp")
+        os.makedirs(staging)
+        data.to_parquet(os.path.join(staging, "part-0.parquet"), index=False, compression=compression)
+        os.replace(staging, os.path.join(part_dir, version))
+        _atomic_write(lambda tmp: _write_text(tmp, version), os.path.join(part_dir, CURRENT_FILE))
+
+        _drop_old_versions(part_dir)
+        written.append(os.path.join(part_dir, version, "part-0.parquet"))
+    return written
+
+
+def _drop_old_versions(part_dir: str) -> None:
+    """
+    Apaga as versões mais antigas que a apontada pelo CURRENT (e o
+    part-0.parquet do layout sem versões). Versões mais novas ficam: podem
+    ser de outro processo que acabou de publicar ou está publicando.
+    """
+    current = os.path.basename(os.path.dirname(_partition_file(part_dir)))
+    m = VERSION_RE.match(current)
+    if not m:
+        return
+    newest = int(m.group(1))
+    for name in os.listdir(part_dir):
+        path = os.path.join(part_dir, name)
+        old  = VERSION_RE.match(name)
+        if old and int(old.group(1)) < newest:
+            shutil.rmtree(path, ignore_errors=True)
+        elif name == "part-0.parquet":
+            os.remove(path)
+
+
+def _partition_value(text: str):
+    return int(text) if text.lstrip("-").isdigit() else text
+
+
+def _write_text(path: str, text: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _partition_file(part_dir: str) -> str:
+    """Arquivo da versão atual da partição (ou o do layout antigo, sem CURRENT)."""
+    current = os.path.join(part_dir, CURRENT_FILE)
+    if os.path.exists(current):
+        with open(current, encoding="utf-8") as f:
+            return os.path.join(part_dir, f.read().strip(), "part-0.parquet")
+    return os.path.join(part_dir, "part-0.parquet")
+
+
+def _read_partition(part_dir: str, columns: list = None) -> pd.DataFrame:
+    try:
+        return pd.read_parquet(_partition_file(part_dir), columns=columns)
+    except FileNotFoundError:
+        # um save concorrente apagou a versão entre ler o CURRENT e abrir o arquivo
+        return pd.read_parquet(_partition_file(part_dir), columns=columns)
+
+
+def load_partitioned(
+    dataset: str,
+    partitions: list = None,
+    columns: list = None,
+    partition_col: str = "rodada",
+    base_dir: str = None
+) -> pd.DataFrame:
+    """
+    Lê um dataset de save_partitioned, abrindo só as partições e colunas pedidas.
+
+    :param partitions: valores da coluna de partição (padrão: todas)
+    :param columns: colunas a ler (padrão: todas); a de partição sempre vem
     """
-    full_path = os.path.join("data", "processed", path)
-    os.makedirs(full_path, exist_ok=True)
-    df.to_csv(os.path.join(full_path, filename), index=False)
+    # a coluna de partição não existe nos arquivos: sai do pedido e volta pelo caminho
+    read_cols = None if columns is None else [c for c in columns if c != partition_col]
+    root = os.path.join(base_dir or PROCESSED_DIR, dataset)
+    if not os.path.isdir(root):
+        raise FileNotFoundError(f"Dataset não encontrado: {root}")
+    dirs = [
+        (d.split("=", 1)[1], d) for d in os.listdir(root)
+        if d.startswith(f"{partition_col}=") and ".tmp" not in d
+    ]
+    # ordem das partições pelo valor: numérica se todos forem inteiros (rodada=2 antes de rodada=10)
+    numeric = all(isinstance(_partition_value(v), int) for v, _ in dirs)
+    dirs.sort(key=lambda item: _partition_value(item[0]) if numeric else item[0])
+    wanted = None if partitions is None else {str(p) for p in partitions}
+    frames = []
+    for value, d in dirs:
+        if wanted is not None and value not in wanted:
+            continue
+        part = _read_partition(os.path.join(root, d), read_cols)
+        part.insert(0, partition_col, _partition_value(value))
+        frames.append(part)
+    if not frames:
+        return pd.DataFrame(columns=[partition_col] + list(read_cols or []))
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,253 @@
+# utils/instrumentation.py
+#
+# Instrumentação leve das etapas do pipeline. Cada chamada instrumentada vira
+# um "span" com tempo de parede, linhas de entrada/saída e a variação dos
+# contadores da execução durante a chamada (bytes baixados, hits/misses de
+# cache HTTP e de CSV...). Os spans ficam num buffer em memória (painel do
+# Streamlit) e, se PIPELINE_LOG estiver definido, viram linhas JSON no log.
+#
+# A execução atual fica num ContextVar: sessões concorrentes do Streamlit
+# (uma thread cada) têm ids e contadores próprios. Threads de um pool não
+# herdam o contexto; a função submetida deve passar por `bind`.
+#
+#   @instrument("metrics")               # decorator
+#   with stage("scores", rows_in=n): ... # context manager
+#   with profile_run("run.prof"): ...    # dump do cProfile de uma execução
+#
+# Só usa a biblioteca padrão: pode ser importado pelos agentes sem custo.
+
+import io
+import json
+import contextvars
+import time
+import pstats
+import inspect
+import logging
+import cProfile
+import functools
+import threading
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+
+MAX_SPANS = 2000
+MAX_RUNS  = 256    # execuções com contadores guardados
+
+logger = logging.getLogger("sensai2.pipeline")
+
+_lock         = threading.Lock()
+_counters     = {}
+_run_counters = OrderedDict()   # {run_id: {contador: valor}}, só as MAX_RUNS mais recentes
+_spans        = deque(maxlen=MAX_SPANS)
+_last_run     = {"id": 0}
+_current_run  = contextvars.ContextVar("pipeline_run", default=0)
+_profile_lock = threading.Lock()
+_log_ready    = {"done": False}
+
+
+# ─── contadores ─────────────────────────────────────────────────────────────
+def count(name: str, n: int = 1) -> None:
+    """Soma `n` ao contador `name` (ex: http_bytes, csv_cache_hits), no total e na execução atual."""
+    run_id = _current_run.get()
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+        run = _run_counters.get(run_id)
+        if run is not None:
+            run[name] = run.get(name, 0) + n
+
+
+def counters(run_id: int = None) -> dict:
+    """Contadores do processo inteiro (run_id None), ou só da execução `run_id`."""
+    with _lock:
+        return dict(_counters if run_id is None else _run_counters.get(run_id, {}))
+
+
+# ─── spans ──────────────────────────────────────────────────────────────────
+def begin_run() -> int:
+    """
+    Inicia uma nova execução (ex: um rerun do Streamlit) no contexto atual;
+    spans e contadores seguintes desse contexto levam o novo id.
+    """
+    with _lock:
+        _last_run["id"] += 1
+        run_id = _last_run["id"]
+        _run_counters[run_id] = {}
+        while len(_run_counters) > MAX_RUNS:
+            _run_counters.popitem(last=False)
+    _current_run.set(run_id)
+    return run_id
+
+
+def current_run() -> int:
+    """Id da execução do contexto atual (0 fora de qualquer execução)."""
+    return _current_run.get()
+
+
+def bind(fn):
+    """
+    Envolve `fn` para rodar na execução do contexto atual, em outra thread
+    (ex: `pool.submit(bind(fetch), ...)`): spans e contadores vão para ela.
+    """
+    run_id = _current_run.get()
+
+    @functools.wraps(fn)
+    def call(*args, **kwargs):
+        token = _current_run.set(run_id)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current_run.reset(token)
+    return call
+
+
+def spans(run_id: int = None) -> list:
+    """Spans registrados (de uma execução, se `run_id` for informado), do mais antigo ao mais novo."""
+    with _lock:
+        return [s for s in _spans if run_id is None or s["run"] == run_id]
+
+
+def _setup_log() -> None:
+    # configura o handler na primeira emissão: PIPELINE_LOG=stderr ou caminho de arquivo
+    if _log_ready["done"]:
+        return
+    _log_ready["done"] = True
+    from utils.config import get_setting
+    target = get_setting("PIPELINE_LOG")
+    if not target:
+        return
+    handler = logging.StreamHandler() if target == "stderr" else logging.FileHandler(target, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def _rows(obj):
+    if obj is None or isinstance(obj, (str, bytes, dict)):
+        return None
+    shape = getattr(obj, "shape", None)
+    if shape:
+        return int(shape[0])
+    return len(obj) if isinstance(obj, (list, tuple)) else None
+
+
+def _finish(span: dict, start: float, before: dict) -> None:
+    span["wall_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    after = counters(span["run"] or None)
+    for name, value in after.items():
+        delta = value - before.get(name, 0)
+        if delta:
+            span[name] = delta
+    with _lock:
+        _spans.append(span)
+    _setup_log()
+    if logger.handlers:
+        logger.info(json.dumps(span, default=str))
+
+
+@contextmanager
+def stage(name: str, rows_in: int = None):
+    """
+    Mede um trecho de código. O dict devolvido aceita campos extras
+    (ex: `span["rows_out"] = len(df)`), gravados junto com o tempo.
+    """
+    run_id = _current_run.get()
+    span = {"stage": name, "run": run_id, "ts": time.time(), "thread": threading.current_thread().name}
+    if rows_in is not None:
+        span["rows_in"] = rows_in
+    before, start = counters(run_id or None), time.perf_counter()
+    try:
+        yield span
+    except BaseException as exc:
+        span["error"] = type(exc).__name__
+        raise
+    finally:
+        _finish(span, start, before)
+
+
+def instrument(name: str = None):
+    """
+    Decorator: registra um span por chamada, com rows_in (primeiro
+    argumento tabular) e rows_out (resultado). Em geradores, o span
+    cobre a iteração inteira e rows_out conta os itens produzidos.
+    """
+    def decorate(fn):
+        label = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+        def rows_in(args):
+            return _rows(args[0]) if args else None
+
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def gen_wrapper(*args, **kwargs):
+                with stage(label, rows_in(args)) as span:
+                    n = 0
+                    for item in fn(*args, **kwargs):
+                        n += 1
+                        yield item
+                    span["rows_out"] = n
+            return gen_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(label, rows_in(args)) as span:
+                result = fn(*args, **kwargs)
+                out = _rows(result)
+                if out is not None:
+                    span["rows_out"] = out
+                return result
+        return wrapper
+    return decorate
+
+
+def summarize(records: list) -> list:
+    """Agrega spans por etapa: chamadas, tempo total/máximo e contadores somados."""
+    table = {}
+    for s in records:
+        row = table.setdefault(s["stage"], {"stage": s["stage"], "calls": 0, "total_ms": 0.0, "max_ms": 0.0})
+        row["calls"]    += 1
+        row["total_ms"] += s["wall_ms"]
+        row["max_ms"]    = max(row["max_ms"], s["wall_ms"])
+        for key, value in s.items():
+            if key.startswith(("http_", "csv_")) or key in ("rows_in", "rows_out"):
+                row[key] = row.get(key, 0) + value
+        if "error" in s:
+            row["errors"] = row.get("errors", 0) + 1
+    return sorted(table.values(), key=lambda r: -r["total_ms"])
+
+
+# ─── profiling ──────────────────────────────────────────────────────────────
+@contextmanager
+def profile_run(path: str = None, top: int = 30):
+    """
+    Liga o cProfile durante o bloco. Ao sair, grava o dump binário em `path`
+    (abre com `python -m pstats` ou snakeviz) e devolve, no dict produzido,
+    o texto com as `top` funções por tempo acumulado.
+
+    Só um perfil por processo: se outra execução já estiver sendo perfilada,
+    o bloco roda sem perfil e o dict traz `skipped` com o motivo.
+    """
+    result = {}
+    if not _profile_lock.acquire(blocking=False):
+        result["skipped"] = result["text"] = "Outra execução já está sendo perfilada neste processo."
+        yield result
+        return
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError as exc:
+        # outro profiler (fora deste módulo) já está ativo
+        _profile_lock.release()
+        result["skipped"] = result["text"] = str(exc)
+        yield result
+        return
+    try:
+        yield result
+    finally:
+        profile.disable()
+        _profile_lock.release()
+        if path:
+            profile.dump_stats(path)
+            result["path"] = path
+        out = io.StringIO()
+        pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(top)
+        result["text"] = out.getvalue()
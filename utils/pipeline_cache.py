@@ -0,0 +1,198 @@
+# utils/pipeline_cache.py
+#
+# Cache das etapas do pipeline para as páginas Streamlit. Cada etapa é
+# memorizada com `st.cache_data` (compartilhado entre sessões), com TTL e
+# nº máximo de entradas explícitos, chaveada só pelas suas entradas reais:
+# impressão digital dos CSVs (ou endpoint/params da API), orçamento,
+# formação, rodada, time. Mudar um widget só recalcula o que depende dele.
+
+import os
+import json
+import streamlit as st
+
+from agents.load_cartola_csv import fetch_all_cartola_csvs, list_round_files, DEFAULT_DIR
+from agents.fetch_data       import fetch_raw_data, get_client
+from agents.analyze_data     import compute_player_metrics
+from agents.athlete_store    import open_store
+from agents.strategy_agent   import generate_strategy
+from agents.team_builder     import build_optimal_team
+from agents.fetch_matches    import fetch_next_round_matches, fetch_last_results_by_team
+from agents.schedule_index   import get_schedule_index
+from agents.standings_engine import local_standings
+from agents.projection       import project_points
+from agents.risk             import simulate_lineup
+from agents.substitutes      import get_substitute_index
+from utils.instrumentation   import begin_run, spans, summarize, profile_run
+
+# TTLs (segundos) e limites de entradas por etapa
+DATA_TTL      = 60 * 60
+STRATEGY_TTL  = 60 * 60 * 6
+SCHEDULE_TTL  = 60 * 10
+RESULTS_TTL   = 60 * 10
+MAX_ENTRIES   = 32
+
+PROFILE_DIR   = os.path.join("data", "cache", "profiles")
+
+
+def data_fingerprint(dir_path: str = None) -> tuple:
+    """
+    Impressão digital dos CSVs de rodada: (nome, tamanho, mtime) de cada arquivo.
+    Custa só um `stat` por arquivo e muda quando qualquer rodada muda.
+    """
+    return tuple(
+        (os.path.basename(f), os.path.getsize(f), os.stat(f).st_mtime_ns)
+        for f in list_round_files(dir_path or DEFAULT_DIR)
+    )
+
+
+def csv_source(dir_path: str = None) -> tuple:
+    """Chave de origem para os CSVs locais."""
+    return ("csv", dir_path or DEFAULT_DIR, data_fingerprint(dir_path))
+
+
+def api_source(endpoint: str, params: dict = None) -> tuple:
+    """Chave de origem para dados brutos da API Futebol."""
+    return ("api", endpoint, json.dumps(params or {}, sort_keys=True))
+
+
+@st.cache_data(ttl=DATA_TTL, max_entries=MAX_ENTRIES, show_spinner="Carregando dados...")
+def source_frame(source: tuple):
+    kind, location, extra = source
+    if kind == "csv":
+        return fetch_all_cartola_csvs(location)
+    return fetch_raw_data(location, params=json.loads(extra))
+
+
+@st.cache_resource(max_entries=MAX_ENTRIES, show_spinner="Abrindo store de atletas...")
+def athlete_store(source: tuple):
+    # um único objeto por processo: os arrays são memory maps do disco,
+    # compartilhados entre sessões (e com o worker que os escreve)
+    kind, location, _ = source
+    return open_store(location)
+
+
+@st.cache_data(ttl=DATA_TTL, max_entries=MAX_ENTRIES, show_spinner="Calculando métricas...")
+def player_metrics(source: tuple):
+    if source[0] == "csv":
+        return athlete_store(source).metrics()
+    return compute_player_metrics(source_frame(source))
+
+
+@st.cache_data(ttl=SCHEDULE_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def standings(campeonato_id: int, rodada: int = None):
+    # calculada localmente a partir do cronograma: vale para qualquer rodada
+    return local_standings(campeonato_id, rodada)
+
+
+@st.cache_data(ttl=DATA_TTL, max_entries=MAX_ENTRIES, show_spinner="Projetando pontuações...")
+def projected_metrics(source: tuple, campeonato_id: int, rodada: int):
+    # classificação ao fim da rodada anterior; sem confrontos/classificação
+    # (API fora do ar), a projeção usa só os scouts
+    try:
+        matches = next_round_matches(campeonato_id, rodada)
+    except (RuntimeError, KeyError):
+        matches = None
+    try:
+        table = standings(campeonato_id, rodada - 1)
+    except (RuntimeError, KeyError):
+        table = None
+    return project_points(player_metrics(source), matches, table)
+
+
+@st.cache_data(ttl=STRATEGY_TTL, max_entries=MAX_ENTRIES, show_spinner="Gerando estratégia...")
+def strategy(source: tuple, budget: float, formation: str) -> str:
+    return generate_strategy(player_metrics(source), budget, formation)
+
+
+@st.cache_data(ttl=DATA_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def optimal_team(source: tuple, budget: float, formation, campeonato_id: int = None, rodada: int = None):
+    # com rodada informada, maximiza projected_points; senão, avg_points
+    if rodada is not None:
+        return build_optimal_team(projected_metrics(source, campeonato_id, rodada), budget, formation)
+    return build_optimal_team(player_metrics(source), budget, formation)
+
+
+@st.cache_data(ttl=DATA_TTL, max_entries=MAX_ENTRIES, show_spinner="Simulando rodadas...")
+def lineup_risk(source: tuple, lineup: tuple, target: float) -> dict:
+    return simulate_lineup(list(lineup), source_frame(source), target=target, seed=0)
+
+
+@st.cache_data(ttl=DATA_TTL, max_entries=MAX_ENTRIES * 4, show_spinner=False)
+def substitutes(source: tuple, player_id: int, max_price: float, k: int = 5):
+    index = get_substitute_index(player_metrics(source), source[1])
+    return index.substitutes(player_id, max_price=max_price, k=k)
+
+
+@st.cache_data(ttl=SCHEDULE_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def next_round_matches(campeonato_id: int, rodada: int):
+    return fetch_next_round_matches(campeonato_id, rodada)
+
+
+@st.cache_data(ttl=SCHEDULE_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def team_names(campeonato_id: int) -> dict:
+    return get_schedule_index(campeonato_id).team_names()
+
+
+@st.cache_data(ttl=RESULTS_TTL, max_entries=MAX_ENTRIES * 4, show_spinner=False)
+def last_results(campeonato_id: int, team_id: int, num_matches: int):
+    return fetch_last_results_by_team(campeonato_id, team_id, num_matches=num_matches, concurrency=4)
+
+
+STAGES = [
+    source_frame, athlete_store, player_metrics, standings, projected_metrics, strategy,
+    optimal_team, lineup_risk, substitutes, next_round_matches, team_names, last_results,
+]
+
+
+def refresh_data(campeonato_id: int = None) -> None:
+    """
+    Descarta os caches de todas as etapas (para todas as sessões) e as
+    respostas HTTP não permanentes; o cronograma é baixado de novo.
+    """
+    for stage in STAGES:
+        stage.clear()
+    get_client().cache.clear(keep_permanent=True)
+    if campeonato_id is not None:
+        get_schedule_index(campeonato_id, max_age=0)
+
+
+def refresh_button(campeonato_id: int = None) -> None:
+    """Botão "Atualizar dados" na barra lateral."""
+    if st.sidebar.button("🔄 Atualizar dados"):
+        refresh_data(campeonato_id)
+        st.sidebar.success("Dados atualizados.")
+
+
+def run_instrumented(page) -> None:
+    """
+    Executa a página `page` (função sem argumentos) como uma execução
+    instrumentada. Na barra lateral:
+      * "Tempos por etapa": tabela com os spans desta execução (etapas
+        servidas pelo st.cache_data não aparecem — não rodaram)
+      * "Perfilar esta execução": roda a página sob o cProfile e grava o dump
+    """
+    run_id  = begin_run()
+    show    = st.sidebar.checkbox("⏱️ Tempos por etapa")
+    profile = st.sidebar.checkbox("🔬 Perfilar esta execução (cProfile)")
+
+    if profile:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f"run_{run_id}.prof")
+        with profile_run(path) as prof:
+            page()
+        with st.sidebar.expander("Perfil (tempo acumulado)"):
+            if prof.get("skipped"):
+                st.caption(prof["skipped"])
+            else:
+                st.caption(f"Dump salvo em {path}")
+                st.code(prof["text"])
+    else:
+        page()
+
+    if show:
+        rows = summarize(spans(run_id))
+        st.sidebar.subheader("⏱️ Tempos por etapa")
+        if rows:
+            st.sidebar.dataframe(rows, hide_index=True)
+        else:
+            st.sidebar.caption("Nada recalculado: tudo veio do cache.")